@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .custom_types import IOModule, IOType
+from .IOOPColumns import IO_TYPES, MODULES, IOOPColumns
+
+# Access pattern of a stream, indexed by the codes in AccessPatterns.pattern.
+PATTERNS: Tuple[str, ...] = (
+    "sequential", "strided", "random", "overlapping_writes", "single",
+)
+SEQUENTIAL, STRIDED, RANDOM, OVERLAPPING_WRITES, SINGLE = range(len(PATTERNS))
+
+# Lower edges of the request size buckets, the same buckets as the SIZE_*
+# counters of the Darshan POSIX and MPI-IO modules.
+SIZE_BUCKETS: Tuple[int, ...] = (
+    0, 100, 1 << 10, 10 << 10, 100 << 10, 1 << 20, 4 << 20, 10 << 20, 100 << 20,
+    1 << 30,
+)
+SIZE_BUCKET_NAMES: Tuple[str, ...] = (
+    "0_100", "100_1K", "1K_10K", "10K_100K", "100K_1M", "1M_4M", "4M_10M",
+    "10M_100M", "100M_1G", "1G_PLUS",
+)
+
+
+class AccessPatterns:
+    """
+    Access patterns of the (module, rank, file, type) streams of a trace, one
+    entry per stream in every array attribute.
+
+    A stream is `sequential` if enough accesses start where the previous one
+    ended, `strided` if enough consecutive accesses are the same non-zero
+    distance (`stride`, the most common one of the stream) apart, and `random`
+    otherwise. Accesses repeated at the same offset are not strided. Write
+    streams in which two accesses cover the same bytes are `overlapping_writes`
+    regardless of their order. A stream of a single access has no pattern and
+    is `single`, with NaN pair fractions.
+    """
+
+    def __init__(
+        self,
+        mod_code: np.ndarray,
+        rank: np.ndarray,
+        record_id: np.ndarray,
+        type_code: np.ndarray,
+        count: np.ndarray,
+        bytes: np.ndarray,
+        pattern: np.ndarray,
+        stride: np.ndarray,
+        sequential_fraction: np.ndarray,
+        small_fraction: np.ndarray,
+        unaligned_fraction: np.ndarray,
+        size_histogram: np.ndarray,
+    ):
+        self.mod_code = mod_code
+        self.rank = rank
+        self.record_id = record_id
+        self.type_code = type_code
+        self.count = count
+        self.bytes = bytes
+        self.pattern = pattern
+        self.stride = stride
+        self.sequential_fraction = sequential_fraction
+        self.small_fraction = small_fraction
+        self.unaligned_fraction = unaligned_fraction
+        self.size_histogram = size_histogram
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    def keys(self) -> List[Tuple[IOModule, int, int, IOType]]:
+        """
+        The (module, rank, record id, type) key of every stream.
+        """
+        return [
+            (MODULES[m], r, f, IO_TYPES[t])
+            for m, r, f, t in zip(
+                self.mod_code.tolist(), self.rank.tolist(),
+                self.record_id.tolist(), self.type_code.tolist(),
+            )
+        ]
+
+    def pattern_counts(self) -> Dict[str, int]:
+        """
+        Number of streams per access pattern.
+        """
+        counts = np.bincount(self.pattern, minlength=len(PATTERNS))
+        return dict(zip(PATTERNS, counts.tolist()))
+
+    def to_pandas(self):
+        """
+        One row per stream, with the size histogram as `size_<bucket>` columns.
+        """
+        import pandas as pd
+
+        data = {
+            "module": pd.Categorical.from_codes(
+                self.mod_code, categories=[mod.name for mod in MODULES]
+            ),
+            "rank": self.rank,
+            "record_id": self.record_id,
+            "type": pd.Categorical.from_codes(
+                self.type_code, categories=[t.name for t in IO_TYPES]
+            ),
+            "count": self.count,
+            "bytes": self.bytes,
+            "pattern": pd.Categorical.from_codes(self.pattern, categories=PATTERNS),
+            "stride": self.stride,
+            "sequential_fraction": self.sequential_fraction,
+            "small_fraction": self.small_fraction,
+            "unaligned_fraction": self.unaligned_fraction,
+        }
+        for i, name in enumerate(SIZE_BUCKET_NAMES):
+            data[f"size_{name}"] = self.size_histogram[:, i]
+        return pd.DataFrame(data)
+
+
+def analyze_access_patterns(
+    ops: IOOPColumns,
+    small_size: int = 4096,
+    alignment: int = 4096,
+    threshold: float = 0.8,
+) -> AccessPatterns:
+    """
+    Classifies the access pattern of every (module, rank, file, type) stream of
+    DXT segments with vectorized differences over the sorted offset columns.
+
+    :param ops: The segments to analyze.
+    :type ops: IOOPColumns
+    :param small_size: Accesses shorter than this many bytes count as small.
+    :type small_size: int
+    :param alignment: Accesses whose offset is not a multiple of this count as
+                      unaligned, e.g. the file system block or stripe size.
+    :type alignment: int
+    :param threshold: Fraction of consecutive access pairs that must be
+                      contiguous (or equally strided) for a stream to be
+                      sequential (or strided).
+    :type threshold: float
+    :rtype: AccessPatterns
+    """
+    # Streams in time order: sort by stream key, then start time.
+    order = np.lexsort(
+        (ops.start_time, ops.type_code, ops.record_id, ops.rank, ops.mod_code)
+    )
+    mod_code = ops.mod_code[order]
+    rank = ops.rank[order]
+    record_id = ops.record_id[order]
+    type_code = ops.type_code[order]
+    offset = ops.offset[order]
+    length = ops.length[order]
+    n = len(order)
+
+    new_stream = np.ones(n, dtype=bool)
+    new_stream[1:] = (
+        (mod_code[1:] != mod_code[:-1]) | (rank[1:] != rank[:-1])
+        | (record_id[1:] != record_id[:-1]) | (type_code[1:] != type_code[:-1])
+    )
+    heads = np.flatnonzero(new_stream)
+    stream = np.cumsum(new_stream) - 1
+    nstreams = len(heads)
+    count = np.bincount(stream, minlength=nstreams)
+
+    # Consecutive pairs inside a stream, labelled by the stream of the second.
+    pair = ~new_stream[1:]
+    pair_stream = stream[1:][pair]
+    pairs = np.bincount(pair_stream, minlength=nstreams)
+    contiguous = (offset[1:] == offset[:-1] + length[:-1])[pair]
+    stride_all = (offset[1:] - offset[:-1])[pair]
+
+    has_pairs = pairs > 0
+
+    # The candidate stride of every stream is its most common non-zero stride,
+    # the smallest one on ties: run lengths of the (stream, stride) pairs in
+    # sorted order, then the longest run of every stream.
+    nonzero = stride_all != 0
+    by_stride = np.lexsort((stride_all[nonzero], pair_stream[nonzero]))
+    s_stream = pair_stream[nonzero][by_stride]
+    s_stride = stride_all[nonzero][by_stride]
+    run = np.ones(len(s_stream), dtype=bool)
+    run[1:] = (s_stream[1:] != s_stream[:-1]) | (s_stride[1:] != s_stride[:-1])
+    run_start = np.flatnonzero(run)
+    run_length = np.diff(np.append(run_start, len(s_stream)))
+    longest = np.lexsort((-run_length, s_stream[run_start]))
+    modal = longest[np.flatnonzero(np.diff(s_stream[run_start][longest], prepend=-1))]
+    stride = np.zeros(nstreams, dtype=np.int64)
+    stride[s_stream[run_start][modal]] = s_stride[run_start][modal]
+    same_stride = nonzero & (stride_all == stride[pair_stream])
+
+    def pair_fraction(mask):
+        hits = np.bincount(pair_stream[mask], minlength=nstreams)
+        out = np.full(nstreams, np.nan)
+        np.divide(hits, pairs, out=out, where=has_pairs)
+        return out
+
+    sequential_fraction = pair_fraction(contiguous)
+    strided_fraction = pair_fraction(same_stride)
+
+    # Overlapping writes: in offset order, a stream has overlapping accesses
+    # exactly if two neighbouring accesses overlap.
+    by_offset = np.lexsort((offset, stream))
+    o_stream = stream[by_offset]
+    o_start = offset[by_offset]
+    o_end = o_start + length[by_offset]
+    overlap = (o_stream[1:] == o_stream[:-1]) & (o_start[1:] < o_end[:-1])
+    overlapping = np.bincount(o_stream[1:][overlap], minlength=nstreams) > 0
+    is_write = type_code[heads] == IO_TYPES.index(IOType.WRITE)
+
+    pattern = np.full(nstreams, RANDOM, dtype=np.uint8)
+    strided = (strided_fraction >= threshold) & (pairs >= 2)
+    pattern[strided] = STRIDED
+    pattern[sequential_fraction >= threshold] = SEQUENTIAL
+    pattern[overlapping & is_write] = OVERLAPPING_WRITES
+    pattern[~has_pairs] = SINGLE
+    stride[pattern != STRIDED] = 0
+
+    def op_fraction(mask):
+        return np.bincount(stream[mask], minlength=nstreams) / np.maximum(count, 1)
+
+    bucket = np.searchsorted(SIZE_BUCKETS, length, side="right") - 1
+    size_histogram = np.bincount(
+        stream * len(SIZE_BUCKETS) + bucket, minlength=nstreams * len(SIZE_BUCKETS)
+    ).reshape(nstreams, len(SIZE_BUCKETS))
+
+    return AccessPatterns(
+        mod_code=mod_code[heads],
+        rank=rank[heads],
+        record_id=record_id[heads],
+        type_code=type_code[heads],
+        count=count,
+        bytes=np.add.reduceat(length, heads) if n else np.zeros(0, np.int64),
+        pattern=pattern,
+        stride=stride,
+        sequential_fraction=sequential_fraction,
+        small_fraction=op_fraction(length < small_size),
+        unaligned_fraction=op_fraction(offset % alignment != 0),
+        size_histogram=size_histogram,
+    )
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from trace_parser.instrument import ParseStats
+
+from .custom_types import IOModule
+
+# Layout of libdarshan's `struct segment_info`, the DXT segments of a record.
+SEGMENT_DTYPE = np.dtype([
+    ("offset", np.int64),
+    ("length", np.int64),
+    ("start_time", np.float64),
+    ("end_time", np.float64),
+])
+
+
+def read_dxt_module(fp: str, mod: str) -> List[dict]:
+    """
+    Reads the DXT records of one module of a Darshan log. Records are dicts
+    like those of pydarshan, except that `read_segments` and `write_segments`
+    are SEGMENT_DTYPE arrays copied straight from libdarshan's buffers instead
+    of lists of per-segment dicts.
+
+    :param fp: Path to the Darshan log.
+    :param mod: "DXT_POSIX" or "DXT_MPIIO".
+    :return: The records of the module, empty if the log has none.
+    """
+    from darshan.backend.cffi_backend import (
+        ffi, libdutil, log_close, log_get_modules, log_open
+    )
+
+    assert ffi.sizeof("struct segment_info") == SEGMENT_DTYPE.itemsize
+    log = log_open(fp)
+    try:
+        modules = log_get_modules(log)
+        if mod not in modules:
+            return []
+        mod_idx = modules[mod]["idx"]
+        header_size = ffi.sizeof("struct dxt_file_record")
+        buf = ffi.new("void **")
+        records = []
+        while libdutil.darshan_log_get_record(log["handle"], mod_idx, buf) >= 1:
+            try:
+                record = ffi.cast("struct dxt_file_record *", buf[0])
+                n_write = record.write_count
+                n_read = record.read_count
+                raw = ffi.buffer(
+                    ffi.cast("char *", buf[0]) + header_size,
+                    (n_write + n_read) * SEGMENT_DTYPE.itemsize,
+                )
+                segments = np.frombuffer(raw, dtype=SEGMENT_DTYPE).copy()
+                records.append({
+                    "id": record.base_rec.id,
+                    "rank": record.base_rec.rank,
+                    "hostname": ffi.string(record.hostname).decode("utf-8"),
+                    "write_count": n_write,
+                    "read_count": n_read,
+                    "write_segments": segments[:n_write],
+                    "read_segments": segments[n_write:],
+                })
+            finally:
+                # libdarshan reuses a non-NULL buffer for the next record.
+                libdutil.darshan_free(buf[0])
+                buf[0] = ffi.NULL
+        return records
+    finally:
+        log_close(log)
+
+
+def iter_segments(segments) -> Iterator[Tuple[int, int, float, float]]:
+    """
+    Yields (offset, length, start_time, end_time) of every segment, from a
+    SEGMENT_DTYPE array or a list of pydarshan segment dicts.
+    """
+    if isinstance(segments, np.ndarray):
+        yield from segments.tolist()
+        return
+    for seg in segments:
+        yield seg["offset"], seg["length"], seg["start_time"], seg["end_time"]
+
+
+class DXTLog(Mapping):
+    """
+    The DXT records of a Darshan log by module name ("DXT_POSIX", "DXT_MPIIO"),
+    a drop-in for the `records` of a DarshanReport restricted to the DXT modules.
+
+    Only the log's module table is read on construction. The records of a
+    module are read the first time the module is looked up, so memory grows
+    with the modules actually used, and none of the other Darshan modules
+    (POSIX, MPI-IO, STDIO, LUSTRE, HEATMAP, ...) are decoded at all.
+    """
+
+    def __init__(self, fp: str, stats: ParseStats | None = None):
+        """
+        :param fp: Path to the Darshan log.
+        :param stats: Records the "open" phase time and the `records.<module>`
+                      counts of every module read.
+        """
+        from darshan.backend.cffi_backend import log_close, log_get_modules, log_open
+
+        self.fp = fp
+        self.stats = ParseStats(enabled=False) if stats is None else stats
+        with self.stats.phase("open"):
+            log = log_open(fp)
+            try:
+                present = log_get_modules(log)
+            finally:
+                log_close(log)
+        self.modules: Tuple[str, ...] = tuple(
+            mod.value for mod in IOModule if mod.value in present
+        )
+        self._records: Dict[str, List[dict]] = dict()
+        self._names: Dict[int, str] = dict()
+
+    def __getitem__(self, mod: str) -> List[dict]:
+        if mod not in self._records:
+            if mod not in self.modules:
+                raise KeyError(mod)
+            with self.stats.phase("open"):
+                records = read_dxt_module(self.fp, mod)
+            self.stats.count(f"records.{mod}", len(records))
+            self._records[mod] = records
+        return self._records[mod]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.modules)
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+    def file_names(self, record_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Resolves record ids to file names through the name records of the log.
+        Only the names of the requested ids are read, and every id is resolved
+        once per instance.
+
+        :param record_ids: Record ids, e.g. the `id` of DXT records.
+        :return: The names of the ids found in the log's name records.
+        """
+        from darshan.backend.cffi_backend import (
+            log_close, log_lookup_name_records, log_open
+        )
+
+        missing = [rid for rid in set(record_ids) if rid not in self._names]
+        if missing:
+            with self.stats.phase("open"):
+                log = log_open(self.fp)
+                try:
+                    self._names.update(log_lookup_name_records(log, missing))
+                finally:
+                    log_close(log)
+        return {rid: self._names[rid] for rid in record_ids if rid in self._names}
+
+    @property
+    def loaded(self) -> Tuple[str, ...]:
+        """
+        The modules whose records have been read.
+        """
+        return tuple(self._records)
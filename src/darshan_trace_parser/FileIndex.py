@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from typing import Dict, Hashable, List, Tuple
+
+import numpy as np
+
+from .IOOPColumns import IO_TYPES, IOOPColumns
+from .custom_types import IOType
+
+# Per-file statistics of aggregate_by_file, in result order.
+FILE_STATS: Tuple[str, ...] = (
+    "ops", "bytes", "read_bytes", "write_bytes", "time", "ranks",
+)
+
+
+def path_prefix(name: str, depth: int) -> str:
+    """
+    The first `depth` components of a path, e.g. "/scratch/run1" for
+    "/scratch/run1/out/data.h5" and depth 2. Names that are not paths, like
+    "<STDOUT>", are returned unchanged.
+    """
+    if "/" not in name:
+        return name
+    absolute = name.startswith("/")
+    parts = [part for part in name.split("/") if part]
+    prefix = "/".join(parts[:depth])
+    return "/" + prefix if absolute else prefix
+
+
+class FileIndex:
+    """
+    Index from interned file id to the ranks that accessed the file and the row
+    ranges of their segments in the `ops` store it was built from.
+
+    The segments of one DXT record are contiguous rows of `ops`, so a file is
+    covered by one run of rows per (module, rank) record. The runs of file f are
+    `offsets[f]:offsets[f + 1]`, each with its `rank` and rows `start:stop`.
+    Built in one pass over the rows, without comparing files with each other.
+    """
+
+    def __init__(
+        self,
+        files: List[str],
+        offsets: np.ndarray,
+        rank: np.ndarray,
+        start: np.ndarray,
+        stop: np.ndarray,
+    ):
+        self.files = files
+        self.offsets = offsets
+        self.rank = rank
+        self.start = start
+        self.stop = stop
+        self._ids = {name: i for i, name in enumerate(files)}
+
+    @classmethod
+    def from_ops(cls, ops: IOOPColumns) -> FileIndex:
+        """
+        :param ops: The segments, with the rows of a record kept together as
+                    TraceParser.ops keeps them.
+        :rtype: FileIndex
+        """
+        n = len(ops)
+        file_id = ops.file_id
+        rank = ops.rank
+        heads = np.flatnonzero(np.concatenate((
+            [n > 0],
+            (file_id[1:] != file_id[:-1]) | (rank[1:] != rank[:-1])
+            | (ops.mod_code[1:] != ops.mod_code[:-1]),
+        )))
+        tails = np.append(heads[1:], n)
+        by_file = np.argsort(file_id[heads], kind="stable")
+        run_file = file_id[heads][by_file]
+        offsets = np.searchsorted(run_file, np.arange(len(ops.files) + 1))
+        return cls(
+            files=list(ops.files),
+            offsets=offsets,
+            rank=rank[heads][by_file],
+            start=heads[by_file],
+            stop=tails[by_file],
+        )
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def file_id(self, name: str) -> int:
+        """
+        :raises KeyError: If no segment accessed the file.
+        """
+        return self._ids[name]
+
+    def ranges(self, file_id: int) -> List[Tuple[int, slice]]:
+        """
+        The (rank, row slice) runs of a file, in row order.
+        """
+        first, last = self.offsets[file_id], self.offsets[file_id + 1]
+        return [
+            (rank, slice(start, stop))
+            for rank, start, stop in zip(
+                self.rank[first:last].tolist(), self.start[first:last].tolist(),
+                self.stop[first:last].tolist(),
+            )
+        ]
+
+    def rows(self, file_id: int) -> np.ndarray:
+        """
+        Positions of all segments accessing a file, in row order.
+        """
+        first, last = self.offsets[file_id], self.offsets[file_id + 1]
+        starts, stops = self.start[first:last], self.stop[first:last]
+        lengths = stops - starts
+        # Position i of the output lies in run r at starts[r] + i - (rows of the
+        # runs before r), built for all runs at once.
+        before = np.cumsum(lengths) - lengths
+        return np.repeat(starts - before, lengths) + np.arange(lengths.sum())
+
+    def ranks(self, file_id: int) -> np.ndarray:
+        """
+        The distinct ranks that accessed a file.
+        """
+        return np.unique(self.rank[self.offsets[file_id]:self.offsets[file_id + 1]])
+
+    @property
+    def nranks(self) -> np.ndarray:
+        """
+        Number of distinct ranks accessing every file.
+        """
+        run_file = np.repeat(np.arange(len(self.files)), np.diff(self.offsets))
+        return _distinct_ranks(run_file, self.rank, len(self.files))
+
+    @property
+    def shared(self) -> np.ndarray:
+        """
+        Ids of the files accessed by more than one rank.
+        """
+        return np.flatnonzero(self.nranks > 1)
+
+
+def aggregate_by_file(
+    ops: IOOPColumns, prefix: int | None = None, by_rank: bool = False
+) -> Dict[Hashable, Dict[str, float]]:
+    """
+    Sums the segments of every file, or of every path prefix, over whole columns.
+
+    :param ops: The segments.
+    :param prefix: Group the files by their first `prefix` path components
+                   instead, see path_prefix. None keeps one group per file.
+    :param by_rank: Split every group by rank, keying the results by
+                    (name, rank) instead of name.
+    :return: Dictionary mapping every file name, prefix or (name, rank) pair to
+             its statistics: the number of segments ("ops"), the bytes moved in
+             total, read and written, the summed segment duration ("time") and
+             the number of distinct ranks.
+    """
+    names = ops.files
+    if prefix is not None:
+        names = [path_prefix(name, prefix) for name in names]
+    keys, name_codes = np.unique(np.asarray(names, dtype=object), return_inverse=True)
+    keys = keys.tolist()
+    group = name_codes.ravel().astype(np.int64)[ops.file_id]
+    if by_rank:
+        ranks, rank_codes = np.unique(ops.rank, return_inverse=True)
+        group = group * len(ranks) + rank_codes.ravel()
+        codes, group = np.unique(group, return_inverse=True)
+        group = group.ravel()
+        keys = [
+            (keys[code // len(ranks)], ranks[code % len(ranks)].item())
+            for code in codes.tolist()
+        ]
+    size = len(keys)
+    is_read = ops.type_code == IO_TYPES.index(IOType.READ)
+    length = ops.length
+    stats = {
+        "ops": np.bincount(group, minlength=size),
+        "bytes": _sum_bytes(group, length, size),
+        "read_bytes": _sum_bytes(group[is_read], length[is_read], size),
+        "write_bytes": _sum_bytes(group[~is_read], length[~is_read], size),
+        "time": np.bincount(group, weights=ops.duration, minlength=size),
+    }
+    stats["ranks"] = _distinct_ranks(group, ops.rank, size)
+    columns = [stats[name].tolist() for name in FILE_STATS]
+    return {
+        key: dict(zip(FILE_STATS, values))
+        for key, values, n in zip(keys, zip(*columns), stats["ops"].tolist())
+        if n
+    }
+
+
+def _sum_bytes(group: np.ndarray, length: np.ndarray, size: int) -> np.ndarray:
+    return np.bincount(group, weights=length, minlength=size).astype(np.int64)
+
+
+def _distinct_ranks(group: np.ndarray, rank: np.ndarray, size: int) -> np.ndarray:
+    # Number of distinct ranks per group code, from the distinct (group, rank)
+    # pairs encoded as single integers.
+    rank_keys, rank_codes = np.unique(rank, return_inverse=True)
+    pairs = np.unique(group.astype(np.int64) * len(rank_keys) + rank_codes.ravel())
+    return np.bincount(pairs // max(len(rank_keys), 1), minlength=size)
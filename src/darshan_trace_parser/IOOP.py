@@ -2,34 +2,51 @@ from .custom_types import IOModule, IOType
 
 
 class IOOP:
+    # Slots instead of a per-instance __dict__: a trace holds millions of these.
+    # file_id is the interned id of the accessed file, see TraceParser.files.
+    __slots__ = (
+        "mod", "type", "rank", "length", "start_offset", "start_time", "end_time",
+        "file_id",
+    )
+
     def __init__(
-        self, mod: IOModule, type: IOType, rank, start_time, end_time, offset, length
+        self, mod: IOModule, type: IOType, rank, start_time, end_time, offset, length,
+        file_id: int | None = None,
     ):
-        assert start_time < end_time, (
-            f"start_time >= end_time: {start_time} >= {end_time}"
-        )
         self.mod = mod
         self.type = type
         self.rank = rank
+        self.file_id = file_id
         self.length = length
         self.start_offset = offset
-        self.end_offset = offset + length
         self.start_time = start_time
         self.end_time = end_time
 
+    @property
+    def end_offset(self):
+        return self.start_offset + self.length
+
     @property
     def duration(self):
         return self.end_time - self.start_time
 
     @property
     def bandwidth(self):
-<<<<<<< HEAD
-        assert self.duration > 0
         return self.length / self.duration if self.duration > 0 else 0
-=======
-        assert self.duration() > 0
-        return self.length / self.duration() if self.duration() > 0 else 0
->>>>>>> 70b303be2cdf5dfa5b27c4c446d50c57fa7b1d0b
+
+    def validate(self) -> "IOOP":
+        """
+        Checks that the segment ends after it starts. Not run on construction,
+        the TraceParser calls it when created with `validate=True`.
+
+        :return: The op itself.
+        :raises ValueError: If the segment does not end after its start.
+        """
+        if not self.start_time < self.end_time:
+            raise ValueError(
+                f"start_time >= end_time: {self.start_time} >= {self.end_time}"
+            )
+        return self
 
     def __str__(self):
         return (f"{self.mod.value} - {self.type.value} - {self.rank} - "
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from trace_parser.columns import ExportColumn, OpColumns
+
+from .custom_types import IOModule, IOType
+from .IOOP import IOOP
+
+# Code tables for the compact module/type columns. The position of a member in
+# these tuples is the code stored in `mod_code` / `type_code`.
+MODULES: Tuple[IOModule, ...] = tuple(IOModule)
+IO_TYPES: Tuple[IOType, ...] = (IOType.READ, IOType.WRITE)
+
+
+class IOOPColumns(OpColumns):
+    """
+    Struct-of-arrays store of DXT segments.
+
+    Every segment is one row spread over typed NumPy columns, so statistics can
+    be computed over whole columns instead of per-object attribute lookups.
+    `record_id` is the Darshan record id of the accessed file and `file_id` its
+    interned id, the position of the file name in the `files` table.
+    `IOOP` objects are only created on demand through indexing or iteration.
+    """
+
+    COLUMNS = {
+        "mod_code": np.uint8,
+        "type_code": np.uint8,
+        "rank": np.int64,
+        "record_id": np.uint64,
+        "file_id": np.int32,
+        "start_time": np.float64,
+        "end_time": np.float64,
+        "offset": np.int64,
+        "length": np.int64,
+    }
+    TABLES = ("files",)
+    OP_CLASS = IOOP
+    OP_FIELDS = (
+        ("mod_code", MODULES), ("type_code", IO_TYPES), "rank", "start_time",
+        "end_time", "offset", "length", "file_id",
+    )
+
+    @classmethod
+    def from_segments(
+        cls,
+        mod: IOModule,
+        io_type: IOType,
+        rank,
+        segments: np.ndarray | list[dict],
+        record_id: int = 0,
+        file_id: int = 0,
+    ) -> IOOPColumns:
+        """
+        Builds the columns of a single DXT segment list, e.g. the
+        `write_segments` of one rank record.
+
+        :param mod: Module the segments belong to.
+        :type mod: IOModule
+        :param io_type: Either IOType.READ or IOType.WRITE.
+        :type io_type: IOType
+        :param rank: Rank which issued the segments.
+        :param segments: A SEGMENT_DTYPE array as read by DXTLog, or segment dicts
+                         with `offset`, `length`, `start_time` and `end_time`
+                         keys, as returned by pydarshan.
+        :type segments: np.ndarray | list[dict]
+        :param record_id: Darshan record id of the file the segments access.
+        :type record_id: int
+        :param file_id: Interned id of that file, see TraceParser.file_codes.
+        :type file_id: int
+        :rtype: IOOPColumns
+        """
+        n = len(segments)
+
+        def column(key, dtype):
+            if isinstance(segments, np.ndarray):
+                return segments[key].astype(dtype)
+            return np.fromiter((seg[key] for seg in segments), dtype=dtype, count=n)
+
+        return cls(
+            mod_code=np.full(n, MODULES.index(mod), dtype=np.uint8),
+            type_code=np.full(n, IO_TYPES.index(io_type), dtype=np.uint8),
+            rank=np.full(n, rank, dtype=np.int64),
+            record_id=np.full(n, record_id, dtype=np.uint64),
+            file_id=np.full(n, file_id, dtype=np.int32),
+            start_time=column("start_time", np.float64),
+            end_time=column("end_time", np.float64),
+            offset=column("offset", np.int64),
+            length=column("length", np.int64),
+        )
+
+    def export_columns(self) -> Dict[str, ExportColumn]:
+        return {
+            "rank": self.rank,
+            "record_id": self.record_id,
+            "file": (self.file_id, self.files),
+            "module": (self.mod_code, [mod.name for mod in MODULES]),
+            "type": (self.type_code, [io_type.name for io_type in IO_TYPES]),
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "offset": self.offset,
+            "length": self.length,
+        }
+
+    @property
+    def end_offset(self) -> np.ndarray:
+        return self.offset + self.length
+
+    @property
+    def nbytes(self) -> np.ndarray:
+        return self.length
+
+    @property
+    def bandwidth(self) -> np.ndarray:
+        """
+        Bytes per second of every segment, 0 for segments without a positive
+        duration (same convention as `IOOP.bandwidth`).
+        """
+        duration = self.duration
+        out = np.zeros(len(self), dtype=np.float64)
+        np.divide(self.length, duration, out=out, where=duration > 0)
+        return out
+
+    def group_codes(self) -> Tuple[np.ndarray, List[Tuple[IOModule, IOType]]]:
+        """
+        Group codes over (module, type), see `OpColumns.group_indices`.
+        """
+        codes = self.mod_code.astype(np.intp) * len(IO_TYPES) + self.type_code
+        return codes, [(mod, io_type) for mod in MODULES for io_type in IO_TYPES]
+
+
+# Built-in statistics usable by name in `TraceParser.aggregate_op_stats`, each
+# computed over whole columns. "count" is handled by the parser itself.
+COLUMN_STATS: Dict[str, Callable[[IOOPColumns], np.ndarray]] = {
+    "duration": lambda ops: ops.duration,
+    "bytes": lambda ops: ops.length,
+    "bandwidth": lambda ops: ops.bandwidth,
+}
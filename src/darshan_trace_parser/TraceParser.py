@@ -1,16 +1,23 @@
 import os
-<<<<<<< HEAD
-from functools import cache, reduce
-=======
-from functools import reduce
->>>>>>> 70b303be2cdf5dfa5b27c4c446d50c57fa7b1d0b
-
-import darshan
-from typing import Iterator, Callable, Dict, Tuple, List, Any
+from functools import cached_property, reduce
+
+import numpy as np
+from typing import Iterable, Iterator, Callable, Dict, Tuple, List, Any
 from itertools import chain
 
-from .custom_types import IOModule, IOType, ModuleRecord, TypeRecord
+from .custom_types import (
+    IOModule, IOType, ModuleRecord, RecordIndex, StatSpec, TypeRecord, custom_any
+)
+from .DXTLog import DXTLog, iter_segments
+from .FileIndex import FileIndex, aggregate_by_file
 from .IOOP import IOOP
+from .AccessPatterns import AccessPatterns, analyze_access_patterns
+from .IOOPColumns import COLUMN_STATS, IOOPColumns
+from trace_parser.cache import TraceCache
+from trace_parser.instrument import ParseStats
+from trace_parser.phases import IOPhases
+from trace_parser.sketch import QuantileSketch
+from trace_parser.timeline import Timeline
 
 
 class TraceParser:
@@ -18,13 +25,55 @@ class TraceParser:
     A class to parse Darshan trace files and extract IO operations.
     """
 
-    def __init__(self, fp: str):
+    def __init__(
+        self,
+        fp: str,
+        cache: TraceCache | None = None,
+        stats: ParseStats | None = None,
+        validate: bool = False,
+        modules: Iterable[IOModule] | None = None,
+    ):
+        """
+        :param fp: Path to the Darshan log.
+        :type fp: str
+        :param cache: Optional on-disk cache of the op columns. On a cache hit the
+                      log is not decoded at all.
+        :type cache: TraceCache | None
+        :param stats: Collects the phase timings and the record and op counters
+                      of the parser. Defaults to a new ParseStats; pass
+                      `ParseStats(enabled=False)` to turn instrumentation off.
+        :type stats: ParseStats | None
+        :param validate: Check every IOOP built by parse_trace with
+                         IOOP.validate and fail on the first invalid segment.
+        :type validate: bool
+        :param modules: The DXT modules to parse, None for all. The records of
+                        other modules are never read. The cache is only used
+                        when all modules are parsed.
+        :type modules: Iterable[IOModule] | None
+        """
         assert os.path.isfile(fp), f"File not found: {fp}"
         assert fp.endswith(".darshan"), f"Invalid file type: {fp}"
         self.fp = fp
-        self.records = (darshan
-                        .DarshanReport(self.fp, read_all=True, dtype="dict")
-                        .records)
+        self.cache = cache
+        self.stats = ParseStats(label=fp) if stats is None else stats
+        self.validate = validate
+        self.modules = tuple(IOModule) if modules is None else tuple(modules)
+        self._record_index: RecordIndex = dict()
+
+    @property
+    def path(self) -> str:
+        """
+        The path of the trace, the same as `fp`.
+        """
+        return self.fp
+
+    @cached_property
+    def records(self) -> DXTLog:
+        """
+        The DXT records of the log by module name, each module read on first
+        access with its segments as typed arrays, see DXTLog.
+        """
+        return DXTLog(self.fp, self.stats)
 
     def parse_trace(self) -> dict[IOModule, ModuleRecord]:
         """
@@ -37,7 +86,7 @@ class TraceParser:
         """
 
         record_dict = dict()
-        for mod in IOModule:
+        for mod in self.modules:
             record_dict[mod] = self.parse_records(mod)
 
         return record_dict
@@ -54,14 +103,141 @@ class TraceParser:
                  to the generated operations for that rank.
         :rtype: ModuleRecord
         """
-        mod_record = self.records[mod.value]
-        ranks = [log["rank"] for log in mod_record]
-
         record_dict = dict()
-        for rank in ranks:
+        for rank in self.module_index(mod):
             record_dict[rank] = self._ops_generator(rank, mod_name=mod)
         return record_dict
 
+    def module_index(self, mod: IOModule) -> Dict[custom_any, Dict[int, int]]:
+        """
+        Index from rank and file record id to the position of the DXT record in
+        `records[mod]`. Built in a single pass over the module's records, which
+        are read for it if needed, and cached, so per-rank lookups do not rescan
+        the module record list. A rank that accessed several files owns several
+        entries.
+
+        :param mod: The module to index.
+        :type mod: IOModule
+        :return: A nested dictionary `index[rank][record_id] -> position`.
+        :rtype: Dict[custom_any, Dict[int, int]]
+        """
+        index = self._record_index.get(mod)
+        if index is None:
+            index = self._record_index[mod] = dict()
+            for pos, record in enumerate(self.records.get(mod.value, [])):
+                index.setdefault(record["rank"], dict())[record["id"]] = pos
+        return index
+
+    @property
+    def record_index(self) -> RecordIndex:
+        """
+        The `module_index` of every parsed module.
+
+        :return: A nested dictionary `index[mod][rank][record_id] -> position`.
+        :rtype: RecordIndex
+        """
+        return {mod: self.module_index(mod) for mod in self.modules}
+
+    @cached_property
+    def file_codes(self) -> Dict[int, int]:
+        """
+        Interned file ids: maps the record id of every file accessed in the
+        parsed modules to a dense id, numbered in the order the files first occur
+        (module, then rank, then record). A file accessed through several modules
+        or by several ranks keeps one id. Cached after the first access.
+
+        :rtype: Dict[int, int]
+        """
+        codes = dict()
+        for mod in self.modules:
+            for rank in self.module_index(mod):
+                for record_id in self.module_index(mod)[rank]:
+                    codes.setdefault(record_id, len(codes))
+        return codes
+
+    def file_names(self) -> List[str]:
+        """
+        The name of every interned file id, resolved through the name records of
+        the log. Files without a name record are named by their record id.
+
+        :rtype: List[str]
+        """
+        records = self.records
+        names = (
+            records.file_names(self.file_codes)
+            if isinstance(records, DXTLog) else dict()
+        )
+        return [names.get(record_id, str(record_id)) for record_id in self.file_codes]
+
+    @property
+    def files(self) -> List[str]:
+        """
+        The `files` table of `ops`: the file name of every file id.
+        """
+        return self.ops.files
+
+    def rank_records(self, rank, *, mod_name: IOModule) -> Iterator[dict]:
+        """
+        Yields the DXT records of one rank in a module, one per accessed file,
+        looked up through `module_index`.
+
+        :param rank: The rank whose records are returned.
+        :param mod_name: The module the records belong to.
+        :type mod_name: IOModule
+        :rtype: Iterator[dict]
+        """
+        mod_record = self.records.get(mod_name.value, [])
+        for pos in self.module_index(mod_name).get(rank, {}).values():
+            yield mod_record[pos]
+
+    @cached_property
+    def ops(self) -> IOOPColumns:
+        """
+        All DXT segments of the parsed modules as one columnar store, in the same
+        order as `parse_trace` yields them (module, then rank record, then
+        read/write). Cached after the first access per instance, and in `cache`
+        if one is set and all modules are parsed.
+
+        :rtype: IOOPColumns
+        """
+        def build():
+            self.record_index  # reads the modules in the "open" phase
+            files = self.file_names()
+            with self.stats.phase("decode"):
+                ops = IOOPColumns.concat(
+                    (self.parse_columns(mod) for mod in self.modules),
+                    tables={"files": files},
+                )
+            self.stats.count("ops", len(ops))
+            return ops
+
+        if self.cache is None or set(self.modules) != set(IOModule):
+            return build()
+        return self.cache.fetch(self.fp, IOOPColumns, build)
+
+    def parse_columns(self, mod: IOModule) -> IOOPColumns:
+        """
+        Decodes the DXT segments of one module straight into columns, without
+        creating an IOOP per segment.
+
+        :param mod: Module whose records are decoded.
+        :type mod: IOModule
+        :return: The segments of every rank record of the module, without the
+                 `files` table, see file_names.
+        :rtype: IOOPColumns
+        """
+        parts = []
+        for rank in self.module_index(mod):
+            for record in self.rank_records(rank, mod_name=mod):
+                for io_type in (IOType.READ, IOType.WRITE):
+                    segments = record[io_type.get_seg_key()]
+                    if len(segments):
+                        parts.append(IOOPColumns.from_segments(
+                            mod, io_type, rank, segments, record["id"],
+                            self.file_codes[record["id"]],
+                        ))
+        return IOOPColumns.concat(parts)
+
     def parse_io_type_record(self) -> TypeRecord:
         """
         Parses IO type records by iterating through trace data, organizing them
@@ -98,11 +274,12 @@ class TraceParser:
         self, rank, *, mod_name: IOModule, io_type: IOType = IOType.ALL
     ) -> Iterator:
         """
-        Generates an iterator of IO operations for a specified rank, module, and IO type. The
-        function filters records for a given rank within a specific module and retrieves
-        operations based on the requested IO type(s). If the IO type is set to IOType.ALL,
-        both READ and WRITE operations are considered. For each matching operation
-        segment in the filtered records, an IOOP object is yielded with corresponding details.
+        Generates an iterator of IO operations for a specified rank, module, and IO
+        type. The records of the rank are looked up through `module_index`, so a
+        rank with several file records yields the segments of all of them, record
+        by record. If the IO type is set to IOType.ALL, both READ and WRITE operations
+        are considered. For each matching operation segment, an IOOP object is
+        yielded with corresponding details.
 
         :param rank: The rank for which the IO operations need to be retrieved.
         :type rank: int
@@ -113,26 +290,26 @@ class TraceParser:
         :return: An iterator yielding IOOP objects representing the IO operations.
         :rtype: Iterator[IOOP]
         """
-        mod_record = self.records[mod_name.value]
-        rank_log = list(filter(lambda record: record["rank"] == rank, mod_record))
-
-        assert len(rank_log) == 1, f"Found > 1 or no record for Rank: {rank_log}"
-        rank_log = rank_log[0]
-
         io_types = [io_type] if io_type != IOType.ALL else [IOType.READ, IOType.WRITE]
 
-        for current_type in io_types:
-            segment_key = current_type.get_seg_key()
-            for op_seg in rank_log[segment_key]:
-                yield IOOP(
-                    mod=mod_name,
-                    type=current_type,
-                    rank=rank,
-                    start_time=op_seg["start_time"],
-                    end_time=op_seg["end_time"],
-                    offset=op_seg["offset"],
-                    length=op_seg["length"],
-                )
+        for rank_log in self.rank_records(rank, mod_name=mod_name):
+            file_id = self.file_codes[rank_log["id"]]
+            for current_type in io_types:
+                segment_key = current_type.get_seg_key()
+                for offset, length, start_time, end_time in iter_segments(
+                    rank_log[segment_key]
+                ):
+                    op = IOOP(
+                        mod=mod_name,
+                        type=current_type,
+                        rank=rank,
+                        start_time=start_time,
+                        end_time=end_time,
+                        offset=offset,
+                        length=length,
+                        file_id=file_id,
+                    )
+                    yield op.validate() if self.validate else op
 
     def aggregate_op_stat(
             self,
@@ -141,26 +318,235 @@ class TraceParser:
         """
         Traverse all IOOP instances in type_record, apply stat_fn to each,
         and collect results in a dict keyed by (module, type).
+
+        IOOP objects are created on the fly from the cached `ops` columns; prefer
+        `aggregate_op_column` for statistics that can be expressed over columns.
         """
-        # Flatten all IOOP iterators:
-        ops_stream = chain.from_iterable(
-<<<<<<< HEAD
-            chain.from_iterable(record.values() for record in self.parse_trace().values())
-=======
-            chain.from_iterable(record.values() for record in self.records.values())
->>>>>>> 70b303be2cdf5dfa5b27c4c446d50c57fa7b1d0b
-        )
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            ops_stream = iter(ops)
+
+            # Map each IOOP to ((mod, type), stat_fn(op))
+            kv_stream = map(lambda op: ((op.mod, op.type), stat_fn(op)), ops_stream)
+
+            # Reduce into grouped dict
+            def reducer(
+                    acc: Dict[Tuple[IOModule, IOType], List[Any]],
+                    kv: Tuple[Tuple[IOModule, IOType], Any]
+            ) -> Dict[Tuple[IOModule, IOType], List[Any]]:
+                key, value = kv
+                acc.setdefault(key, []).append(value)
+                return acc
+
+            return reduce(reducer, kv_stream, {})
+
+    def aggregate_op_column(
+            self,
+            column_fn: Callable[[IOOPColumns], np.ndarray]
+    ) -> Dict[Tuple[IOModule, IOType], np.ndarray]:
+        """
+        Vectorized counterpart of `aggregate_op_stat`: column_fn receives the whole
+        `ops` store and returns one value per segment, e.g.
+        `lambda ops: ops.bandwidth`. The values are grouped by (module, type).
 
-        # Map each IOOP to ((mod, type), stat_fn(op))
-        kv_stream = map(lambda op: ((op.mod, op.type), stat_fn(op)), ops_stream)
+        :param column_fn: Function mapping the op columns to a per-op value array.
+        :type column_fn: Callable[[IOOPColumns], np.ndarray]
+        :return: A dictionary mapping each (module, type) to its values.
+        :rtype: Dict[Tuple[IOModule, IOType], np.ndarray]
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return ops.group_by(column_fn(ops))
+
+
+    def to_arrow(self):
+        """
+        Exports all operations of the trace as one `pyarrow.Table`, built from the
+        `ops` columns without creating IOOP objects. See `OpColumns.to_arrow`.
+        """
+        return self.ops.to_arrow()
+
+    def to_pandas(self):
+        """
+        Exports all operations of the trace as one `pandas.DataFrame`, built from
+        the `ops` columns without creating IOOP objects.
+        """
+        return self.ops.to_pandas()
+
+    def to_parquet(self, path: str, **kwargs) -> None:
+        """
+        Writes all operations of the trace to a Parquet file.
+
+        :param path: Path of the Parquet file.
+        :param kwargs: Passed on to `pyarrow.parquet.write_table`.
+        """
+        self.ops.to_parquet(path, **kwargs)
+
+    def timeline(
+        self,
+        bin_width: float,
+        by: str | None = None,
+        active_ranks: bool = False,
+        t0=None,
+        t1=None,
+    ) -> Timeline:
+        """
+        Time-binned bytes, op counts and concurrency of the trace, see
+        `OpColumns.timeline`.
+
+        :param bin_width: Bin width in seconds.
+        :param by: None for one row, "group" for one row per (IOModule, IOType),
+                   "rank" for one row per rank, or any column name.
+        :param active_ranks: Also compute how many ranks do I/O in every bin.
+        :rtype: Timeline
+        """
+        return self.ops.timeline(bin_width, by, active_ranks, t0, t1)
+
+    def phases(self, gap: float = 0, group=None) -> IOPhases:
+        """
+        The I/O phases of the job: the DXT segments of all ranks merged into
+        global bursts of I/O, each with its duration, participating ranks,
+        aggregate bandwidth and slowest ranks, see `OpColumns.phases`.
+
+        :param gap: Quiet time in seconds between two phases at least, shorter
+                    gaps are bridged.
+        :param group: A (IOModule, IOType) key or a list of them, None for all.
+        :rtype: IOPhases
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return ops.phases(gap, group)
+
+    def ops_between(self, t0, t1, ranks=None, group=None) -> IOOPColumns:
+        """
+        The operations active at any time in [t0, t1], found through lazily
+        built per-rank interval indexes instead of a scan of the trace.
+
+        :param ranks: Only search these ranks, None for all.
+        :param group: A (IOModule, IOType) key or a list of them to search,
+                      None for all.
+        :rtype: IOOPColumns
+        """
+        return self.ops.select(self.ops.overlapping(t0, t1, ranks, group))
+
+    def ops_active_at(self, t, ranks=None, group=None) -> IOOPColumns:
+        """
+        The operations running at time t, see ops_between.
+        """
+        return self.ops.select(self.ops.active_at(t, ranks, group))
+
+    def nearest_ops(self, t, k: int = 1, ranks=None, group=None) -> IOOPColumns:
+        """
+        The k operations closest in time to t, closest first, see ops_between.
+        """
+        return self.ops.select(self.ops.nearest(t, k, ranks, group))
+
+    def access_patterns(
+        self, small_size: int = 4096, alignment: int = 4096, threshold: float = 0.8
+    ) -> AccessPatterns:
+        """
+        Classifies every (module, rank, file, type) stream of the trace as
+        sequential, strided, random, overlapping writes or single (one access),
+        with request size distributions and the fractions of small and
+        unaligned accesses. See `analyze_access_patterns` for the parameters.
+
+        :rtype: AccessPatterns
+        """
+        return analyze_access_patterns(self.ops, small_size, alignment, threshold)
+
+    @cached_property
+    def file_index(self) -> FileIndex:
+        """
+        Index from file id to the ranks accessing the file and the row ranges of
+        their segments in `ops`, see FileIndex. Cached after the first access.
 
-        # Reduce into grouped dict
-        def reducer(
-                acc: Dict[Tuple[IOModule, IOType], List[Any]],
-                kv: Tuple[Tuple[IOModule, IOType], Any]
-        ) -> Dict[Tuple[IOModule, IOType], List[Any]]:
-            key, value = kv
-            acc.setdefault(key, []).append(value)
-            return acc
+        :rtype: FileIndex
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return FileIndex.from_ops(ops)
 
-        return reduce(reducer, kv_stream, {})
\ No newline at end of file
+    def file_ops(self, name: str) -> IOOPColumns:
+        """
+        The segments accessing one file, found through `file_index`.
+
+        :param name: The file name, as in `files`.
+        :rtype: IOOPColumns
+        :raises KeyError: If no segment accessed the file.
+        """
+        index = self.file_index
+        return self.ops.select(index.rows(index.file_id(name)))
+
+    def shared_files(self) -> List[str]:
+        """
+        The names of the files accessed by more than one rank.
+
+        :rtype: List[str]
+        """
+        index = self.file_index
+        return [index.files[i] for i in index.shared.tolist()]
+
+    def file_stats(
+        self, prefix: int | None = None, by_rank: bool = False
+    ) -> Dict[Any, Dict[str, float]]:
+        """
+        Per-file totals of the trace: segments, bytes moved, bytes read and
+        written, summed segment time and number of ranks, computed over the
+        `ops` columns. See `aggregate_by_file`.
+
+        :param prefix: Group the files by their first `prefix` path components,
+                       e.g. 2 for "/scratch/run1", None for one group per file.
+        :param by_rank: Key the results by (name, rank) instead of name.
+        :rtype: Dict[Any, Dict[str, float]]
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return aggregate_by_file(ops, prefix, by_rank)
+
+    def aggregate_op_stats(
+            self,
+            stats: StatSpec
+    ) -> Dict[str, Dict[Tuple[IOModule, IOType], Any]]:
+        """
+        Computes several statistics in one go, grouped by (module, type).
+
+        `stats` is either a list of built-in statistic names or a mapping from
+        result name to a built-in name or to a per-IOOP function, e.g.
+        `{"time": "duration", "size": lambda op: op.length}`. Built-in statistics
+        ("duration", "bytes", "bandwidth") are computed over the `ops` columns and
+        returned as arrays; "count" returns the number of ops per key. All custom
+        functions are applied during a single traversal of the ops and their
+        results are returned as lists.
+
+        :param stats: Names or name -> statistic mapping to compute.
+        :type stats: StatSpec
+        :return: A dictionary mapping each result name to a dictionary keyed by
+                 (module, type), like the output of `aggregate_op_stat`.
+        :rtype: Dict[str, Dict[Tuple[IOModule, IOType], Any]]
+        :raises ValueError: If a built-in statistic name is not recognized.
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return ops.aggregate(stats, COLUMN_STATS)
+
+    def aggregate_op_sketches(
+        self, stats: StatSpec, compression: float = 200
+    ) -> Dict[str, Dict[Tuple[IOModule, IOType], QuantileSketch]]:
+        """
+        Like aggregate_op_stats, but summarizes the values of every statistic and
+        key in a mergeable QuantileSketch instead of returning them all, so
+        memory does not grow with the trace. Every sketch also holds the exact
+        count, sum, min and max of its values.
+
+        :param stats: Built-in statistic names ("duration", "bytes", "bandwidth")
+                      or a mapping from result name to a built-in name or a
+                      function applied to each IOOP instance.
+        :param compression: Accuracy of the sketches, see QuantileSketch.
+        :return: Dictionary mapping each result name to a dictionary of sketches
+                 keyed like aggregate_op_stats; "count" maps each key to the
+                 exact number of operations instead.
+        :raises ValueError: If a built-in statistic name is not recognized.
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return ops.aggregate(stats, COLUMN_STATS, compression)
@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import Dict, Iterator, TypeAlias, TYPE_CHECKING
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, Mapping, TypeAlias, TYPE_CHECKING
+)
 
 import enum
 
@@ -24,4 +26,6 @@ class IOType(enum.Enum):
 custom_any: TypeAlias = str | int
 ModuleRecord: TypeAlias = Dict[custom_any, Iterator['IOOP']]
 TypeRecord: TypeAlias = Dict[IOType, Iterator['IOOP']]
-TraceRecord: TypeAlias = Dict[IOModule, ModuleRecord]
\ No newline at end of file
+TraceRecord: TypeAlias = Dict[IOModule, ModuleRecord]
+RecordIndex: TypeAlias = Dict[IOModule, Dict[custom_any, Dict[int, int]]]
+StatSpec: TypeAlias = Mapping[str, str | Callable[['IOOP'], Any]] | Iterable[str]
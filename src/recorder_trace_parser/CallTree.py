@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .custom_types import IO_CLASSES, IOMod, IOPradigm
+from .IOOPColumns import IOOPColumns
+
+# Ways of counting nested calls, see CallTree.dedup.
+CALL_MODES = ("all", "top", "leaf", "exclusive")
+
+
+class CallTree:
+    """
+    The nesting of the records of a trace: Recorder records every intercepted
+    layer, so e.g. an `H5Dwrite` contains an `MPI_File_write_at_all`, which in
+    turn contains a `pwrite`, and summing all of them counts the same time and
+    bytes up to three times.
+
+    All arrays are aligned with the rows of the IOOPColumns the tree was built
+    from. `parent` holds the row of the innermost record enclosing a record, -1
+    for top-level records, and `top` the row of its top-level ancestor, the row
+    itself for top-level records. `leaf` marks the records without nested calls.
+    `exclusive_time` and `exclusive_bytes` are the duration and bytes of a record
+    minus those of its direct children, never below 0. `call_bytes` holds the
+    bytes of every top-level call summed over the leaf records below it, since
+    Recorder has no plain size for MPI-IO or HDF5 calls, or its own bytes if none
+    of its leaves has any; nested records keep their own bytes.
+    """
+
+    def __init__(
+        self,
+        parent: np.ndarray,
+        top: np.ndarray,
+        leaf: np.ndarray,
+        exclusive_time: np.ndarray,
+        exclusive_bytes: np.ndarray,
+        call_bytes: np.ndarray,
+    ):
+        self.parent = parent
+        self.top = top
+        self.leaf = leaf
+        self.exclusive_time = exclusive_time
+        self.exclusive_bytes = exclusive_bytes
+        self.call_bytes = call_bytes
+
+    @classmethod
+    def from_ops(cls, ops: IOOPColumns) -> CallTree:
+        """
+        Builds the call trees of all ranks in one pass per call depth.
+
+        The records are ordered by rank, start time and call depth, so the parent
+        of a record at depth d is the latest preceding record of its rank at depth
+        d - 1, found for all records of a depth at once with a running maximum.
+        A record only gets that parent if it also lies within the parent's time
+        span; records whose call depth does not match their time nesting are
+        treated as top-level.
+
+        :param ops: The records of the trace.
+        :rtype: CallTree
+        """
+        n = len(ops)
+        order = np.lexsort((ops.call_depth, ops.start_time, ops.rank))
+        rank = ops.rank[order]
+        start = ops.start_time[order]
+        end = ops.end_time[order]
+        depth = ops.call_depth[order]
+        duration = end - start
+        nbytes = ops.bytes[order]
+        positions = np.arange(n)
+
+        parent = np.full(n, -1, dtype=np.int64)
+        top = positions.copy()
+        max_depth = int(depth.max()) if n else 0
+        for d in range(1, max_depth + 1):
+            children = np.flatnonzero(depth == d)
+            if not len(children):
+                continue
+            latest = np.maximum.accumulate(np.where(depth == d - 1, positions, -1))
+            p = latest[children]
+            q = np.maximum(p, 0)
+            nested = (
+                (p >= 0)
+                & (rank[q] == rank[children])
+                & (start[q] <= start[children])
+                & (end[children] <= end[q])
+            )
+            children, p = children[nested], p[nested]
+            parent[children] = p
+            # Parents sit one level up, their top-level ancestors are final.
+            top[children] = top[p]
+
+        has_parent = parent >= 0
+        child_time = np.bincount(
+            parent[has_parent], weights=duration[has_parent], minlength=n
+        )
+        child_bytes = np.bincount(
+            parent[has_parent], weights=nbytes[has_parent], minlength=n
+        )
+        leaf = np.ones(n, dtype=bool)
+        leaf[parent[has_parent]] = False
+        leaf_bytes = np.bincount(
+            top[leaf], weights=nbytes[leaf], minlength=n
+        ).astype(np.int64)
+
+        # Back from the sorted order to the rows of ops.
+        def rows(values):
+            out = np.empty(n, dtype=values.dtype)
+            out[order] = values
+            return out
+
+        parent_rows = np.full(n, -1, dtype=np.int64)
+        parent_rows[order[has_parent]] = order[parent[has_parent]]
+        return cls(
+            parent=parent_rows,
+            top=rows(order[top]),
+            leaf=rows(leaf),
+            exclusive_time=rows(np.maximum(duration - child_time, 0)),
+            exclusive_bytes=rows(
+                np.maximum(nbytes - child_bytes, 0).astype(np.int64)
+            ),
+            call_bytes=rows(np.where(leaf_bytes > 0, leaf_bytes, nbytes)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    @property
+    def is_top(self) -> np.ndarray:
+        """
+        Mask of the top-level records.
+        """
+        return self.parent < 0
+
+    @property
+    def depth(self) -> np.ndarray:
+        """
+        Nesting depth of every record in the tree, 0 for top-level records. Unlike
+        Recorder's `call_depth`, it only counts parents that enclose the record.
+        """
+        depth = np.zeros(len(self), dtype=np.int64)
+        current = self.parent
+        while True:
+            nested = current >= 0
+            if not nested.any():
+                return depth
+            depth += nested
+            current = np.where(nested, self.parent[np.maximum(current, 0)], -1)
+
+    def dedup(self, ops: IOOPColumns, calls: str = "all") -> IOOPColumns:
+        """
+        The records of ops counted so that nested calls are not counted twice.
+
+        :param ops: The records the tree was built from.
+        :param calls: "all" for every record as it is, "top" for the top-level
+                      records only, with their call_bytes as bytes, "leaf" for
+                      the records without nested calls only, or "exclusive" for
+                      every record with its exclusive time as duration (ending
+                      at start_time + exclusive_time) and its exclusive bytes as
+                      bytes.
+        :rtype: IOOPColumns
+        :raises ValueError: If calls is not one of CALL_MODES.
+        """
+        if calls == "all":
+            return ops
+        if calls == "top":
+            top = self.is_top
+            columns = {name: column[top] for name, column in ops.columns().items()}
+            columns["bytes"] = self.call_bytes[top]
+            return IOOPColumns(tables=ops.tables(), **columns)
+        if calls == "leaf":
+            return ops.select(self.leaf)
+        if calls == "exclusive":
+            columns = ops.columns()
+            columns.update(
+                end_time=ops.start_time + self.exclusive_time,
+                bytes=self.exclusive_bytes,
+            )
+            return IOOPColumns(tables=ops.tables(), **columns)
+        raise ValueError(f"Unknown call mode: {calls}")
+
+    def leaf_breakdown(
+        self, ops: IOOPColumns, values: np.ndarray | None = None
+    ) -> Dict[Tuple[Tuple[IOMod, IOPradigm], Tuple[IOMod, IOPradigm]], float]:
+        """
+        Attributes every leaf record to the class of its top-level call, e.g. how
+        much POSIX write time is issued by HDF5 writes rather than by MPI-IO or by
+        the application directly.
+
+        :param ops: The records the tree was built from.
+        :param values: Value summed per leaf, one per record, defaults to the
+                       duration.
+        :return: Dictionary mapping (top-level class, leaf class) pairs of
+                 (IOMod, IOPradigm) keys to the summed values of their leaves.
+        """
+        if values is None:
+            values = ops.duration
+        leaves = np.flatnonzero(self.leaf)
+        n_classes = len(IO_CLASSES)
+        pairs = (
+            ops.class_code[self.top[leaves]].astype(np.int64) * n_classes
+            + ops.class_code[leaves]
+        )
+        sums = np.bincount(pairs, weights=values[leaves], minlength=n_classes ** 2)
+        counts = np.bincount(pairs, minlength=n_classes ** 2)
+        return {
+            (IO_CLASSES[code // n_classes], IO_CLASSES[code % n_classes]): total
+            for code, total in enumerate(sums.tolist())
+            if counts[code]
+        }
@@ -1,18 +1,67 @@
-from recorder_viz import RecorderReader
-from .custom_types import IOMod, IOPradigm, map_io_fn
-from typing import List, Any
+from .custom_types import IOMod, IOPradigm, io_fn_bytes, map_io_fn
+from typing import List, Any, Tuple
 
 class IOOP:
-    def __init__(self, fname: str, fid, start_time, end_time, call_depth: int, rargs: List[Any] = [], rlargs: List[Any] = []):
-        assert start_time <= end_time, f"Start time {start_time} must be less than end time {end_time}"
+    # Slots instead of a per-instance __dict__: a trace holds millions of these.
+    # fname is the shared string of the trace's function table.
+    __slots__ = (
+        "fname", "fid", "start_time", "end_time", "call_depth", "_rargs", "record",
+        "rlargs", "nbytes", "io_class",
+    )
 
+    def __init__(
+        self,
+        fname: str,
+        fid,
+        start_time,
+        end_time,
+        call_depth: int,
+        rargs: List[Any] | None = None,
+        rlargs: List[Any] = [],
+        nbytes: int | None = None,
+        io_class: Tuple[IOMod, IOPradigm] | None = None,
+        record: Any = None,
+    ):
         self.fname = fname
         self.fid = fid
         self.start_time = start_time
         self.end_time = end_time
         self.call_depth = call_depth
-        self.rargs = rargs
+        self._rargs = rargs
+        self.record = record  # Source of rargs if not given, read on first access
         self.rlargs = rlargs
+        self.nbytes = nbytes  # Set when built from op columns, which keep no args
+        self.io_class = io_class  # Precomputed (mod, paradigm), see class_table
+
+    @property
+    def rargs(self) -> List[Any]:
+        """
+        Returns the raw arguments of the call, taken from the Recorder record on
+        first access if the op was built from one.
+        :return: The arguments, empty if the op has neither args nor a record.
+        :rtype: List[Any]
+        """
+        if self._rargs is None:
+            self._rargs = [] if self.record is None else self.record.args
+        return self._rargs
+
+    @rargs.setter
+    def rargs(self, rargs: List[Any]):
+        self._rargs = rargs
+
+    def validate(self) -> "IOOP":
+        """
+        Checks that the call does not end before it starts. Not run on
+        construction, the TraceParser calls it when created with `validate=True`.
+        :return: The op itself.
+        :raises ValueError: If the call ends before it starts.
+        """
+        if self.start_time > self.end_time:
+            raise ValueError(
+                f"Start time {self.start_time} must be less than end time "
+                f"{self.end_time}"
+            )
+        return self
     
     @property
     def mod(self) -> IOMod:
@@ -21,7 +70,7 @@ class IOOP:
         :return: The IOMod of the operation.
         :rtype: IOMod
         """
-        mod, _ = map_io_fn(self.fname)
+        mod, _ = self.io_class or map_io_fn(self.fname)
         return mod
 
     @property
@@ -31,7 +80,7 @@ class IOOP:
         :return: The IOPradigm of the operation.
         :rtype: IOPradigm
         """
-        _, paradigm = map_io_fn(self.fname)
+        _, paradigm = self.io_class or map_io_fn(self.fname)
         return paradigm
     
     @property
@@ -42,4 +91,24 @@ class IOOP:
         :rtype: float
         """
         return self.end_time - self.start_time
-    
+
+    @property
+    def bytes(self) -> int:
+        """
+        Returns the number of bytes requested by the operation.
+        :return: The requested size, 0 if the call has no plain byte count.
+        :rtype: int
+        """
+        if self.nbytes is not None:
+            return self.nbytes
+        return io_fn_bytes(self.fname, self.rargs)
+
+    @property
+    def bandwidth(self) -> float:
+        """
+        Returns the bandwidth of the operation.
+        :return: Bytes per second, 0 if the duration is not positive.
+        :rtype: float
+        """
+        return self.bytes / self.duration if self.duration > 0 else 0
+
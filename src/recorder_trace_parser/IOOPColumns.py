@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from trace_parser.columns import ExportColumn, Fixed, OpColumns
+from trace_parser.instrument import ParseStats
+
+from .custom_types import (
+    IO_CLASSES,
+    UNCLASSIFIED,
+    IOClassFilter,
+    IOMod,
+    IOPradigm,
+    classify_io_fn,
+    io_fn_bytes,
+)
+from .IOOP import IOOP
+
+UNCLASSIFIED_CODE = IO_CLASSES.index(UNCLASSIFIED)
+
+
+def class_table(funcs: Sequence[str]) -> np.ndarray:
+    """
+    Classifies every function of a trace once.
+
+    :param funcs: The function name table of the trace.
+    :return: Lookup array mapping each func_id to its class code, the position of
+             its (IOMod, IOPradigm) class in IO_CLASSES. Unknown functions get
+             UNCLASSIFIED_CODE.
+    :rtype: np.ndarray
+    """
+    return np.fromiter(
+        (IO_CLASSES.index(classify_io_fn(fn)) for fn in funcs),
+        dtype=np.uint8, count=len(funcs),
+    )
+
+
+def class_mask(classes: IOClassFilter) -> np.ndarray:
+    """
+    Selects class codes by a class filter.
+
+    :param classes: IOMod or IOPradigm members, matching every class with that mod
+                    or paradigm, and (IOMod, IOPradigm) pairs, matching exactly.
+    :return: Boolean array with one entry per class code in IO_CLASSES.
+    :rtype: np.ndarray
+    """
+    classes = set(classes)
+    return np.array(
+        [
+            (mod, paradigm) in classes or mod in classes or paradigm in classes
+            for mod, paradigm in IO_CLASSES
+        ],
+        dtype=bool,
+    )
+
+
+class IOOPColumns(OpColumns):
+    """
+    Struct-of-arrays store of Recorder records.
+
+    `func_id` indexes the `funcs` table of function names of the trace and
+    `class_code` holds the (IOMod, IOPradigm) class of the function as its
+    position in IO_CLASSES. The raw arguments are not kept; only the requested
+    size derived from them is stored in `bytes`. `IOOP` objects are only created
+    on demand through indexing or iteration.
+    """
+
+    COLUMNS = {
+        "rank": np.int32,
+        "func_id": np.int32,
+        "class_code": np.uint8,
+        "start_time": np.float64,
+        "end_time": np.float64,
+        "call_depth": np.uint8,
+        "bytes": np.int64,
+    }
+    TABLES = ("funcs",)
+    OP_CLASS = IOOP
+    # The raw argument lists (rargs, rlargs) come before nbytes and io_class.
+    OP_FIELDS = (
+        ("func_id", "funcs"), "func_id", "start_time", "end_time", "call_depth",
+        Fixed(None), Fixed([]), "bytes", ("class_code", IO_CLASSES),
+    )
+
+    @classmethod
+    def from_records(
+        cls,
+        rank: int,
+        records: Sequence[Any],
+        funcs: List[str],
+        classes: np.ndarray | None = None,
+        stats: ParseStats | None = None,
+    ) -> IOOPColumns:
+        """
+        Builds the columns of the records of one rank.
+
+        :param rank: The rank the records belong to.
+        :type rank: int
+        :param records: Recorder records with `func_id`, `tstart`, `tend`,
+                        `call_depth` and `args` fields.
+        :param funcs: The function name table of the trace.
+        :type funcs: List[str]
+        :param classes: The class_table of funcs, computed if not given.
+        :type classes: np.ndarray | None
+        :param stats: Counts the records whose size arguments cannot be read as
+                      "invalid_byte_args"; their size is stored as 0.
+        :type stats: ParseStats | None
+        :rtype: IOOPColumns
+        """
+        if classes is None:
+            classes = class_table(funcs)
+        rows = [
+            (r.func_id, r.tstart, r.tend, r.call_depth,
+             io_fn_bytes(funcs[r.func_id], r.args, invalid=-1))
+            for r in records
+        ]
+        func_id, tstart, tend, call_depth, nbytes = (
+            zip(*rows) if rows else ([],) * 5
+        )
+        func_id = np.asarray(func_id, dtype=np.int32)
+        nbytes = np.asarray(nbytes, dtype=np.int64)
+        invalid = nbytes < 0
+        if invalid.any():
+            nbytes[invalid] = 0
+            if stats is not None:
+                stats.count("invalid_byte_args", int(invalid.sum()))
+        return cls(
+            tables={"funcs": funcs},
+            rank=np.full(len(rows), rank, dtype=np.int32),
+            func_id=func_id,
+            class_code=classes[func_id],
+            start_time=tstart,
+            end_time=tend,
+            call_depth=call_depth,
+            bytes=nbytes,
+        )
+
+    def export_columns(self) -> Dict[str, ExportColumn]:
+        mods = list(IOMod)
+        paradigms = list(IOPradigm)
+        mod_codes = np.array([mods.index(mod) for mod, _ in IO_CLASSES])
+        paradigm_codes = np.array(
+            [paradigms.index(paradigm) for _, paradigm in IO_CLASSES]
+        )
+        return {
+            "rank": self.rank,
+            "function": (self.func_id, self.funcs),
+            "mod": (mod_codes[self.class_code], [mod.name for mod in mods]),
+            "paradigm": (
+                paradigm_codes[self.class_code],
+                [paradigm.name for paradigm in paradigms],
+            ),
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "call_depth": self.call_depth,
+            "bytes": self.bytes,
+        }
+
+    @property
+    def nbytes(self) -> np.ndarray:
+        return self.bytes
+
+    @property
+    def bandwidth(self) -> np.ndarray:
+        """
+        Bytes per second of every record, 0 for records without a positive
+        duration (same convention as `IOOP.bandwidth`).
+        """
+        duration = self.duration
+        out = np.zeros(len(self), dtype=np.float64)
+        np.divide(self.bytes, duration, out=out, where=duration > 0)
+        return out
+
+    @property
+    def known(self) -> np.ndarray:
+        """
+        Mask of the records whose function has a known (IOMod, IOPradigm) class.
+        """
+        return self.class_code != UNCLASSIFIED_CODE
+
+    def group_codes(self) -> Tuple[np.ndarray, List[Tuple[IOMod, IOPradigm]]]:
+        """
+        Group codes over (mod, paradigm), see `OpColumns.group_indices`. Records
+        of unknown functions form the UNCLASSIFIED group.
+        """
+        return self.class_code, IO_CLASSES
+
+    def class_counts(self) -> Dict[Tuple[IOMod, IOPradigm], int]:
+        """
+        Number of records per (mod, paradigm) class, counted with one bincount.
+        """
+        counts = np.bincount(self.class_code, minlength=len(IO_CLASSES))
+        return {
+            IO_CLASSES[code]: int(n) for code, n in enumerate(counts.tolist()) if n
+        }
+
+
+# Built-in statistics usable by name in `TraceParser.aggregate_op_stats`, each
+# computed over whole columns. "count" is handled by the parser itself.
+COLUMN_STATS: Dict[str, Callable[[IOOPColumns], np.ndarray]] = {
+    "duration": lambda ops: ops.duration,
+    "bytes": lambda ops: ops.bytes,
+    "bandwidth": lambda ops: ops.bandwidth,
+}
@@ -1,85 +1,445 @@
 
 import os
-from functools import cache, reduce
+from functools import cached_property, reduce
 from itertools import chain
-from typing import Any, Callable, Dict, Iterator, Tuple
-from recorder_viz import RecorderReader
-from .custom_types import IOMod, IOPradigm
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Tuple
+)
+from trace_parser.cache import TraceCache
+from trace_parser.instrument import ParseStats
+from trace_parser.phases import IOPhases
+from trace_parser.sketch import QuantileSketch
+from trace_parser.timeline import Timeline
+import numpy as np
+from .CallTree import CallTree
+from .custom_types import IO_CLASSES, IOClassFilter, IOMod, IOPradigm, StatSpec
 from .IOOP import IOOP
+from .IOOPColumns import COLUMN_STATS, IOOPColumns, class_mask, class_table
+
+if TYPE_CHECKING:
+    from recorder_viz import RecorderReader
 
 class TraceParser:
     """
     A class to parse and handle IO operations from a trace file.
     """
 
-    def __init__(self, rp: str):
+    def __init__(
+        self,
+        rp: str,
+        cache: TraceCache | None = None,
+        stats: ParseStats | None = None,
+        validate: bool = False,
+    ):
         """
             Initializes the TraceParser with a trace file.
 
             :param rp: Path to the trace folder.
+            :param cache: Optional on-disk cache of the op columns. On a cache hit
+                the trace is not read at all.
+            :param stats: Collects the phase timings and the record and op
+                counters of the parser. Defaults to a new ParseStats; pass
+                `ParseStats(enabled=False)` to turn instrumentation off.
+            :param validate: Check every IOOP built by parse_trace with
+                IOOP.validate and fail on the first invalid call.
             """
         assert os.path.isdir(rp), f"Recorder trace folder not found: {rp}"
         self.rp = rp
-        self.rr = RecorderReader(self.rp)
+        self.cache = cache
+        self.stats = ParseStats(label=rp) if stats is None else stats
+        self.validate = validate
+
+    @property
+    def path(self) -> str:
+        """
+        The path of the trace folder, the same as `rp`.
+        """
+        return self.rp
+
+    @cached_property
+    def rr(self) -> "RecorderReader":
+        """
+        The RecorderReader of the trace, created on first access.
+        """
+        # Imported here, recorder_viz is only needed to read the trace, not
+        # when the op columns come from the cache.
+        from recorder_viz import RecorderReader
+
+        with self.stats.phase("open"):
+            return RecorderReader(self.rp)
+
+    @cached_property
+    def func_classes(self) -> np.ndarray:
+        """
+        Lookup array mapping every func_id of the trace to the code of its
+        (IOMod, IOPradigm) class in IO_CLASSES, resolved once per trace. Functions
+        that are not classified map to the UNCLASSIFIED class.
+        """
+        return class_table(self.rr.funcs)
+
+    @cached_property
+    def ops(self) -> IOOPColumns:
+        """
+        All records of the trace as one columnar store, rank by rank. Cached after
+        the first access per instance, and in `cache` if one is set.
+        """
+        def build():
+            funcs = self.rr.funcs
+            func_classes = self.func_classes
+            with self.stats.phase("decode"):
+                ops = IOOPColumns.concat(
+                    IOOPColumns.from_records(
+                        rank,
+                        self.rr.records[rank][:self.rr.LMs[rank].total_records],
+                        funcs,
+                        func_classes,
+                        self.stats,
+                    )
+                    for rank in range(self.rr.GM.total_ranks)
+                )
+            self.stats.count_all({
+                "ops": len(ops),
+                "unclassified_ops": len(ops) - int(ops.known.sum()),
+            })
+            return ops
+
+        if self.cache is None:
+            return build()
+        return self.cache.fetch(self.rp, IOOPColumns, build)
+
+    @cached_property
+    def call_tree(self) -> CallTree:
+        """
+        The nesting of the records of every rank, built from `ops` by call depth
+        and time nesting, see CallTree. Cached after the first access per
+        instance.
+        """
+        ops = self.ops
+        with self.stats.phase("call_tree"):
+            tree = CallTree.from_ops(ops)
+        self.stats.count_all({
+            "calls.top": int(tree.is_top.sum()),
+            "calls.leaf": int(tree.leaf.sum()),
+            "calls.orphans": int((tree.is_top & (ops.call_depth > 0)).sum()),
+        })
+        return tree
 
-    @cache
-    def parse_trace(self) -> dict[int, Iterator[IOOP]]|Any:
+    def dedup_ops(self, calls: str = "all") -> IOOPColumns:
+        """
+        The records of `ops` with nested calls counted once, see CallTree.dedup.
+
+        :param calls: "all", "top", "leaf" or "exclusive".
+        :rtype: IOOPColumns
+        :raises ValueError: If calls is not a known mode.
+        """
+        if calls == "all":
+            return self.ops
+        return self.call_tree.dedup(self.ops, calls)
+
+    def call_breakdown(
+        self, stat: str = "duration"
+    ) -> Dict[Tuple[Tuple[IOMod, IOPradigm], Tuple[IOMod, IOPradigm]], float]:
+        """
+        Sums a built-in statistic over the leaf records, attributed to the class
+        of their top-level call, e.g. the POSIX write time issued under HDF5
+        writes. See CallTree.leaf_breakdown.
+
+        :param stat: "duration", "bytes", "bandwidth" or "count".
+        :return: Dictionary mapping (top-level class, leaf class) pairs to sums.
+        :raises ValueError: If the statistic name is not recognized.
+        """
+        ops = self.ops
+        if stat == "count":
+            values = np.ones(len(ops))
+        elif stat in COLUMN_STATS:
+            values = COLUMN_STATS[stat](ops)
+        else:
+            raise ValueError(f"Unknown statistic: {stat}")
+        tree = self.call_tree
+        with self.stats.phase("aggregate"):
+            return tree.leaf_breakdown(ops, values)
+
+    def parse_trace(
+        self,
+        ranks: Iterable[int] | None = None,
+        window: Tuple[float, float] | None = None,
+        classes: IOClassFilter | None = None,
+        calls: str = "all",
+    ) -> dict[int, Iterator[IOOP]]|Any:
         """
         Parses the trace file and returns a dictionary of IO operations for each rank.
-        :return: A dictionary where keys are ranks and values are iterators of IOOP objects
-        representing IO operations.
+        The filters are checked against the raw record fields, so IOOP objects are
+        only created for the records that pass all of them.
+
+        :param ranks: Only parse these ranks, None for all.
+        :param window: Only keep records overlapping the time window (t0, t1),
+            bounds included, None for all.
+        :param classes: Only keep records whose function class matches one of
+            these IOMod or IOPradigm members or (IOMod, IOPradigm) pairs, None
+            for all.
+        :param calls: "all" for every record, "top" for the top-level calls only,
+            with the bytes of the leaf calls below them (see CallTree.call_bytes),
+            or "leaf" for the calls without nested calls only, see call_tree.
+        :return: A dictionary where keys are ranks and values are iterators of
+            IOOP objects representing IO operations.
         """
         funcs = self.rr.funcs
         records_by_rank = self.rr.records
         total_ranks = self.rr.GM.total_ranks
         local_meta = self.rr.LMs
+        io_classes = [IO_CLASSES[code] for code in self.func_classes.tolist()]
+        wanted_fns = None
+        if classes is not None:
+            wanted_fns = class_mask(classes)[self.func_classes].tolist()
+        if ranks is None:
+            ranks = range(total_ranks)
+        else:
+            ranks = sorted(rank for rank in set(ranks) if 0 <= rank < total_ranks)
+        wanted_calls = None
+        call_bytes = None
+        if calls == "top":
+            wanted_calls = self.call_tree.is_top
+            call_bytes = self.call_tree.call_bytes
+        elif calls == "leaf":
+            wanted_calls = self.call_tree.leaf
+        elif calls != "all":
+            raise ValueError(f"Unknown call mode: {calls}")
+        # Row of the first record of every rank in `ops`, which holds the
+        # records rank by rank.
+        first_rows = np.cumsum(
+            [0] + [local_meta[rank].total_records for rank in range(total_ranks)]
+        ).tolist()
 
-        def make_ioop(record):
-            return IOOP(
+        def make_ioop(record, nbytes=None):
+            op = IOOP(
                 fname=funcs[record.func_id],
                 fid=record.func_id,
+                io_class=io_classes[record.func_id],
                 start_time=record.tstart,
                 end_time=record.tend,
                 call_depth=record.call_depth,
-                rargs=record.args
+                nbytes=nbytes,
+                record=record
             )
+            return op.validate() if self.validate else op
 
-        return {
-            rank: (make_ioop(record) for record in records_by_rank[rank][:local_meta[rank].total_records])
-            for rank in range(total_ranks)
-        }
-  
+        def rank_ioops(rank):
+            records = records_by_rank[rank]
+            n_records = local_meta[rank].total_records
+            keep = None
+            sizes = None
+            if wanted_calls is not None:
+                first = first_rows[rank]
+                keep = wanted_calls[first:first + n_records].tolist()
+                if call_bytes is not None:
+                    sizes = call_bytes[first:first + n_records].tolist()
+            built = 0
+            try:
+                for i in range(n_records):
+                    if keep is not None and not keep[i]:
+                        continue
+                    record = records[i]
+                    if wanted_fns is not None and not wanted_fns[record.func_id]:
+                        continue
+                    if window is not None and (
+                        record.tend < window[0] or record.tstart > window[1]
+                    ):
+                        continue
+                    built += 1
+                    yield make_ioop(record, None if sizes is None else sizes[i])
+            finally:
+                # Counted once per rank, also if the iterator is not exhausted.
+                self.stats.count("ops_built", built)
 
+        return {rank: rank_ioops(rank) for rank in ranks}
 
     def aggregate_op_stat(
         self,
-        stat_fn: Callable[[IOOP], Any]
+        stat_fn: Callable[[IOOP], Any],
+        ranks: Iterable[int] | None = None,
+        window: Tuple[float, float] | None = None,
+        classes: IOClassFilter | None = None,
+        calls: str = "all",
     ) -> Any:
         """
         Traverse all IOOP instances from parse_trace, apply stat_fn to each,
-        and collect results in a dict keyed by (mod, paradigm).
+        and collect results in a dict keyed by (mod, paradigm). Operations of
+        unknown functions are collected under UNCLASSIFIED.
         
         Args:
             stat_fn: Function to apply to each IOOP instance
+            ranks, window, classes: Filters applied before any IOOP is created,
+                see parse_trace.
+            calls: "all" counts nested calls at every layer, "top" and "leaf"
+                count every call once, see parse_trace. Top-level calls carry
+                the bytes of the leaf calls below them. Use aggregate_op_stats
+                for the "exclusive" mode.
             
         Returns:
-            Dictionary with (IOMod, IOPradigm) keys and list of stat_fn results as values
-        """
-        # Flatten all IOOP lists from the location dictionary
-        ops_stream = chain.from_iterable(self.parse_trace().values())
-
-        # Map each IOOP to ((mod, paradigm), stat_fn(op))
-        kv_stream = map(lambda op: ((op.mod, op.paradigm), stat_fn(op)), ops_stream)
-
-        # Reduce into grouped dict
-        def reducer(
-                acc: Dict[Tuple[IOPradigm, IOMod], list[Any]],
-                kv: Tuple[Tuple[IOPradigm, IOMod], Any]
-        ) -> Dict[Tuple[IOPradigm, IOMod], list[Any]]:
-            key, value = kv
-            if key not in acc:
-                acc[key] = []
-            acc[key].append(value)
-            return acc
-
-        return reduce(reducer, kv_stream, {})
+            Dictionary with (IOMod, IOPradigm) keys and list of stat_fn results as
+            values
+        """
+        parsed = self.parse_trace(ranks, window, classes, calls)
+        with self.stats.phase("aggregate"):
+            # Flatten all IOOP lists from the location dictionary
+            ops_stream = chain.from_iterable(parsed.values())
+
+            # Map each IOOP to ((mod, paradigm), stat_fn(op))
+            kv_stream = map(lambda op: ((op.mod, op.paradigm), stat_fn(op)), ops_stream)
+
+            # Reduce into grouped dict
+            def reducer(
+                    acc: Dict[Tuple[IOPradigm, IOMod], list[Any]],
+                    kv: Tuple[Tuple[IOPradigm, IOMod], Any]
+            ) -> Dict[Tuple[IOPradigm, IOMod], list[Any]]:
+                key, value = kv
+                if key not in acc:
+                    acc[key] = []
+                acc[key].append(value)
+                return acc
+
+            return reduce(reducer, kv_stream, {})
+
+    def to_arrow(self):
+        """
+        Exports all operations of the trace as one `pyarrow.Table`, built from the
+        `ops` columns without creating IOOP objects. See `OpColumns.to_arrow`.
+        """
+        return self.ops.to_arrow()
+
+    def to_pandas(self):
+        """
+        Exports all operations of the trace as one `pandas.DataFrame`, built from
+        the `ops` columns without creating IOOP objects.
+        """
+        return self.ops.to_pandas()
+
+    def to_parquet(self, path: str, **kwargs) -> None:
+        """
+        Writes all operations of the trace to a Parquet file.
+
+        :param path: Path of the Parquet file.
+        :param kwargs: Passed on to `pyarrow.parquet.write_table`.
+        """
+        self.ops.to_parquet(path, **kwargs)
+
+    def timeline(
+        self,
+        bin_width: float,
+        by: str | None = None,
+        active_ranks: bool = False,
+        t0=None,
+        t1=None,
+        calls: str = "all",
+    ) -> Timeline:
+        """
+        Time-binned bytes, op counts and concurrency of the trace, see
+        `OpColumns.timeline`.
+
+        :param bin_width: Bin width in seconds.
+        :param by: None for one row, "group" for one row per (IOMod, IOPradigm),
+                   "rank" for one row per rank, or any column name.
+        :param active_ranks: Also compute how many ranks do I/O in every bin.
+        :param calls: How nested calls count, see dedup_ops. With "all", an MPI-IO
+                      call and the POSIX calls it issues are binned independently
+                      and both count.
+        :rtype: Timeline
+        """
+        return self.dedup_ops(calls).timeline(bin_width, by, active_ranks, t0, t1)
+
+    def phases(self, gap: float = 0, group=None, calls: str = "all") -> IOPhases:
+        """
+        The I/O phases of the job: the records of all ranks merged into global
+        bursts of I/O, each with its duration, participating ranks, aggregate
+        bandwidth and slowest ranks, see `OpColumns.phases`.
+
+        :param gap: Quiet time in seconds between two phases at least, shorter
+                    gaps are bridged.
+        :param group: A (IOMod, IOPradigm) key or a list of them, None for all
+                      records including MPI calls and unknown functions.
+        :param calls: How nested calls count, see dedup_ops.
+        :rtype: IOPhases
+        """
+        ops = self.dedup_ops(calls)
+        with self.stats.phase("aggregate"):
+            return ops.phases(gap, group)
+
+    def ops_between(self, t0, t1, ranks=None, group=None) -> IOOPColumns:
+        """
+        The operations active at any time in [t0, t1], found through lazily
+        built per-rank interval indexes instead of a scan of the trace.
+
+        :param ranks: Only search these ranks, None for all.
+        :param group: A (IOMod, IOPradigm) key or a list of them to search,
+                      None for all.
+        :rtype: IOOPColumns
+        """
+        return self.ops.select(self.ops.overlapping(t0, t1, ranks, group))
+
+    def ops_active_at(self, t, ranks=None, group=None) -> IOOPColumns:
+        """
+        The operations running at time t, see ops_between.
+        """
+        return self.ops.select(self.ops.active_at(t, ranks, group))
+
+    def nearest_ops(self, t, k: int = 1, ranks=None, group=None) -> IOOPColumns:
+        """
+        The k operations closest in time to t, closest first, see ops_between.
+        """
+        return self.ops.select(self.ops.nearest(t, k, ranks, group))
+
+    def aggregate_op_stats(
+        self,
+        stats: StatSpec,
+        calls: str = "all",
+    ) -> Dict[str, Dict[Tuple[IOMod, IOPradigm], Any]]:
+        """
+        Computes several statistics in one go over the `ops` columns, grouped by
+        (mod, paradigm). Built-in statistics are computed over whole columns and
+        returned as arrays; custom functions are applied to IOOP instances created
+        from the columns during a single traversal and returned as lists. Those
+        IOOPs carry no raw arguments, use parse_trace for argument-level analysis.
+
+        Args:
+            stats: Either a list of built-in statistic names ("duration", "bytes",
+                "bandwidth", "count") or a mapping from result name to a built-in
+                name or to a function applied to each IOOP instance.
+            calls: How nested calls count, see dedup_ops: "all" records, "top"
+                records only with the bytes of their leaf calls, "leaf" records
+                only, or every record with its "exclusive" time and bytes.
+
+        Returns:
+            Dictionary mapping each result name to a dictionary with
+            (IOMod, IOPradigm) keys, like the output of aggregate_op_stat,
+            including UNCLASSIFIED for functions without a known class.
+            "count" maps each key to the number of operations.
+
+        Raises:
+            ValueError: If a built-in statistic name is not recognized.
+        """
+        ops = self.dedup_ops(calls)
+        with self.stats.phase("aggregate"):
+            return ops.aggregate(stats, COLUMN_STATS)
+
+    def aggregate_op_sketches(
+        self, stats: StatSpec, compression: float = 200, calls: str = "all"
+    ) -> Dict[str, Dict[Tuple[IOMod, IOPradigm], QuantileSketch]]:
+        """
+        Like aggregate_op_stats, but summarizes the values of every statistic and
+        key in a mergeable QuantileSketch instead of returning them all, so
+        memory does not grow with the trace. Every sketch also holds the exact
+        count, sum, min and max of its values.
+
+        :param stats: Built-in statistic names ("duration", "bytes", "bandwidth")
+                      or a mapping from result name to a built-in name or a
+                      function applied to each IOOP instance.
+        :param compression: Accuracy of the sketches, see QuantileSketch.
+        :param calls: How nested calls count, see dedup_ops.
+        :return: Dictionary mapping each result name to a dictionary of sketches
+                 keyed like aggregate_op_stats; "count" maps each key to the
+                 exact number of operations instead.
+        :raises ValueError: If a built-in statistic name is not recognized.
+        """
+        ops = self.dedup_ops(calls)
+        with self.stats.phase("aggregate"):
+            return ops.aggregate(stats, COLUMN_STATS, compression)
@@ -1,14 +1,20 @@
 from enum import Enum
+from typing import Any, Callable, Iterable, Mapping, Sequence, TypeAlias
 
 class IOMod(Enum):
     READ = "READ"
     WRITE = "WRITE"
     MISC = "MISC"
+    UNKNOWN = "UNKNOWN"
 
 class IOPradigm(Enum):
     POSIX = "POSIX"
     HDF5 = "HDF5"
     MPIIO = "MPIIO"
+    UNKNOWN = "UNKNOWN"
+
+# Class of the functions not listed in _GROUPED_FUNCTIONS.
+UNCLASSIFIED = (IOMod.UNKNOWN, IOPradigm.UNKNOWN)
 
 
 _GROUPED_FUNCTIONS = {
@@ -83,4 +89,59 @@ def map_io_fn(fn: str) -> tuple[IOMod, IOPradigm]:
     try:
         return _FUNCTION_CLASS_MAP[fn]
     except KeyError:
-        raise ValueError(f"Unknown function: {fn}")
\ No newline at end of file
+        raise ValueError(f"Unknown function: {fn}")
+
+def classify_io_fn(fn: str) -> tuple[IOMod, IOPradigm]:
+    """
+    Like map_io_fn, but maps unknown function names to UNCLASSIFIED.
+    
+    :param fn: The function name to map.
+    :type fn: str
+    :rtype: tuple[IOMod, IOPradigm]
+    """
+    return _FUNCTION_CLASS_MAP.get(fn, UNCLASSIFIED)
+
+# Every (IOMod, IOPradigm) class a function can map to, UNCLASSIFIED last. The
+# position of a class in this list is its compact class code.
+IO_CLASSES: list[tuple[IOMod, IOPradigm]] = [*_GROUPED_FUNCTIONS, UNCLASSIFIED]
+
+
+# Positions of the byte-count arguments of data-transfer calls. The transferred
+# size is the product of the arguments at these positions.
+_BYTES_ARGS = {
+    "read": (2,), "pread": (2,), "pread64": (2,),
+    "write": (2,), "pwrite": (2,), "pwrite64": (2,),
+    "fread": (1, 2), "fwrite": (1, 2),
+}
+
+def io_fn_bytes(fn: str, args: Sequence[Any], invalid: int = 0) -> int:
+    """
+    Returns the number of bytes requested by a call from its recorded arguments.
+
+    :param fn: The function name of the call.
+    :type fn: str
+    :param args: The raw arguments recorded for the call.
+    :param invalid: Returned instead of the size if the size arguments are
+                    missing, not numeric or negative, e.g. in a truncated record.
+    :type invalid: int
+    :return: The requested size, or 0 if the call does not transfer data or its
+             size is not recorded in plain form (e.g. MPI-IO counts depend on
+             the datatype).
+    :rtype: int
+    """
+    positions = _BYTES_ARGS.get(fn)
+    if positions is None:
+        return 0
+    size = 1
+    try:
+        for pos in positions:
+            size *= int(args[pos])
+    except (IndexError, TypeError, ValueError):
+        return invalid
+    return size if size >= 0 else invalid
+
+# Function classes to keep when filtering records: IOMod or IOPradigm members
+# match every class with that mod or paradigm, pairs match exactly.
+IOClassFilter: TypeAlias = Iterable[IOMod | IOPradigm | tuple[IOMod, IOPradigm]]
+
+StatSpec: TypeAlias = Mapping[str, str | Callable[..., Any]] | Iterable[str]
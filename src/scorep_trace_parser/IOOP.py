@@ -2,8 +2,15 @@ from __future__ import annotations
 from .custom_types import IOMod, IOParadigm
 
 class IOOP:
+    # Slots instead of a per-instance __dict__: a trace holds millions of these.
+    # fname is the region name string of the trace definitions, shared by all ops
+    # of a region.
+    __slots__ = (
+        "fname", "mod", "paradigm", "start_time", "end_time", "bytes_request",
+        "bytes_result",
+    )
+
     def __init__(self, fname: str, mod: IOMod, paradigm: IOParadigm, start_time, end_time, bytes_request, bytes_result):
-        assert start_time <= end_time, "Start time must be less than end time"
         self.fname = fname #Hotfix to include information about function name
         self.mod = mod
         self.paradigm = paradigm
@@ -21,6 +28,21 @@ class IOOP:
         assert self.duration > 0, "Duration must be greater than zero"
         return self.bytes_request / self.duration
 
+    def validate(self) -> IOOP:
+        """
+        Checks that the operation does not end before it starts. Not run on
+        construction, the TraceParser calls it when created with `validate=True`.
+
+        Returns:
+            The op itself.
+
+        Raises:
+            ValueError: If the operation ends before it starts.
+        """
+        if self.start_time > self.end_time:
+            raise ValueError("Start time must be less than end time")
+        return self
+
 
     def to_dict(self):
         return {
@@ -30,4 +52,5 @@ class IOOP:
             'io_duration': self.duration,
             'io_bytes_request': self.bytes_request,
             'io_byte_rate': self.byte_rate
-        }
\ No newline at end of file
+        }
+
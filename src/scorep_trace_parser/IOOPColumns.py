@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from trace_parser.columns import ExportColumn, OpColumns
+
+from .custom_types import IOMod, IOParadigm
+from .IOOP import IOOP
+
+# Code tables for the compact mode/paradigm columns. The position of a member in
+# these tuples is the code stored in `mod_code` / `paradigm_code`.
+MODS: Tuple[IOMod, ...] = tuple(IOMod)
+PARADIGMS: Tuple[IOParadigm, ...] = tuple(IOParadigm)
+
+
+class IOOPColumns(OpColumns):
+    """
+    Struct-of-arrays store of Score-P I/O operations.
+
+    `location` holds the OTF2 location reference of every op, times are in timer
+    ticks and `fname_code` indexes the `fnames` table of region names. `IOOP`
+    objects are only created on demand through indexing or iteration.
+    """
+
+    COLUMNS = {
+        "location": np.int64,
+        "mod_code": np.uint8,
+        "paradigm_code": np.uint8,
+        "fname_code": np.int32,
+        "start_time": np.int64,
+        "end_time": np.int64,
+        "bytes_request": np.int64,
+        "bytes_result": np.int64,
+    }
+    TABLES = ("fnames",)
+    RANK_COLUMN = "location"
+    OP_CLASS = IOOP
+    OP_FIELDS = (
+        ("fname_code", "fnames"), ("mod_code", MODS), ("paradigm_code", PARADIGMS),
+        "start_time", "end_time", "bytes_request", "bytes_result",
+    )
+
+    @classmethod
+    def from_ioops(
+        cls, location: int, ioops: Iterable[IOOP], fname_codes: Dict[str, int]
+    ) -> IOOPColumns:
+        """
+        Builds the columns of the ops of one location.
+
+        :param location: OTF2 location reference the ops belong to.
+        :type location: int
+        :param ioops: The operations of the location.
+        :param fname_codes: Intern table of region names shared by all locations of
+                            the trace; new names are added to it.
+        :type fname_codes: Dict[str, int]
+        :rtype: IOOPColumns
+        """
+        ioops = list(ioops)
+        n = len(ioops)
+        return cls(
+            tables={"fnames": list(fname_codes)},
+            location=np.full(n, location, dtype=np.int64),
+            mod_code=np.fromiter(
+                (MODS.index(op.mod) for op in ioops), dtype=np.uint8, count=n
+            ),
+            paradigm_code=np.fromiter(
+                (PARADIGMS.index(op.paradigm) for op in ioops), dtype=np.uint8, count=n
+            ),
+            fname_code=np.fromiter(
+                (fname_codes.setdefault(op.fname, len(fname_codes)) for op in ioops),
+                dtype=np.int32, count=n,
+            ),
+            start_time=np.fromiter(
+                (op.start_time for op in ioops), dtype=np.int64, count=n
+            ),
+            end_time=np.fromiter(
+                (op.end_time for op in ioops), dtype=np.int64, count=n
+            ),
+            bytes_request=np.fromiter(
+                (op.bytes_request for op in ioops), dtype=np.int64, count=n
+            ),
+            bytes_result=np.fromiter(
+                (op.bytes_result for op in ioops), dtype=np.int64, count=n
+            ),
+        )
+
+    @classmethod
+    def merge(cls, parts: Iterable[IOOPColumns]) -> IOOPColumns:
+        """
+        Concatenates stores with independent `fnames` tables, e.g. decoded by
+        different worker processes, re-coding `fname_code` into one shared table.
+        """
+        fname_codes = {}
+        recoded = []
+        for part in parts:
+            mapping = np.array(
+                [fname_codes.setdefault(n, len(fname_codes)) for n in part.fnames],
+                dtype=np.int32,
+            )
+            columns = part.columns()
+            columns["fname_code"] = mapping[part.fname_code]
+            recoded.append(cls(**columns))
+        return cls.concat(recoded, tables={"fnames": list(fname_codes)})
+
+    def export_columns(self) -> Dict[str, ExportColumn]:
+        return {
+            "location": self.location,
+            "function": (self.fname_code, self.fnames),
+            "mode": (self.mod_code, [mod.name for mod in MODS]),
+            "paradigm": (self.paradigm_code, [paradigm.name for paradigm in PARADIGMS]),
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "bytes_request": self.bytes_request,
+            "bytes_result": self.bytes_result,
+        }
+
+    @property
+    def nbytes(self) -> np.ndarray:
+        return self.bytes_request
+
+    @property
+    def byte_rate(self) -> np.ndarray:
+        """
+        Requested bytes per timer tick of every op, 0 for ops without a positive
+        duration.
+        """
+        duration = self.duration
+        out = np.zeros(len(self), dtype=np.float64)
+        np.divide(self.bytes_request, duration, out=out, where=duration > 0)
+        return out
+
+    def group_codes(self) -> Tuple[np.ndarray, List[Tuple[IOMod, IOParadigm]]]:
+        """
+        Group codes over (mod, paradigm), see `OpColumns.group_indices`.
+        """
+        codes = self.mod_code.astype(np.intp) * len(PARADIGMS) + self.paradigm_code
+        return codes, [(mod, paradigm) for mod in MODS for paradigm in PARADIGMS]
+
+
+# Built-in statistics usable by name in `TraceParser.aggregate_op_stats`, each
+# computed over whole columns, in timer ticks like the IOOP properties.
+COLUMN_STATS: Dict[str, Callable[[IOOPColumns], np.ndarray]] = {
+    "duration": lambda ops: ops.duration,
+    "bytes": lambda ops: ops.bytes_request,
+    "bandwidth": lambda ops: ops.byte_rate,
+}
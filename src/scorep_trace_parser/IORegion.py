@@ -1,29 +1,252 @@
 from __future__ import annotations
-from typing import Dict
-from .IOOP import IOOP
-from .custom_types import custom_any
+from typing import Dict, Iterable, Iterator, Tuple
+from .custom_types import IOMod, IOParadigm, custom_any
+
+IOKey = Tuple[IOMod, IOParadigm]
+
+
+class IOTotals:
+    """
+    Number, summed duration and summed bytes of a set of I/O operations.
+    """
+    __slots__ = ("count", "time", "bytes_request", "bytes_result")
+
+    def __init__(self, count=0, time=0, bytes_request=0, bytes_result=0):
+        self.count = count
+        self.time = time
+        self.bytes_request = bytes_request
+        self.bytes_result = bytes_result
+
+    def add_op(self, duration, bytes_request, bytes_result) -> None:
+        self.count += 1
+        self.time += duration
+        self.bytes_request += bytes_request
+        self.bytes_result += bytes_result
+
+    def add(self, other: IOTotals) -> IOTotals:
+        """
+        Adds the totals of another instance in place.
+
+        Returns:
+            The instance itself.
+        """
+        self.count += other.count
+        self.time += other.time
+        self.bytes_request += other.bytes_request
+        self.bytes_result += other.bytes_result
+        return self
+
+    def to_dict(self) -> Dict[str, custom_any]:
+        return {
+            'count': self.count,
+            'time': self.time,
+            'bytes_request': self.bytes_request,
+            'bytes_result': self.bytes_result,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"IOTotals(count={self.count}, time={self.time}, "
+            f"bytes_request={self.bytes_request}, bytes_result={self.bytes_result})"
+        )
+
 
 class IORegion:
-    #TODO: Implement IORegion class to represent a region of IO operations.
-    # Region can contains ioop - i/o operation
-    # Score-P records regions and IO operations separately.
-    def __init__(self, name, rank, start_time, end_time, ioop: IOOP = None):
-        assert start_time < end_time, "Start time must be less than end time"
+    """
+    A node of a call-path tree: one region entered along one call path, e.g.
+    main -> solver -> MPI_File_write_all. The root is the unnamed node of the code
+    outside any region; a region entered from several call paths has one node per
+    path.
+
+    Every node keeps the number of visits and the summed wall time of the region
+    along its path, and the I/O operations issued directly inside it as
+    `exclusive_io` totals per (IOMod, IOParadigm). `inclusive_io` adds the
+    operations of all descendants and is filled in by `rollup`, which the
+    TraceParser runs once per tree after the event pass. Operations are attributed
+    to the region that issued them, also when they complete after it was left.
+    All times are in timer ticks.
+
+    Trees of several locations are added up with `merge`.
+    """
+    # Slots: a call-path tree has a node per distinct path of every location.
+    __slots__ = (
+        "name", "parent", "children", "visits", "time", "exclusive_io",
+        "inclusive_io",
+    )
+
+    def __init__(self, name: str = "", parent: IORegion | None = None):
         self.name = name
-        self.rank = rank
-        self.start_time = start_time
-        self.end_time = end_time
-        self.ioop = ioop
+        self.parent = parent
+        self.children: Dict[str, IORegion] = {}
+        self.visits = 0
+        self.time = 0
+        self.exclusive_io: Dict[IOKey, IOTotals] = {}
+        self.inclusive_io: Dict[IOKey, IOTotals] = {}
+
+    def child(self, name: str) -> IORegion:
+        """
+        The child node of region `name`, created on first use.
+        """
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = IORegion(name, self)
+        return node
+
+    def leave(self, duration) -> None:
+        """
+        Records one visit of the region lasting `duration`.
+        """
+        self.visits += 1
+        self.time += duration
+
+    def add_op(self, key: IOKey, duration, bytes_request, bytes_result) -> None:
+        """
+        Attributes one I/O operation issued directly inside this region.
+        """
+        totals = self.exclusive_io.get(key)
+        if totals is None:
+            totals = self.exclusive_io[key] = IOTotals()
+        totals.add_op(duration, bytes_request, bytes_result)
+
+    def rollup(self) -> IORegion:
+        """
+        Recomputes `inclusive_io` of this node and all its descendants in one
+        post-order pass, after operations were added or trees merged.
+
+        Returns:
+            The node itself.
+        """
+        inclusive = {key: IOTotals().add(t) for key, t in self.exclusive_io.items()}
+        for child in self.children.values():
+            for key, totals in child.rollup().inclusive_io.items():
+                inclusive.setdefault(key, IOTotals()).add(totals)
+        self.inclusive_io = inclusive
+        return self
+
+    def merge(self, other: IORegion) -> IORegion:
+        """
+        Adds the visits, times and I/O of another tree in place, matching nodes by
+        call path, and rolls the inclusive totals up again. The nodes of `other`
+        are copied, never shared.
+
+        Returns:
+            The node itself.
+        """
+        self._add_tree(other)
+        return self.rollup()
+
+    def _add_tree(self, other: IORegion) -> None:
+        self.visits += other.visits
+        self.time += other.time
+        for key, totals in other.exclusive_io.items():
+            self.exclusive_io.setdefault(key, IOTotals()).add(totals)
+        for name, child in other.children.items():
+            self.child(name)._add_tree(child)
+
+    @classmethod
+    def merged(cls, trees: Iterable[IORegion]) -> IORegion:
+        """
+        A new tree adding up several trees, e.g. those of all locations.
+        """
+        root = cls()
+        for tree in trees:
+            root._add_tree(tree)
+        return root.rollup()
+
+    @property
+    def path(self) -> Tuple[str, ...]:
+        """
+        Names of the regions from the outermost one down to this node, empty for
+        the root.
+        """
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return tuple(reversed(names))
+
+    @property
+    def depth(self) -> int:
+        return len(self.path)
 
     @property
-    def duration(self):
-        return self.end_time - self.start_time
-    
+    def exclusive_time(self):
+        """
+        Wall time of the region not spent in its child regions, 0 for the root,
+        which has no time of its own.
+        """
+        if self.parent is None:
+            return 0
+        return self.time - sum(child.time for child in self.children.values())
+
+    def io(
+        self,
+        inclusive: bool = True,
+        mod: IOMod | None = None,
+        paradigm: IOParadigm | None = None,
+    ) -> IOTotals:
+        """
+        The I/O totals of the node summed over all or some modes and paradigms.
+
+        Args:
+            inclusive: Include the operations of the descendants.
+            mod: Only count operations of this mode, None for all.
+            paradigm: Only count operations of this paradigm, None for all.
+        """
+        result = IOTotals()
+        io = self.inclusive_io if inclusive else self.exclusive_io
+        for (m, p), totals in io.items():
+            if (mod is None or m == mod) and (paradigm is None or p == paradigm):
+                result.add(totals)
+        return result
+
+    def find(self, path: Iterable[str]) -> IORegion | None:
+        """
+        The descendant reached by a sequence of region names, None if the tree has
+        no such call path.
+        """
+        node = self
+        for name in path:
+            node = node.children.get(name)
+            if node is None:
+                return None
+        return node
+
+    def walk(self) -> Iterator[IORegion]:
+        """
+        Yields this node and all its descendants, parents before children, e.g. to
+        rank the call paths by their own I/O time:
+
+            sorted(tree.walk(), key=lambda n: n.io(inclusive=False).time)
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children.values()))
+
     def to_dict(self) -> Dict[str, custom_any]:
+        """
+        Nested dict of the tree below this node, with the I/O totals keyed by
+        "<mode>/<paradigm>", e.g. "READ/POSIX".
+        """
+        def totals(io: Dict[IOKey, IOTotals]):
+            return {
+                f"{mod.name}/{paradigm.name}": t.to_dict()
+                for (mod, paradigm), t in io.items()
+            }
+
         return {
             'name': self.name,
-            'rank': self.rank,
-            'start_time': self.start_time,
-            'end_time': self.end_time,
-            'duration': self.duration,
-        } | (self.ioop.to_dict())
\ No newline at end of file
+            'visits': self.visits,
+            'time': self.time,
+            'exclusive_time': self.exclusive_time,
+            'exclusive_io': totals(self.exclusive_io),
+            'inclusive_io': totals(self.inclusive_io),
+            'children': [child.to_dict() for child in self.children.values()],
+        }
+
+    def __repr__(self) -> str:
+        path = " -> ".join(self.path) or "<root>"
+        return f"IORegion({path}, visits={self.visits}, time={self.time})"
@@ -1,19 +1,74 @@
+import logging
 import os
 import otf2
 import warnings
 from .IOOP import IOOP
-from .custom_types import IOMod, IOParadigm
+from .IORegion import IORegion
+from .IOOPColumns import COLUMN_STATS, MODS, PARADIGMS, IOOPColumns
+from .custom_types import IOMod, IOParadigm, StatSpec
+import heapq
 from collections import defaultdict
-from itertools import chain, pairwise
-from typing import Callable, Dict, Tuple, Any
-from functools import cached_property, reduce
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from itertools import pairwise, repeat
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Tuple, Any
+from functools import cached_property
+import numpy as np
+
+from trace_parser.cache import TraceCache
+from trace_parser.instrument import ParseStats
+from trace_parser.phases import IOPhases
+from trace_parser.sketch import QuantileSketch
+from trace_parser.timeline import Timeline
+from trace_parser.overlap import split_proportionally, visible_pieces
+
+logger = logging.getLogger(__name__)
+
+# Event types the op decoding interprets, every other type is counted as skipped.
+HANDLED_EVENTS = (
+    otf2.events.Enter, otf2.events.Leave, otf2.events.IoOperationBegin,
+    otf2.events.IoOperationComplete,
+)
 
 
 class TraceParser:
-    def __init__(self, fp: str):
+    def __init__(
+        self,
+        fp: str,
+        cache: TraceCache | None = None,
+        workers: int | None = 1,
+        validate: bool = False,
+        stats: ParseStats | None = None,
+    ):
+        """
+        Args:
+            fp: Path to the OTF2 anchor file.
+            cache: Optional on-disk cache of the op columns. On a cache hit the
+                events are not decoded at all.
+            workers: Number of processes decoding the events for `ops`, each
+                reading its own share of the locations. 1 decodes in the
+                calling process, None uses one process per CPU.
+            validate: Check the nesting of the Enter/Leave and I/O events while
+                decoding, and every IOOP with IOOP.validate, and fail on the
+                first inconsistency.
+            stats: Collects the phase timings and the event, op and overlap
+                counters of the parser. Defaults to a new ParseStats; pass
+                `ParseStats(enabled=False)` to turn instrumentation off.
+        """
         assert os.path.isfile(fp), f"File not found: {fp}"
         assert fp.endswith(".otf2"), f"Invalid file type: {fp}"
         self.fp = fp
+        self.cache = cache
+        self.workers = workers
+        self.validate = validate
+        self.stats = ParseStats(label=fp) if stats is None else stats
+
+    @property
+    def path(self) -> str:
+        """
+        The path of the anchor file, the same as `fp`.
+        """
+        return self.fp
 
     @property
     def time_resolution(self) -> float:
@@ -32,36 +87,214 @@ class TraceParser:
         Parse the trace file and extract IOOP events.
         Cached after the first call per instance.
         """
-        event_stack = defaultdict(list)      # for Enter/Leave regions
         ioop_stack = defaultdict(list)
-        skip_event_type = set()
-        with otf2.reader.open(self.fp) as trace:
-            for loc, event in trace.events:
+        with self.stats.phase("build_ops"):
+            for loc, ioop in self.iter_ops():
+                ioop_stack[loc].append(ioop)
+        return ioop_stack
+
+    def iter_ops(
+        self,
+        locations: Iterable[int] | None = None,
+        regions: Dict[int, IORegion] | None = None,
+    ) -> Iterator[Tuple[otf2.definitions.Location, IOOP]]:
+        """
+        Stream the I/O operations of the trace in event order. Every operation is
+        yielded as soon as its IoOperationComplete event is read, and nothing is
+        kept once it has been yielded, so memory stays proportional to the depth
+        of the open Enter regions and the number of in-flight I/O operations
+        rather than to the trace size.
+
+        Begins and completions are matched through a hash index keyed by
+        (location, I/O paradigm, matching id), separate from the region stack, so
+        asynchronous operations may complete outside the region that issued
+        them; the operation is named after the issuing region. With `validate`
+        set, the event stream is checked for consistency instead, see
+        _iter_ops_validated.
+
+        The same pass builds the call-path tree of every location: the region
+        stack holds IORegion nodes, every Leave adds the visit time to its node,
+        and every operation is added to the `exclusive_io` of the node that
+        issued it. The trees are only complete once the generator is exhausted.
+
+        Args:
+            locations: References of the locations to read, None for all. Only
+                the event files of these locations are decoded.
+            regions: Optional dict receiving the root IORegion of every location
+                read, keyed by location reference, with the inclusive totals
+                rolled up when the events are exhausted.
+
+        Yields:
+            (location, IOOP) pairs.
+        """
+        if self.validate:
+            yield from self._iter_ops_validated(locations, regions)
+            return
+
+        # Open Enter regions as (IORegion node, enter time), above the root of
+        # the location's call-path tree.
+        region_stack = defaultdict(lambda: [(IORegion(), None)])
+        # Pending I/O operations keyed by (location, paradigm, matching id), each
+        # with the region node that issued it, so completions resolve in O(1)
+        # however many asynchronous operations are in flight.
+        pending = {}
+        event_counts = defaultdict(int)
+        unmatched = 0
+        with self._open_events(locations) as events, self._counting(event_counts):
+            for loc, event in events:
+                event_counts[type(event)] += 1
+                if isinstance(event, otf2.events.Enter):
+                    stack = region_stack[loc]
+                    stack.append((stack[-1][0].child(event.region.name), event.time))
+                elif isinstance(event, otf2.events.Leave):
+                    stack = region_stack[loc]
+                    if len(stack) > 1:
+                        node, enter_time = stack.pop()
+                        node.leave(event.time - enter_time)
+                elif isinstance(event, otf2.events.IoOperationBegin):
+                    key = (loc, event.handle.io_paradigm, event.matching_id)
+                    pending[key] = (event, region_stack[loc][-1][0])
+                elif isinstance(event, otf2.events.IoOperationComplete):
+                    key = (loc, event.handle.io_paradigm, event.matching_id)
+                    begin = pending.pop(key, None)
+                    if begin is None:
+                        unmatched += 1
+                        continue
+                    start_io_event, node = begin
+                    ioop = IOOP(
+                        fname=node.name,  # region name as function name
+                        mod=IOMod.from_otf2(start_io_event.mode),
+                        paradigm=IOParadigm.from_otf2(start_io_event.handle),
+                        start_time=start_io_event.time,
+                        end_time=event.time,
+                        bytes_request=start_io_event.bytes_request,
+                        bytes_result=event.bytes_result
+                    )
+                    node.add_op(
+                        (ioop.mod, ioop.paradigm), ioop.duration,
+                        ioop.bytes_request, ioop.bytes_result,
+                    )
+                    event_counts["ops_built"] += 1
+                    yield loc, ioop
+        self._collect_regions(region_stack, regions)
+        self.stats.count_all(
+            {"unmatched_completes": unmatched, "unmatched_begins": len(pending)}
+        )
+        if unmatched or pending:
+            warnings.warn(
+                f"{unmatched} IoOperationComplete events without a begin and "
+                f"{len(pending)} IoOperationBegin events without a completion"
+            )
+
+    @contextmanager
+    def _open_events(self, locations: Iterable[int] | None = None):
+        """
+        Opens the trace and yields the event stream of some or all locations.
+        """
+        with self.stats.phase("open"):
+            reader = otf2.reader.open(self.fp)
+        with reader as trace:
+            if locations is None:
+                yield trace.events
+                return
+            refs = set(locations)
+            if not refs:
+                yield iter(())
+                return
+            yield trace.events([
+                loc for loc in trace.definitions.locations if loc._ref in refs
+            ])
+
+    @contextmanager
+    def _counting(self, event_counts: Dict[Any, int]):
+        """
+        Adds the per-type event counts gathered by a decoding loop to the stats
+        when the loop ends, also if its generator is closed early. The loops
+        count into a local dict, so the stats cost nothing per event. The
+        "ops_built" entry is the number of IOOPs the loop yielded.
+        """
+        try:
+            yield
+        finally:
+            counts = {"ops_built": event_counts.pop("ops_built", 0)}
+            for event_type, n in event_counts.items():
+                counts[f"events.{event_type.__name__}"] = n
+                if not issubclass(event_type, HANDLED_EVENTS):
+                    counts[f"skipped_events.{event_type.__name__}"] = n
+            self.stats.count_all(counts)
+
+    def _collect_regions(
+        self,
+        region_stack: Mapping[otf2.definitions.Location, list],
+        regions: Dict[int, IORegion] | None,
+    ) -> None:
+        """
+        Rolls up the call-path trees at the bottom of the region stacks of a
+        finished event pass and stores them in `regions` by location reference.
+        Regions still open at the end of the trace keep the visits and times of
+        their earlier, finished visits only.
+        """
+        if regions is None:
+            return
+        nodes = 0
+        for loc, stack in region_stack.items():
+            root = regions[loc._ref] = stack[0][0].rollup()
+            nodes += sum(1 for _ in root.walk())
+        self.stats.count("region_nodes", nodes)
+
+    def _iter_ops_validated(
+        self,
+        locations: Iterable[int] | None = None,
+        regions: Dict[int, IORegion] | None = None,
+    ) -> Iterator[Tuple[otf2.definitions.Location, IOOP]]:
+        """
+        iter_ops with the consistency checks of the event stream: Enter/Leave must
+        nest, every I/O operation must run directly inside a region and complete
+        before that region is left, and matching ids must be unique.
+        """
+        event_stack = defaultdict(list)      # for Enter/Leave regions
+        # The call-path tree nodes of the open Enter events, see iter_ops.
+        region_stack = defaultdict(lambda: [(IORegion(), None)])
+        pending = {}
+        event_counts = defaultdict(int)
+        with self._open_events(locations) as events, self._counting(event_counts):
+            for loc, event in events:
+                event_counts[type(event)] += 1
                 if isinstance(event, otf2.events.Enter):
                     event_stack[loc].append(event)
+                    stack = region_stack[loc]
+                    stack.append((stack[-1][0].child(event.region.name), event.time))
                 elif isinstance(event, otf2.events.Leave):
                     assert event_stack[loc], "Empty stack!"
                     assert isinstance(event_stack[loc][-1], otf2.events.Enter), "Must be an enter to leave"
                     assert event_stack[loc][-1].region.name == event.region.name, f"{event_stack[loc][-1].region.name} != {event.region.name} - {event.time}: Leave event region does not match Enter event region"
                     event_stack[loc].pop()
+                    node, enter_time = region_stack[loc].pop()
+                    node.leave(event.time - enter_time)
                 elif isinstance(event, otf2.events.IoOperationBegin):
                     assert event_stack[loc], "I/O region must be in other region"
                     assert isinstance(event_stack[loc][-1], otf2.events.Enter), "IoOperationBegin must follow an Enter event"
+                    key = (loc, event.handle.io_paradigm, event.matching_id)
+                    assert key not in pending, (
+                        "Multiple IoOperationBegin events found for the same "
+                        "IoOperationEnd"
+                    )
+                    pending[key] = event
                     event_stack[loc].append(event)
                 elif isinstance(event, otf2.events.IoOperationComplete):
                     assert event_stack[loc], "I/O region must be in other region"
                     assert isinstance(event_stack[loc][-1], otf2.events.IoOperationBegin), "IO completes must have a begin"
-                    matching_io_events = [
-                        e for e in event_stack[loc]
-                        if isinstance(e, otf2.events.IoOperationBegin) and 
-                        e.matching_id == event.matching_id and
-                        e.handle.io_paradigm == event.handle.io_paradigm
-                    ]
-                    assert len(matching_io_events) == 1, "Multiple IoOperationBegin events found for the same IoOperationEnd"
-
-                    start_io_event = matching_io_events[0]
+                    key = (loc, event.handle.io_paradigm, event.matching_id)
+                    assert key in pending, (
+                        "IoOperationComplete without matching IoOperationBegin"
+                    )
 
-                    event_stack[loc].remove(start_io_event)
+                    start_io_event = pending.pop(key)
+                    assert event_stack[loc][-1] is start_io_event, (
+                        "IoOperationComplete must match the innermost "
+                        "IoOperationBegin"
+                    )
+                    event_stack[loc].pop()
 
                     # Get event name for this IO operation
                     assert event_stack[loc], "IoOperationEnd without matching Enter event"
@@ -76,100 +309,251 @@ class TraceParser:
                         bytes_request=start_io_event.bytes_request,
                         bytes_result=event.bytes_result
                     )
-                    ioop_stack[loc].append(ioop)
-                else:
-                    skip_event_type.add(type(event))
-            print(f"Skipped event types: {skip_event_type}")
-        return ioop_stack
-    
+                    region_stack[loc][-1][0].add_op(
+                        (ioop.mod, ioop.paradigm), ioop.duration,
+                        ioop.bytes_request, ioop.bytes_result,
+                    )
+                    event_counts["ops_built"] += 1
+                    yield loc, ioop.validate()
+        self._collect_regions(region_stack, regions)
+
+    def iter_op_batches(
+        self,
+        batch_size: int = 65536,
+        locations: Iterable[int] | None = None,
+        regions: Dict[int, IORegion] | None = None,
+    ) -> Iterator[Tuple[otf2.definitions.Location, IOOPColumns]]:
+        """
+        Stream the I/O operations of the trace as per-location column batches,
+        e.g. to fold statistics incrementally with `group_by`:
+
+            for loc, batch in parser.iter_op_batches():
+                for key, values in batch.group_by(batch.duration).items():
+                    totals[key] = totals.get(key, 0) + values.sum()
+
+        At most batch_size operations are buffered per location. All batches share
+        one region name intern table, so the `fnames` of a batch covers every
+        code seen so far and codes stay stable across batches.
+
+        Args:
+            batch_size: Number of operations of a location per batch.
+            locations: References of the locations to read, None for all.
+            regions: Optional dict receiving the call-path trees, see iter_ops.
+
+        Yields:
+            (location, IOOPColumns) pairs.
+        """
+        fname_codes = {}
+        pending = defaultdict(list)
+
+        def flush(loc):
+            batch = IOOPColumns.from_ioops(loc._ref, pending.pop(loc), fname_codes)
+            batch.fnames = list(fname_codes)
+            return loc, batch
+
+        for loc, ioop in self.iter_ops(locations, regions):
+            pending[loc].append(ioop)
+            if len(pending[loc]) >= batch_size:
+                yield flush(loc)
+        for loc in list(pending):
+            yield flush(loc)
+
     @cached_property
-    def overlapped(self) -> dict[otf2.definitions.Location, list[IOOP]]:
+    def ops(self) -> IOOPColumns:
         """
-        Returns a dictionary mapping each rank/location to a list of IOOPs
-        where overlapping operations are split and adjusted.
+        All I/O operations of the trace as one columnar store, built from the
+        streamed batches of `iter_op_batches` without materializing parse_trace,
+        by `workers` processes. Cached after the first access per instance, and in
+        `cache` if one is set.
         """
-        parsed_trace = self.parse_trace  # cached property returns dict[Location, list[IOOP]]
-        overlapped_trace = {}
-        io_mods = set(op.mod for ioop_list in parsed_trace.values() for op in ioop_list)
-        for io_mod in io_mods:
-            new_ioops = []
-            for rank, ioop_lst in parsed_trace.items():
-                ioop_lst = [op for op in ioop_lst if op.mod == io_mod]
-                sorted_ioops = sorted(ioop_lst, key=lambda op: op.start_time)
-                if not sorted_ioops:
-                    overlapped_trace[rank] = new_ioops
-                    continue
+        def build():
+            # The decoding pass builds the call-path trees as well, keep them.
+            ops, regions = self._decode()
+            self.__dict__.setdefault("region_trees", regions)
+            return ops
 
-                current_op = sorted_ioops[0]
+        if self.cache is None:
+            return build()
+        return self.cache.fetch(self.fp, IOOPColumns, build)
 
-                for next_op in sorted_ioops[1:]:
-                    if self.is_overlappable([current_op, next_op]):
+    @cached_property
+    def region_trees(self) -> Dict[int, IORegion]:
+        """
+        The call-path tree of every location, keyed by location reference, with
+        the visits and times of its regions and the exclusive and inclusive I/O
+        totals per (IOMod, IOParadigm) of every call path, see IORegion.
+
+        The trees are built by the event pass decoding `ops`. If `ops` was taken
+        from the cache or was not built yet, the events are decoded once more by
+        `workers` processes, and the decoded ops are kept as `ops` too. Cached
+        after the first access per instance.
+        """
+        ops, regions = self._decode()
+        if "ops" not in self.__dict__:
+            if self.cache is not None:
+                ops = self.cache.fetch(self.fp, IOOPColumns, lambda: ops)
+            self.__dict__["ops"] = ops
+        return regions
 
-                        # Split the overlapping IOOPs
-                        split_ops = self.handle_overlap(current_op, next_op)
-                        # Add all but the last piece
-                        new_ioops.extend(split_ops[:-1])
-                        # Carry forward the last piece for next comparison
-                        current_op = split_ops[-1]
-                    else:
-                        new_ioops.append(current_op)
-                        current_op = next_op
+    @cached_property
+    def region_tree(self) -> IORegion:
+        """
+        The call-path trees of all locations merged into one, matching regions
+        by call path, see IORegion.merge. Cached after the first access per
+        instance.
+        """
+        regions = self.region_trees
+        with self.stats.phase("aggregate"):
+            return IORegion.merged(regions.values())
 
-                # Append the last current_op
-                new_ioops.append(current_op)
-                overlapped_trace[rank] = new_ioops
+    def _decode(self) -> Tuple[IOOPColumns, Dict[int, IORegion]]:
+        # One event pass over all locations yielding the ops and the call-path trees.
+        regions = {}
+        with self.stats.phase("decode"):
+            if self.workers == 1:
+                ops = self.decode_columns(regions=regions)
+            else:
+                ops = self.decode_columns_parallel(self.workers, regions)
+        self.stats.count("ops", len(ops))
+        return ops, regions
 
-        return overlapped_trace
-        
-    @staticmethod
-    def handle_overlap(op1: IOOP, op2: IOOP) -> list[IOOP]:
-        """
-        Splits op1 around op2 if they overlap.
-        Ensures the sum of op1_1 and op1_2 bytes_result == op1.bytes_result.
-        Keeps op2 unchanged.
-        """
-        assert op1.end_time > op2.start_time, "op1 and op2 must overlap"
-        print(f"op1: ({op1.start_time}, {op1.end_time}), {op1.mod}, {op1.paradigm}, ({op1.bytes_request}, {op1.bytes_result}))")
-        print(f"op2: ({op2.start_time}, {op2.end_time}), {op2.mod}, {op2.paradigm}, ({op2.bytes_request}, {op2.bytes_result}))")
-        # Durations of split parts (can be zero)
-        pre_duration = max(0, op2.start_time - op1.start_time)
-        post_duration = max(0, op1.end_time - op2.end_time)
-        total_non_overlap = pre_duration + post_duration
-
-        parts = []
-        # Helper for proportional split
-        def proportional(val: float, dur: float) -> float:
-            return 0.0 if total_non_overlap == 0 else val * (dur / total_non_overlap)
-
-        # Pre-overlap piece
-        assert pre_duration > 0, "Pre-overlap duration must be positive because of overlap"
-        parts.append(IOOP(
-            fname=op1.fname,
-            mod=op1.mod,
-            paradigm=op1.paradigm,
-            start_time=op1.start_time,
-            end_time=op2.start_time,
-            bytes_request=proportional(op1.bytes_request, pre_duration),
-            bytes_result=proportional(op1.bytes_result, pre_duration)
-        ))
-
-        # Overlapping op2 kept as-is
-        parts.append(op2)
-
-        # Post-overlap piece
-        if post_duration > 0:
-            parts.append(IOOP(
-                fname=op1.fname,
-                mod=op1.mod,
-                paradigm=op1.paradigm,
-                start_time=op2.end_time,
-                end_time=op1.end_time,
-                bytes_request=proportional(op1.bytes_request, post_duration),
-                bytes_result=proportional(op1.bytes_result, post_duration)
+    def decode_columns(
+        self,
+        locations: Iterable[int] | None = None,
+        regions: Dict[int, IORegion] | None = None,
+    ) -> IOOPColumns:
+        """
+        Decode the I/O operations of some or all locations into one columnar
+        store in the calling process.
+
+        Args:
+            locations: References of the locations to read, None for all.
+            regions: Optional dict receiving the call-path trees, see iter_ops.
+        """
+        parts = [
+            batch
+            for _, batch in self.iter_op_batches(locations=locations, regions=regions)
+        ]
+        tables = parts[-1].tables() if parts else None
+        return IOOPColumns.concat(parts, tables=tables)
+
+    def partition_locations(self, parts: int) -> List[List[int]]:
+        """
+        Split the locations of the trace into at most `parts` groups with about
+        the same number of events, largest locations first.
+
+        Returns:
+            Lists of location references, one per group.
+        """
+        with otf2.reader.open(self.fp) as trace:
+            sizes = [
+                (loc.number_of_events, loc._ref) for loc in trace.definitions.locations
+            ]
+        groups = [[] for _ in range(max(1, min(parts, len(sizes))))]
+        loads = [(0, i) for i in range(len(groups))]
+        for n_events, ref in sorted(sizes, reverse=True):
+            load, i = heapq.heappop(loads)
+            groups[i].append(ref)
+            heapq.heappush(loads, (load + n_events, i))
+        return [sorted(group) for group in groups if group]
+
+    def decode_columns_parallel(
+        self,
+        workers: int | None = None,
+        regions: Dict[int, IORegion] | None = None,
+    ) -> IOOPColumns:
+        """
+        Decode the trace with one process per location group. The Enter/Leave and
+        I/O state machines are independent per location, so every worker reads
+        only the event files of its own locations and the results are merged
+        afterwards. The counters of the workers are added to `stats`, their
+        timings and hooks stay in the workers.
+
+        Args:
+            workers: Number of worker processes, None for one per CPU.
+            regions: Optional dict receiving the call-path trees built by the
+                workers, see iter_ops.
+        """
+        groups = self.partition_locations(workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+            results = list(pool.map(
+                _decode_locations, repeat(self.fp), groups, repeat(self.validate),
+                repeat(self.stats.enabled),
             ))
-        for part in parts:
-            print(f"Generated part: ({part.start_time} - {part.end_time}, {part.mod}, ({part.bytes_request}, {part.bytes_result}))")
-        return parts
+        for _, counters, trees in results:
+            self.stats.count_all(counters)
+            if regions is not None:
+                regions.update(trees)
+        return IOOPColumns.merge([part for part, _, _ in results])
+
+    @cached_property
+    def overlapped(self) -> Dict[Tuple[int, IOMod], IOOPColumns]:
+        """
+        Resolves overlapping I/O operations of the same mode on the same location.
+        Wherever operations overlap, the most recently started one keeps the time
+        and the operations it overlaps are cut into the pieces before and after
+        it, with their requested and transferred bytes split over the pieces in
+        proportion to the piece durations. Nested and chained overlaps are
+        resolved in one sweep per (location, mode) over the start-sorted ops of
+        its interval index, see OpColumns.interval_index.
+
+        Returns:
+            Dictionary mapping each (location reference, IOMod) pair to the
+            resolved operations in time order. Operations fully covered by later
+            ones have no pieces left.
+        """
+        ops = self.ops
+        with self.stats.phase("overlap"):
+            return self._resolve_overlaps(ops)
+
+    def _resolve_overlaps(
+        self, ops: IOOPColumns
+    ) -> Dict[Tuple[int, IOMod], IOOPColumns]:
+        overlapped_trace = {}
+        split = hidden = pieces = 0
+        for location in np.unique(ops.location).tolist():
+            for mod in MODS:
+                # The interval index of the location's ops of this mode is sorted
+                # by start time already, and tells when there is nothing to cut.
+                index = ops.interval_index(
+                    location, [(mod, paradigm) for paradigm in PARADIGMS]
+                )
+                if not len(index):
+                    continue
+                group = ops.select(index.positions)
+                if not index.has_overlaps():
+                    overlapped_trace[(location, mod)] = group
+                    continue
+                owner, start_time, end_time = visible_pieces(
+                    index.start, index.end, presorted=True
+                )
+                per_op = np.bincount(owner, minlength=len(group))
+                split += int((per_op > 1).sum())
+                hidden += int((per_op == 0).sum())
+                pieces += len(owner)
+                duration = end_time - start_time
+                columns = {
+                    name: column[owner] for name, column in group.columns().items()
+                }
+                columns.update(
+                    start_time=start_time,
+                    end_time=end_time,
+                    bytes_request=split_proportionally(
+                        group.bytes_request, owner, duration
+                    ),
+                    bytes_result=split_proportionally(
+                        group.bytes_result, owner, duration
+                    ),
+                )
+                overlapped_trace[(location, mod)] = IOOPColumns(
+                    tables=group.tables(), **columns
+                )
+        self.stats.count_all({
+            "overlap.split_ops": split,
+            "overlap.hidden_ops": hidden,
+            "overlap.pieces": pieces,
+        })
+        return overlapped_trace
 
     @staticmethod
     def is_overlappable(ioop_lst: list[IOOP]) -> bool:
@@ -198,24 +582,176 @@ class TraceParser:
         stat_fn: Callable[[IOOP], Any]
     ) -> Dict[Tuple[IOMod, IOParadigm], list[Any]]:
         """
-        Traverse all IOOP instances from parse_trace, apply stat_fn to each,
-        and collect results in a dict keyed by (mod, paradigm).
+        Traverse all IOOP instances, apply stat_fn to each, and collect results
+        in a dict keyed by (mod, paradigm).
+
+        IOOP objects are created on the fly from the cached `ops` columns, group by
+        group, so the trace is decoded at most once; prefer aggregate_op_stats for
+        statistics that can be expressed over columns.
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return {
+                key: [stat_fn(op) for op in ops.select(idx)]
+                for key, idx in ops.group_indices().items()
+            }
+
+    def to_arrow(self):
+        """
+        Exports all operations of the trace as one `pyarrow.Table`, built from the
+        `ops` columns without creating IOOP objects. See `OpColumns.to_arrow`.
+        """
+        return self.ops.to_arrow()
+
+    def to_pandas(self):
+        """
+        Exports all operations of the trace as one `pandas.DataFrame`, built from
+        the `ops` columns without creating IOOP objects. Times are in timer ticks, see
+        time_resolution.
+        """
+        return self.ops.to_pandas()
+
+    def to_parquet(self, path: str, **kwargs) -> None:
+        """
+        Writes all operations of the trace to a Parquet file.
+
+        Args:
+            path: Path of the Parquet file.
+            **kwargs: Passed on to `pyarrow.parquet.write_table`.
+        """
+        self.ops.to_parquet(path, **kwargs)
+
+    def timeline(
+        self,
+        bin_width: float,
+        by: str | None = None,
+        active_ranks: bool = False,
+        t0=None,
+        t1=None,
+    ) -> Timeline:
         """
-        # Flatten all IOOP lists from the location dictionary
-        ops_stream = chain.from_iterable(self.parse_trace.values())
+        Time-binned bytes, op counts and concurrency of the trace, see
+        `OpColumns.timeline`.
 
-        # Map each IOOP to ((mod, paradigm), stat_fn(op))
-        kv_stream = map(lambda op: ((op.mod, op.paradigm), stat_fn(op)), ops_stream)
+        Args:
+            bin_width: Bin width in timer ticks, see time_resolution.
+            by: None for one row, "group" for one row per (IOMod, IOParadigm),
+                "rank" for one row per location, or any column name.
+            active_ranks: Also compute how many locations do I/O in every bin.
+            t0, t1: Time range of the bins, defaults to the whole trace.
+
+        Returns:
+            The Timeline, with bytes_request as the bytes of every operation.
+        """
+        return self.ops.timeline(bin_width, by, active_ranks, t0, t1)
+
+    def phases(self, gap=0, group=None) -> IOPhases:
+        """
+        The I/O phases of the job: the operations of all locations merged into
+        global bursts of I/O, each with its duration, participating locations,
+        aggregate bandwidth and slowest locations, see `OpColumns.phases`.
+
+        Args:
+            gap: Quiet time in timer ticks between two phases at least, shorter
+                gaps are bridged.
+            group: An (IOMod, IOParadigm) key or a list of them, None for all.
+
+        Returns:
+            The IOPhases, with the location references as ranks.
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return ops.phases(gap, group)
+
+    def ops_between(self, t0, t1, ranks=None, group=None) -> IOOPColumns:
+        """
+        The operations active at any time in [t0, t1], found through lazily
+        built per-location interval indexes instead of a scan of the trace.
+
+        Args:
+            t0, t1: Time range in timer ticks.
+            ranks: Only search these location references, None for all.
+            group: An (IOMod, IOParadigm) key or a list of them, None for all.
+
+        Returns:
+            The matching operations in row order.
+        """
+        return self.ops.select(self.ops.overlapping(t0, t1, ranks, group))
+
+    def ops_active_at(self, t, ranks=None, group=None) -> IOOPColumns:
+        """
+        The operations running at time t, see ops_between.
+        """
+        return self.ops.select(self.ops.active_at(t, ranks, group))
+
+    def nearest_ops(self, t, k: int = 1, ranks=None, group=None) -> IOOPColumns:
+        """
+        The k operations closest in time to t, closest first, see ops_between.
+        """
+        return self.ops.select(self.ops.nearest(t, k, ranks, group))
+
+    def aggregate_op_stats(
+        self,
+        stats: StatSpec
+    ) -> Dict[str, Dict[Tuple[IOMod, IOParadigm], Any]]:
+        """
+        Computes several statistics in one go over the `ops` columns, grouped by
+        (mod, paradigm). Built-in statistics are computed over whole columns and
+        returned as arrays; custom functions are applied to IOOP instances created
+        from the columns during a single traversal and returned as lists.
+
+        Args:
+            stats: Either a list of built-in statistic names ("duration", "bytes",
+                "bandwidth", "count") or a mapping from result name to a built-in
+                name or to a function applied to each IOOP instance. Built-in
+                statistics are in timer ticks, see time_resolution.
+
+        Returns:
+            Dictionary mapping each result name to a dictionary with
+            (IOMod, IOParadigm) keys, like the output of aggregate_op_stat.
+            "count" maps each key to the number of operations.
+
+        Raises:
+            ValueError: If a built-in statistic name is not recognized.
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return ops.aggregate(stats, COLUMN_STATS)
+
+    def aggregate_op_sketches(
+        self, stats: StatSpec, compression: float = 200
+    ) -> Dict[str, Dict[Tuple[IOMod, IOParadigm], QuantileSketch]]:
+        """
+        Like aggregate_op_stats, but summarizes the values of every statistic and
+        key in a mergeable QuantileSketch instead of returning them all, so
+        memory does not grow with the trace. Every sketch also holds the exact
+        count, sum, min and max of its values.
+
+        Args:
+            stats: Built-in statistic names ("duration", "bytes", "bandwidth")
+                or a mapping from result name to a built-in name or a function
+                applied to each IOOP instance.
+            compression: Accuracy of the sketches, see QuantileSketch.
+
+        Returns:
+            Dictionary mapping each result name to a dictionary of sketches keyed
+            like aggregate_op_stats; "count" maps each key to the exact number
+            of operations instead.
+
+        Raises:
+            ValueError: If a built-in statistic name is not recognized.
+        """
+        ops = self.ops
+        with self.stats.phase("aggregate"):
+            return ops.aggregate(stats, COLUMN_STATS, compression)
 
-        # Reduce into grouped dict
-        def reducer(
-            acc: Dict[Tuple[IOMod, IOParadigm], list[Any]],
-            kv: Tuple[Tuple[IOMod, IOParadigm], Any]
-        ) -> Dict[Tuple[IOMod, IOParadigm], list[Any]]:
-            key, value = kv
-            if key not in acc:
-                acc[key] = []
-            acc[key].append(value)
-            return acc
 
-        return reduce(reducer, kv_stream, {})
\ No newline at end of file
+def _decode_locations(
+    fp: str, locations: List[int], validate: bool = False, instrument: bool = True
+) -> Tuple[IOOPColumns, Dict[str, int], Dict[int, IORegion]]:
+    # Worker entry point of TraceParser.decode_columns_parallel.
+    stats = ParseStats(enabled=instrument)
+    regions = {}
+    parser = TraceParser(fp, validate=validate, stats=stats)
+    ops = parser.decode_columns(locations, regions)
+    return ops, stats.counters, regions
@@ -1,6 +1,9 @@
 from .IOOP import IOOP
 from .TraceParser import TraceParser
-from .IORegion import IORegion
+from .IORegion import IORegion, IOTotals
 from .custom_types import IOMod, custom_any, IOParadigm, IOMod
 
-__all__ = ['IOOP', 'IORegion', 'IOMod', 'custom_any', 'IOParadigm', 'TraceParser']
\ No newline at end of file
+__all__ = [
+    'IOOP', 'IORegion', 'IOTotals', 'IOMod', 'custom_any', 'IOParadigm',
+    'TraceParser',
+]
\ No newline at end of file
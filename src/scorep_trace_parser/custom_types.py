@@ -1,5 +1,5 @@
 import enum
-from typing import TypeAlias
+from typing import Any, Callable, Iterable, Mapping, TypeAlias
 import otf2
 
 class IOMod(enum.Enum):
@@ -26,4 +26,5 @@ class IOParadigm(enum.Enum):
                 return member
         raise ValueError(f"No matching IOPradigm for {io_handle.io_paradigm}")
 
-custom_any: TypeAlias = str | int
\ No newline at end of file
+custom_any: TypeAlias = str | int
+StatSpec: TypeAlias = Mapping[str, str | Callable[..., Any]] | Iterable[str]
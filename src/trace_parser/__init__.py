@@ -0,0 +1,53 @@
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .backends import (
+        BACKENDS, Trace, detect_backend, open_trace, parser_class, trace_name
+    )
+    from .batch import BatchResult, discover_traces, run_batch
+    from .cache import TraceCache
+    from .instrument import ParseStats
+    from .phases import IOPhases, detect_phases
+    from .sketch import QuantileSketch, merge_sketches
+
+# Public name -> submodule defining it. Submodules are imported on first access,
+# so `import trace_parser` stays cheap and does not pull in numpy or any
+# backend; see open_trace.
+_EXPORTS = {
+    'BACKENDS': 'backends',
+    'BatchResult': 'batch',
+    'detect_backend': 'backends',
+    'detect_phases': 'phases',
+    'discover_traces': 'batch',
+    'IOPhases': 'phases',
+    'merge_sketches': 'sketch',
+    'open_trace': 'backends',
+    'parser_class': 'backends',
+    'ParseStats': 'instrument',
+    'QuantileSketch': 'sketch',
+    'run_batch': 'batch',
+    'Trace': 'backends',
+    'TraceCache': 'cache',
+    'trace_name': 'backends',
+}
+
+__all__ = [
+    'BACKENDS', 'BatchResult', 'detect_backend', 'detect_phases', 'discover_traces',
+    'IOPhases', 'merge_sketches', 'open_trace', 'parser_class', 'ParseStats',
+    'QuantileSketch', 'run_batch', 'Trace', 'TraceCache', 'trace_name',
+]
+
+
+def __getattr__(name):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_EXPORTS])
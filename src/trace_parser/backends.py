@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import importlib
+import os
+from typing import TYPE_CHECKING, Any, Protocol, Tuple
+
+if TYPE_CHECKING:
+    from .columns import OpColumns
+    from .instrument import ParseStats
+    from .phases import IOPhases
+    from .sketch import QuantileSketch
+    from .timeline import Timeline
+
+# Backend name -> module holding its TraceParser class. Modules are imported only
+# when a parser of that backend is requested.
+BACKENDS = {
+    "darshan": "darshan_trace_parser.TraceParser",
+    "recorder": "recorder_trace_parser.TraceParser",
+    "scorep": "scorep_trace_parser.TraceParser",
+}
+
+RECORDER_METADATA = "recorder.mt"
+SCOREP_ANCHOR = "traces.otf2"
+
+
+class Trace(Protocol):
+    """
+    The interface shared by the TraceParsers of all backends, as returned by
+    open_trace. Group keys, times and units are backend specific, see the
+    TraceParser of each backend.
+    """
+
+    path: str
+    stats: ParseStats
+
+    @property
+    def ops(self) -> OpColumns: ...
+
+    def aggregate_op_stats(self, stats) -> dict: ...
+
+    def aggregate_op_sketches(
+        self, stats, compression: float = 200
+    ) -> dict[str, dict[Any, QuantileSketch]]: ...
+
+    def timeline(
+        self,
+        bin_width: float,
+        by: str | None = None,
+        active_ranks: bool = False,
+        t0=None,
+        t1=None,
+    ) -> Timeline: ...
+
+    def phases(self, gap: float = 0, group=None) -> IOPhases: ...
+
+    def ops_between(self, t0, t1, ranks=None, group=None) -> OpColumns: ...
+
+    def ops_active_at(self, t, ranks=None, group=None) -> OpColumns: ...
+
+    def nearest_ops(self, t, k: int = 1, ranks=None, group=None) -> OpColumns: ...
+
+    def to_arrow(self): ...
+
+    def to_pandas(self): ...
+
+    def to_parquet(self, path: str, **kwargs) -> None: ...
+
+
+def detect_backend(path: str) -> Tuple[str, str] | None:
+    """
+    Detects the trace format of a path.
+
+    A `.darshan` file is a Darshan log, an `.otf2` file is a Score-P anchor file, a
+    directory holding `traces.otf2` is a Score-P experiment directory and a
+    directory holding `recorder.mt` is a Recorder trace folder.
+
+    :param path: Path of a trace file or directory.
+    :type path: str
+    :return: The backend name and the path to hand to its TraceParser, or None if
+             the path is not a recognized trace.
+    :rtype: Tuple[str, str] | None
+    """
+    if os.path.isfile(path):
+        if path.endswith(".darshan"):
+            return "darshan", path
+        if path.endswith(".otf2"):
+            return "scorep", path
+    elif os.path.isdir(path):
+        if os.path.isfile(os.path.join(path, RECORDER_METADATA)):
+            return "recorder", path
+        anchor = os.path.join(path, SCOREP_ANCHOR)
+        if os.path.isfile(anchor):
+            return "scorep", anchor
+    return None
+
+
+def parser_class(backend: str) -> type:
+    """
+    Imports and returns the TraceParser class of a backend.
+
+    :param backend: One of the keys of BACKENDS.
+    :type backend: str
+    :rtype: type
+    :raises ValueError: If the backend is not known.
+    """
+    try:
+        module = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown backend: {backend}")
+    return importlib.import_module(module).TraceParser
+
+
+def open_trace(path: str, backend: str | None = None, **kwargs) -> Trace:
+    """
+    Opens a trace with the TraceParser of its format, importing only that
+    backend. Nothing is decoded until the parser's data is first accessed.
+
+    :param path: A `.darshan` log, an `.otf2` anchor file or Score-P experiment
+                 directory, or a Recorder trace folder.
+    :type path: str
+    :param backend: Backend to use instead of detecting it from the path.
+    :type backend: str | None
+    :param kwargs: Passed on to the TraceParser, e.g. `cache` or `stats`.
+    :return: The parser of the trace.
+    :rtype: Trace
+    :raises ValueError: If the path is not a recognized trace or the backend is
+                        not known.
+    """
+    if backend is None:
+        detected = detect_backend(path)
+        if detected is None:
+            raise ValueError(f"Not a recognized trace: {path}")
+        backend, path = detected
+    return parser_class(backend)(path, **kwargs)
+
+
+def trace_name(path: str) -> str:
+    """
+    Returns a short name for a trace: the file or folder name without extension,
+    or the experiment folder name for a Score-P `traces.otf2` anchor file.
+    """
+    path = os.path.normpath(path)
+    if os.path.basename(path) == SCOREP_ANCHOR:
+        path = os.path.dirname(path)
+    name = os.path.basename(path)
+    for ext in (".darshan", ".otf2"):
+        if name.endswith(ext):
+            return name[: -len(ext)]
+    return name
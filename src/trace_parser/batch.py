@@ -0,0 +1,250 @@
+import argparse
+import csv
+import glob
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import zip_longest
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from .backends import detect_backend, open_trace, trace_name
+from .cache import TraceCache
+
+DEFAULT_STATS = ("duration", "bytes", "bandwidth")
+
+
+class BatchResult:
+    """
+    Results of a batch run, in the (sorted) order the traces were discovered.
+
+    `stats[trace][stat][key]` holds the values of one statistic for one group key
+    of one trace, `errors[trace]` the traceback of every trace that failed.
+    """
+
+    def __init__(self):
+        self.backends: Dict[str, str] = dict()
+        self.stats: Dict[str, Dict[str, Dict[Tuple, Any]]] = dict()
+        self.errors: Dict[str, str] = dict()
+
+    def by_key(self, backend: str | None = None) -> Dict[Tuple, Dict[str, Any]]:
+        """
+        Merges the results of all traces per group key, with one `<trace>_<stat>`
+        column per trace and statistic, as in the notebooks' CSV export.
+
+        :param backend: Only merge the traces of this backend, None for all.
+        :type backend: str | None
+        :rtype: Dict[Tuple, Dict[str, Any]]
+        """
+        merged = dict()
+        for trace, trace_stats in self.stats.items():
+            if backend is not None and self.backends[trace] != backend:
+                continue
+            for stat, grouped in trace_stats.items():
+                for key, values in grouped.items():
+                    merged.setdefault(key, dict())[f"{trace}_{stat}"] = values
+        return merged
+
+    def to_csv(self, out_dir: str) -> List[str]:
+        """
+        Writes one CSV file per group key into a subdirectory of out_dir per
+        backend, e.g. `out_dir/recorder/WRITE_POSIX.csv`, since the keys of
+        different backends can share a name. Columns shorter than the longest one
+        are padded with empty cells; statistics with a single value per key, like
+        "count", fill the first row only.
+
+        :param out_dir: Directory the CSV files are written to, created if missing.
+        :type out_dir: str
+        :return: The paths of the written files.
+        :rtype: List[str]
+        """
+        written = []
+        for backend in sorted({self.backends[trace] for trace in self.stats}):
+            backend_dir = os.path.join(out_dir, backend)
+            os.makedirs(backend_dir, exist_ok=True)
+            for key, columns in self.by_key(backend).items():
+                csv_out = os.path.join(backend_dir, f"{key_name(key)}.csv")
+                with open(csv_out, "w", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["", *columns])
+                    rows = zip_longest(
+                        *(
+                            values if hasattr(values, "__iter__") else [values]
+                            for values in columns.values()
+                        ),
+                        fillvalue="",
+                    )
+                    for i, row in enumerate(rows):
+                        writer.writerow([i, *row])
+                written.append(csv_out)
+        return written
+
+
+def key_name(key: Tuple) -> str:
+    """
+    Formats a group key such as (IOModule.DXT_MPIIO, IOType.WRITE) as a file name
+    friendly string, e.g. `DXT_MPIIO_WRITE`.
+    """
+    return "_".join(part.name if hasattr(part, "name") else str(part) for part in key)
+
+
+def discover_traces(sources: str | Iterable[str]) -> List[Tuple[str, str, str]]:
+    """
+    Collects the traces of one or several directories or glob patterns.
+
+    A source that is a trace itself is taken as is, otherwise a directory is
+    scanned (non-recursively) and a glob pattern expanded, keeping every entry
+    `detect_backend` recognizes. Names that occur more than once are replaced by
+    the trace path to keep them unique.
+
+    :param sources: Directory, glob pattern or a list of them.
+    :return: Sorted (name, backend, path) triples.
+    :rtype: List[Tuple[str, str, str]]
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+
+    candidates = set()
+    for source in sources:
+        if detect_backend(source) is not None:
+            candidates.add(source)
+        elif os.path.isdir(source):
+            candidates.update(os.path.join(source, e) for e in os.listdir(source))
+        else:
+            candidates.update(glob.glob(source))
+
+    traces = []
+    for candidate in sorted(candidates):
+        detected = detect_backend(candidate)
+        if detected is not None:
+            backend, path = detected
+            traces.append((trace_name(path), backend, path))
+
+    names = [name for name, _, _ in traces]
+    return [
+        (name if names.count(name) == 1 else path, backend, path)
+        for name, backend, path in traces
+    ]
+
+
+def aggregate_trace(
+    backend: str, path: str, stats, cache: TraceCache | None = None
+) -> Tuple[Dict[str, Dict[Tuple, Any]] | None, str | None]:
+    """
+    Opens one trace and computes its statistics with `aggregate_op_stats`. Runs in
+    the worker processes; any exception is returned as a formatted traceback so a
+    broken trace does not abort the batch.
+
+    :return: The statistics and None, or None and the error traceback.
+    """
+    try:
+        parser = open_trace(path, backend, cache=cache)
+        return parser.aggregate_op_stats(stats), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def run_batch(
+    sources: str | Iterable[str],
+    stats: Mapping[str, Any] | Sequence[str] = DEFAULT_STATS,
+    *,
+    workers: int | None = None,
+    max_tasks_per_child: int | None = 1,
+    cache: TraceCache | None = None,
+) -> BatchResult:
+    """
+    Parses and aggregates every trace found in sources over a process pool.
+
+    Each worker handles at most max_tasks_per_child traces before it is replaced,
+    so memory held by a parsed trace is returned to the system instead of piling
+    up in long-lived workers. Results are ordered by trace name regardless of the
+    order in which workers finish.
+
+    :param sources: Directory, glob pattern or a list of them, see
+                    `discover_traces`.
+    :param stats: Statistics passed to `aggregate_op_stats` of every parser.
+                  Custom statistic functions must be picklable, i.e. defined at
+                  module level.
+    :param workers: Number of worker processes, defaults to the CPU count. With
+                    workers=1 traces are processed in the calling process.
+    :type workers: int | None
+    :param max_tasks_per_child: Traces handled by a worker before it is replaced;
+                                None keeps workers for the whole run.
+    :type max_tasks_per_child: int | None
+    :param cache: Optional on-disk cache of the parsed op columns shared by the
+                  workers.
+    :type cache: TraceCache | None
+    :rtype: BatchResult
+    """
+    traces = discover_traces(sources)
+    result = BatchResult()
+
+    if workers == 1:
+        outcomes = [
+            aggregate_trace(backend, path, stats, cache)
+            for _, backend, path in traces
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, max_tasks_per_child=max_tasks_per_child
+        ) as pool:
+            futures = [
+                pool.submit(aggregate_trace, backend, path, stats, cache)
+                for _, backend, path in traces
+            ]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for running out of memory).
+                    outcomes.append((None, traceback.format_exc()))
+
+    for (name, backend, _), (trace_stats, error) in zip(traces, outcomes):
+        result.backends[name] = backend
+        if error is None:
+            result.stats[name] = trace_stats
+        else:
+            result.errors[name] = error
+    return result
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        description="Aggregate I/O statistics of a directory of Darshan, Recorder "
+                    "and Score-P traces in parallel."
+    )
+    arg_parser.add_argument(
+        "sources", nargs="+", help="Trace directories or glob patterns."
+    )
+    arg_parser.add_argument(
+        "--stats", nargs="+", default=list(DEFAULT_STATS),
+        help="Built-in statistics to compute (duration, bytes, bandwidth, count).",
+    )
+    arg_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Number of worker processes (default: CPU count).",
+    )
+    arg_parser.add_argument(
+        "--output-dir", default=None,
+        help="Write one CSV per backend and group key into subdirectories of "
+             "this directory.",
+    )
+    arg_parser.add_argument(
+        "--cache-dir", default=None,
+        help="Cache parsed op columns in this directory across runs.",
+    )
+    args = arg_parser.parse_args(argv)
+
+    cache = None if args.cache_dir is None else TraceCache(args.cache_dir)
+    result = run_batch(args.sources, args.stats, workers=args.workers, cache=cache)
+    for name, backend in result.backends.items():
+        status = "error" if name in result.errors else "ok"
+        print(f"{name}\t{backend}\t{status}")
+    for name, error in result.errors.items():
+        print(f"--- {name}\n{error}", file=sys.stderr)
+    if args.output_dir is not None:
+        for csv_out in result.to_csv(args.output_dir):
+            print(f"wrote {csv_out}")
+    return 1 if result.errors else 0
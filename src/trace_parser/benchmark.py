@@ -0,0 +1,333 @@
+"""
+Benchmarks of the three TraceParsers on synthetic traces, see `synthetic`.
+
+There is no writer for Darshan logs, so the synthetic Darshan records bypass
+DXTLog and the log decoding: their stages are "index_records" and "columnize"
+instead of "open" and "parse". Pass a real log with --darshan-log to measure
+the decoding of Darshan logs.
+
+Every backend runs in a fresh process, so peak RSS is per backend. Each stage
+(import, open, parse, build_ops, overlap, aggregate) reports its wall time, the
+number of ops it processed, ops/s and the peak RSS of the process after the
+stage. import is the time to import the backend's TraceParser on top of the
+harness, which has numpy loaded already. build_ops, which creates an IOOP
+object per op, also reports the bytes allocated per IOOP and the bytes per op of
+the op columns. build_ops_dict does the same with a copy of the IOOP class that
+keeps its fields in a per-instance __dict__, the layout before the IOOP classes
+were slotted, for comparison. Results are printed, or written with --output, as
+one JSON document for regression tracking.
+"""
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from .backends import parser_class
+from .batch import DEFAULT_STATS
+from .synthetic import SyntheticRecorderReader, dxt_records, write_otf2
+
+BENCHMARK_BACKENDS = ("darshan", "recorder", "scorep")
+
+
+def peak_rss_kib() -> int | None:
+    """
+    Peak resident set size of the current process in KiB, None where the
+    resource module is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class StageTimer:
+    """
+    Collects the stage results of one backend run.
+    """
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self.results: List[Dict[str, Any]] = []
+
+    def run(
+        self,
+        stage: str,
+        fn: Callable[[], Any],
+        count: Callable[[Any], int] | None = None,
+    ):
+        """
+        Runs fn as one stage and records it, count(result) being the number of
+        ops (or records) it processed, if that is known.
+        """
+        start = time.perf_counter()
+        result = fn()
+        wall = time.perf_counter() - start
+        ops = None if count is None else count(result)
+        self.results.append({
+            "backend": self.backend,
+            "stage": stage,
+            "ops": ops,
+            "wall_s": wall,
+            "ops_per_s": ops / wall if ops is not None and wall > 0 else None,
+            "peak_rss_kib": peak_rss_kib(),
+        })
+        return result
+
+
+def dict_backed(op_class: type) -> type:
+    """
+    Copy of a slotted op class with the same methods, keeping its fields in a
+    per-instance __dict__ instead of slots.
+    """
+    namespace = {
+        name: value for name, value in vars(op_class).items()
+        if name != "__slots__" and name not in op_class.__slots__
+    }
+    return type(op_class.__name__, op_class.__bases__, namespace)
+
+
+def with_op_class(ops, op_class: type):
+    """
+    Shallow copy of an op store, sharing its columns, that builds its ops as
+    op_class.
+    """
+    ops = copy.copy(ops)
+    ops.OP_CLASS = op_class
+    return ops
+
+
+def ioop_footprint(ops, sample: int = 100_000) -> float:
+    """
+    Bytes allocated per IOOP object built from the first `sample` ops, as
+    measured by tracemalloc. Includes the boxed field values and the list slot
+    holding the object.
+    """
+    head = with_op_class(ops.select(np.arange(min(sample, len(ops)))), ops.OP_CLASS)
+    tracemalloc.start()
+    try:
+        built = list(head)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size / max(len(built), 1)
+
+
+def bench_build_ops(timer: StageTimer, ops) -> None:
+    # IOOP construction throughput from the op columns and the memory per IOOP,
+    # of the slotted IOOP class and of its __dict__-backed copy.
+    column_bytes = sum(column.nbytes for column in ops.columns().values())
+    dict_ops = with_op_class(ops, dict_backed(ops.OP_CLASS))
+    for stage, store in (("build_ops", ops), ("build_ops_dict", dict_ops)):
+        timer.run(stage, lambda: list(store), len)
+        timer.results[-1]["bytes_per_op"] = ioop_footprint(store)
+        timer.results[-1]["column_bytes_per_op"] = column_bytes / max(len(ops), 1)
+
+
+def bench_darshan(params: Dict[str, Any], workdir: str) -> List[Dict[str, Any]]:
+    timer = StageTimer("darshan")
+    TraceParser = timer.run("import", lambda: parser_class("darshan"))
+
+    if params["darshan_log"] is not None:
+        # A real log: "open" reads the DXT modules, "parse" decodes the segments.
+        def open_trace():
+            parser = TraceParser(params["darshan_log"])
+            parser.record_index
+            return parser
+
+        parser = timer.run("open", open_trace)
+        ops = timer.run("parse", lambda: parser.ops, len)
+    else:
+        records = dxt_records(
+            params["ranks"], params["ops"], params["files"], params["overlap"],
+            params["seed"],
+        )
+        # The parser wants a log path; the synthetic records replace the decoded
+        # log, so these stages only index and columnize records in memory.
+        fp = os.path.join(workdir, "synthetic.darshan")
+        open(fp, "w").close()
+
+        def index_records():
+            parser = TraceParser(fp)
+            parser.records = records
+            parser.record_index
+            return parser
+
+        parser = timer.run(
+            "index_records", index_records,
+            lambda p: sum(len(v) for v in p.records.values()),
+        )
+        ops = timer.run("columnize", lambda: parser.ops, len)
+    bench_build_ops(timer, ops)
+    timer.run("aggregate", lambda: parser.aggregate_op_stats(DEFAULT_STATS),
+              lambda _: len(ops))
+    return timer.results
+
+
+def bench_recorder(params: Dict[str, Any], workdir: str) -> List[Dict[str, Any]]:
+    timer = StageTimer("recorder")
+    TraceParser = timer.run("import", lambda: parser_class("recorder"))
+
+    reader = SyntheticRecorderReader(params["ranks"], params["ops"], params["seed"])
+
+    def open_trace():
+        parser = TraceParser(workdir)
+        parser.rr = reader
+        return parser
+
+    parser = timer.run(
+        "open", open_trace, lambda p: sum(lm.total_records for lm in p.rr.LMs)
+    )
+    ops = timer.run("parse", lambda: parser.ops, len)
+    bench_build_ops(timer, ops)
+    timer.run("aggregate", lambda: parser.aggregate_op_stats(DEFAULT_STATS),
+              lambda _: len(ops))
+    return timer.results
+
+
+def bench_scorep(params: Dict[str, Any], workdir: str) -> List[Dict[str, Any]]:
+    timer = StageTimer("scorep")
+    TraceParser = timer.run("import", lambda: parser_class("scorep"))
+
+    fp = write_otf2(
+        os.path.join(workdir, "otf2"), params["ranks"], params["ops"],
+        params["overlap"], params["async_fraction"], params["seed"],
+    )
+
+    def open_trace():
+        parser = TraceParser(fp, workers=params["workers"])
+        parser.time_resolution
+        return parser
+
+    parser = timer.run("open", open_trace)
+    ops = timer.run("parse", lambda: parser.ops, len)
+    bench_build_ops(timer, ops)
+    timer.run("overlap", lambda: parser.overlapped,
+              lambda pieces: sum(len(v) for v in pieces.values()))
+    timer.run("aggregate", lambda: parser.aggregate_op_stats(DEFAULT_STATS),
+              lambda _: len(ops))
+    return timer.results
+
+
+BENCHMARKS = {
+    "darshan": bench_darshan,
+    "recorder": bench_recorder,
+    "scorep": bench_scorep,
+}
+
+
+def _run_backend(backend: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    # Child process entry point: one backend, reported errors instead of raising.
+    with tempfile.TemporaryDirectory(prefix=f"bench-{backend}-") as workdir:
+        try:
+            return {"results": BENCHMARKS[backend](params, workdir), "error": None}
+        except Exception:
+            return {"results": [], "error": traceback.format_exc()}
+
+
+def run_benchmarks(
+    backends: Sequence[str] = BENCHMARK_BACKENDS, **params
+) -> Dict[str, Any]:
+    """
+    Runs the benchmarks of the given backends, each in a fresh process.
+
+    :param backends: Backends to benchmark.
+    :param params: Generator parameters: ranks, ops (per rank), files (per rank,
+                   Darshan), overlap, async_fraction (Score-P), seed, workers
+                   (Score-P decoding processes) and darshan_log (a real log
+                   benchmarked instead of synthetic Darshan records).
+    :return: A JSON-serializable document with the parameters, the environment,
+             the stage results and the error of every failed backend.
+    """
+    params = {
+        "ranks": 4, "ops": 10000, "files": 1, "overlap": 0.0,
+        "async_fraction": 0.0, "seed": 0, "workers": 1, "darshan_log": None,
+        **params,
+    }
+    report = {
+        "params": params,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+        "errors": {},
+    }
+    ctx = multiprocessing.get_context("spawn")
+    for backend in backends:
+        # Not a multiprocessing.Pool: its workers are daemonic and could not start
+        # the Score-P decoding processes.
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            outcome = pool.submit(_run_backend, backend, params).result()
+        report["results"].extend(outcome["results"])
+        if outcome["error"] is not None:
+            report["errors"][backend] = outcome["error"]
+    return report
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the trace parsers on synthetic traces."
+    )
+    arg_parser.add_argument(
+        "--backends", nargs="+", choices=BENCHMARK_BACKENDS,
+        default=list(BENCHMARK_BACKENDS),
+    )
+    arg_parser.add_argument("--ranks", type=int, default=4)
+    arg_parser.add_argument(
+        "--ops", type=int, default=10000, help="Operations per rank."
+    )
+    arg_parser.add_argument(
+        "--files", type=int, default=1, help="Files per rank (Darshan)."
+    )
+    arg_parser.add_argument(
+        "--overlap", type=float, default=0.0,
+        help="Probability of an op overlapping the previous one.",
+    )
+    arg_parser.add_argument(
+        "--async-fraction", type=float, default=0.0,
+        help="Fraction of non-blocking MPI-IO ops (Score-P).",
+    )
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Score-P decoding processes.",
+    )
+    arg_parser.add_argument(
+        "--darshan-log", default=None,
+        help="Benchmark this Darshan log instead of synthetic Darshan records.",
+    )
+    arg_parser.add_argument(
+        "--output", default=None, help="Write the JSON report to this file."
+    )
+    args = arg_parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.backends, ranks=args.ranks, ops=args.ops, files=args.files,
+        overlap=args.overlap, async_fraction=args.async_fraction, seed=args.seed,
+        workers=args.workers, darshan_log=args.darshan_log,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text)
+    for backend, error in report["errors"].items():
+        print(f"--- {backend}\n{error}", file=sys.stderr)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
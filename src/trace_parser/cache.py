@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, List, Tuple, Type, TypeVar
+
+import numpy as np
+
+from .columns import OpColumns
+
+ColumnsT = TypeVar("ColumnsT", bound=OpColumns)
+
+# Bump when the on-disk layout or the meaning of a backend's columns changes.
+CACHE_VERSION = 4
+META_FILE = "meta.json"
+
+
+def default_cache_dir() -> str:
+    return os.environ.get(
+        "TRACE_PARSER_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "trace_parser"),
+    )
+
+
+def _trace_files(path: str) -> List[str]:
+    """
+    Returns the files making up a trace: the file itself, or every file below a
+    trace directory, in a stable order.
+    """
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names)
+    return sorted(files)
+
+
+def fingerprint(path: str, content_hash: bool = False) -> Dict[str, object]:
+    """
+    Fingerprints a trace file or directory by absolute path, total size and latest
+    modification time, and optionally by a SHA-256 hash of its content.
+
+    :param path: Path of the trace file or directory.
+    :type path: str
+    :param content_hash: Also hash the content. Slower, but detects changes that
+                         keep size and mtime.
+    :type content_hash: bool
+    :rtype: Dict[str, object]
+    """
+    files = _trace_files(path)
+    stats = [os.stat(f) for f in files]
+    fp = {
+        "path": os.path.abspath(path),
+        "size": sum(st.st_size for st in stats),
+        "mtime_ns": max((st.st_mtime_ns for st in stats), default=0),
+    }
+    if content_hash:
+        digest = hashlib.sha256()
+        for f in files:
+            with open(f, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    digest.update(chunk)
+        fp["sha256"] = digest.hexdigest()
+    return fp
+
+
+def _digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()[:32]
+
+
+class TraceCache:
+    """
+    Persistent on-disk cache of the op columns of parsed traces, shared by the
+    three TraceParser classes.
+
+    Every entry is a directory of one `.npy` file per column, loaded memory-mapped,
+    plus a `meta.json` with the fingerprint and the string tables. Entries live
+    under `<cache_dir>/<path digest>/<fingerprint digest>/`, so a modified trace
+    gets a new entry and older entries of the same path are dropped. When
+    max_bytes is set, the least recently used entries are evicted after every
+    store until the cache fits.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        *,
+        max_bytes: int | None = None,
+        content_hash: bool = False,
+    ):
+        """
+        :param cache_dir: Cache directory, defaults to `$TRACE_PARSER_CACHE_DIR` or
+                          `~/.cache/trace_parser`.
+        :type cache_dir: str | None
+        :param max_bytes: Size cap of the whole cache, None for no cap.
+        :type max_bytes: int | None
+        :param content_hash: Include a content hash in the cache key.
+        :type content_hash: bool
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+
+    def _path_dir(self, path: str) -> str:
+        return os.path.join(self.cache_dir, _digest(os.path.abspath(path)))
+
+    def _entry_dir(self, path: str, columns_cls: type) -> Tuple[str, Dict]:
+        fp = fingerprint(path, self.content_hash)
+        key = {
+            "fingerprint": fp,
+            "columns": f"{columns_cls.__module__}.{columns_cls.__qualname__}",
+            "version": CACHE_VERSION,
+        }
+        return os.path.join(self._path_dir(path), _digest(key)), key
+
+    def load(self, path: str, columns_cls: Type[ColumnsT]) -> ColumnsT | None:
+        """
+        Loads the cached columns of a trace.
+
+        :param path: Path of the trace.
+        :param columns_cls: The OpColumns subclass the entry was stored from.
+        :return: The memory-mapped columns, or None on a cache miss.
+        """
+        entry, key = self._entry_dir(path, columns_cls)
+        meta_file = os.path.join(entry, META_FILE)
+        try:
+            with open(meta_file) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if meta.get("key") != key:
+            return None
+
+        columns = {
+            name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+            for name in columns_cls.COLUMNS
+        }
+        # The meta file's mtime is the entry's last use for LRU eviction.
+        os.utime(meta_file)
+        return columns_cls(tables=meta["tables"], **columns)
+
+    def store(self, path: str, columns: OpColumns) -> None:
+        """
+        Stores the columns of a trace, replacing older entries of the same path,
+        then evicts least recently used entries beyond max_bytes.
+        """
+        entry, key = self._entry_dir(path, type(columns))
+        path_dir = os.path.dirname(entry)
+        os.makedirs(path_dir, exist_ok=True)
+
+        tmp = tempfile.mkdtemp(dir=path_dir, prefix=".tmp-")
+        try:
+            for name, column in columns.columns().items():
+                np.save(os.path.join(tmp, f"{name}.npy"), column)
+            with open(os.path.join(tmp, META_FILE), "w") as f:
+                json.dump({"key": key, "tables": columns.tables()}, f)
+            for stale in os.listdir(path_dir):
+                if os.path.join(path_dir, stale) != tmp:
+                    shutil.rmtree(os.path.join(path_dir, stale), ignore_errors=True)
+            os.rename(tmp, entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes, keep=entry)
+
+    def fetch(
+        self, path: str, columns_cls: Type[ColumnsT], build: Callable[[], ColumnsT]
+    ) -> ColumnsT:
+        """
+        Returns the cached columns of a trace, building and storing them with
+        build() on a miss.
+        """
+        columns = self.load(path, columns_cls)
+        if columns is None:
+            columns = build()
+            self.store(path, columns)
+        return columns
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Removes the cached entries of one trace, or of every trace if path is None.
+        """
+        target = self.cache_dir if path is None else self._path_dir(path)
+        shutil.rmtree(target, ignore_errors=True)
+
+    def entries(self) -> List[Tuple[str, float, int]]:
+        """
+        Lists the cache entries as (directory, last use, size in bytes), least
+        recently used first.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for path_digest in os.listdir(self.cache_dir):
+            path_dir = os.path.join(self.cache_dir, path_digest)
+            if not os.path.isdir(path_dir):
+                continue
+            for name in os.listdir(path_dir):
+                entry = os.path.join(path_dir, name)
+                meta_file = os.path.join(entry, META_FILE)
+                if name.startswith(".") or not os.path.isfile(meta_file):
+                    continue
+                size = sum(
+                    os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry)
+                )
+                entries.append((entry, os.path.getmtime(meta_file), size))
+        return sorted(entries, key=lambda e: e[1])
+
+    def size(self) -> int:
+        return sum(size for _, _, size in self.entries())
+
+    def evict(self, max_bytes: int, keep: str | None = None) -> None:
+        """
+        Removes least recently used entries until the cache holds at most
+        max_bytes. The entry `keep` is never removed.
+        """
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        for entry, _, size in entries:
+            if total <= max_bytes:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
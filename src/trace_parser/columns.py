@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import importlib
+import itertools
+from abc import ABC, abstractmethod
+from typing import (
+    Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, NamedTuple,
+    Sequence, Tuple,
+)
+
+import numpy as np
+
+from .intervals import IntervalIndex
+from .phases import IOPhases, detect_phases
+from .sketch import SKETCH_BUFFER, QuantileSketch
+from .timeline import Timeline, build_timeline
+
+# An exported column: a plain array, or integer codes with their dictionary.
+ExportColumn = np.ndarray | Tuple[np.ndarray, List[str]]
+
+
+class Fixed(NamedTuple):
+    """
+    An op constructor argument in OpColumns.OP_FIELDS with the same value for
+    every op, e.g. the default of an argument before those filled from columns.
+    """
+    value: Any
+
+
+# An entry of OpColumns.OP_FIELDS: a column, a (code column, table) pair or a
+# Fixed value.
+OpField = str | Tuple[str, Sequence[Any] | str] | Fixed
+
+
+def _optional_import(name: str):
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise ImportError(
+            f"{name} is required for this export, install it with `pip install {name}`"
+        ) from e
+
+
+class OpColumns(ABC):
+    """
+    Base of the struct-of-arrays op stores of the three backends.
+
+    Every op is one row spread over typed NumPy columns. Subclasses declare their
+    columns in COLUMNS (name -> dtype, in storage order) and the string tables
+    their code columns index into in TABLES. All parts of one trace share the
+    same tables, so rows can be concatenated and selected without re-coding.
+
+    Op objects of class OP_CLASS are only created on demand through indexing or
+    iteration, from the positional constructor arguments listed in OP_FIELDS:
+    a column name, a (code column, table) pair decoding the codes through a
+    sequence or through the table of that name, or a Fixed value.
+    """
+
+    COLUMNS: Dict[str, type] = {}
+    TABLES: Tuple[str, ...] = ()
+    OP_CLASS: type
+    OP_FIELDS: Tuple[OpField, ...] = ()
+    # Column identifying the process of every op, a rank or an OTF2 location.
+    RANK_COLUMN = "rank"
+
+    def __init__(self, tables: Dict[str, List[Any]] | None = None, **columns):
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.asarray(columns[name], dtype=dtype))
+        tables = tables or dict()
+        for name in self.TABLES:
+            setattr(self, name, list(tables.get(name, [])))
+
+    @classmethod
+    def empty(cls, tables: Dict[str, List[Any]] | None = None):
+        return cls(tables=tables, **{name: [] for name in cls.COLUMNS})
+
+    @classmethod
+    def concat(cls, parts: Iterable[OpColumns], tables=None):
+        """
+        Concatenates the rows of several stores of the same trace. The tables of
+        the first part are kept unless tables is given.
+        """
+        parts = list(parts)
+        if not parts:
+            return cls.empty(tables)
+        if tables is None:
+            tables = parts[0].tables()
+        return cls(
+            tables=tables,
+            **{
+                name: np.concatenate([getattr(part, name) for part in parts])
+                for name in cls.COLUMNS
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(getattr(self, next(iter(self.COLUMNS))))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def tables(self) -> Dict[str, List[Any]]:
+        return {name: getattr(self, name) for name in self.TABLES}
+
+    def select(self, index):
+        """
+        Returns a new store holding only the rows picked by `index`, which can be
+        a boolean mask or an array of positions.
+        """
+        return type(self)(
+            tables=self.tables(),
+            **{name: column[index] for name, column in self.columns().items()},
+        )
+
+    def __getitem__(self, i: int):
+        return next(self._ops([i]))
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._ops(slice(None))
+
+    def _ops(self, rows) -> Iterator[Any]:
+        # Convert whole columns once instead of unboxing NumPy scalars per op, and
+        # pass the arguments by position, which is cheaper than by keyword.
+        arguments = []
+        for field in self.OP_FIELDS:
+            if isinstance(field, Fixed):
+                arguments.append(itertools.repeat(field.value))
+                continue
+            column, table = (field, None) if isinstance(field, str) else field
+            values = getattr(self, column)[rows].tolist()
+            if table is not None:
+                if isinstance(table, str):
+                    table = getattr(self, table)
+                values = map(table.__getitem__, values)
+            arguments.append(values)
+        return itertools.starmap(self.OP_CLASS, zip(*arguments))
+
+    def export_columns(self) -> Dict[str, ExportColumn]:
+        """
+        The columns of the table exports, in order. Code columns are exported as
+        (codes, dictionary) pairs so they become dictionary/categorical columns.
+        Subclasses override this to name the columns and decode their codes.
+        """
+        return self.columns()
+
+    def to_arrow(self):
+        """
+        Exports the ops as a `pyarrow.Table`. Numeric columns are wrapped without
+        copying, code columns become dictionary-encoded columns.
+
+        :raises ImportError: If pyarrow is not installed.
+        """
+        pa = _optional_import("pyarrow")
+        arrays = {}
+        for name, column in self.export_columns().items():
+            if isinstance(column, tuple):
+                codes, dictionary = column
+                arrays[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(np.asarray(codes, dtype=np.int32)),
+                    pa.array(dictionary, type=pa.string()),
+                )
+            else:
+                arrays[name] = pa.array(np.asarray(column))
+        return pa.table(arrays)
+
+    def to_pandas(self):
+        """
+        Exports the ops as a `pandas.DataFrame`, with categorical columns for the
+        code columns. Does not need pyarrow.
+
+        :raises ImportError: If pandas is not installed.
+        """
+        pd = _optional_import("pandas")
+        data = {}
+        for name, column in self.export_columns().items():
+            if isinstance(column, tuple):
+                codes, dictionary = column
+                data[name] = pd.Categorical.from_codes(codes, categories=dictionary)
+            else:
+                data[name] = np.asarray(column)
+        return pd.DataFrame(data, copy=False)
+
+    def to_parquet(self, path: str, **kwargs) -> None:
+        """
+        Writes the `to_arrow` table to a Parquet file.
+
+        :param path: Path of the Parquet file.
+        :param kwargs: Passed on to `pyarrow.parquet.write_table`, e.g.
+                       `compression`.
+        :raises ImportError: If pyarrow is not installed.
+        """
+        pq = _optional_import("pyarrow.parquet")
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+    @property
+    def ranks(self) -> np.ndarray:
+        return getattr(self, self.RANK_COLUMN)
+
+    def codes_by(self, by: str | None) -> Tuple[np.ndarray | None, List[Hashable]]:
+        """
+        Group codes and keys for the `by` argument of the analyses: None for a
+        single group, "group" for the backend's group key (see group_codes),
+        "rank" for RANK_COLUMN, or the name of any other column.
+
+        :raises ValueError: If by names no column.
+        """
+        if by is None:
+            return None, [None]
+        if by == "group":
+            return self.group_codes()
+        name = self.RANK_COLUMN if by == "rank" else by
+        if name not in self.COLUMNS:
+            raise ValueError(f"Unknown column: {by}")
+        keys, codes = np.unique(getattr(self, name), return_inverse=True)
+        return codes.ravel(), keys.tolist()
+
+    def timeline(
+        self,
+        bin_width: float,
+        by: str | None = None,
+        active_ranks: bool = False,
+        t0=None,
+        t1=None,
+    ) -> Timeline:
+        """
+        Bins the ops into a Timeline of bytes, op counts and concurrency. Bytes of
+        ops spanning several bins are split in proportion to the time spent in
+        each bin.
+
+        :param bin_width: Bin width, in the time unit of the columns.
+        :param by: Row grouping, see codes_by. Empty groups are kept as rows.
+        :param active_ranks: Also compute how many ranks do I/O in every bin.
+        :param t0: Start of the first bin, defaults to the first op start.
+        :param t1: End of the last bin, defaults to the last op end.
+        :rtype: Timeline
+        """
+        codes, keys = self.codes_by(by)
+        return build_timeline(
+            self.start_time, self.end_time, self.nbytes, bin_width,
+            codes=codes, keys=keys,
+            ranks=self.ranks if active_ranks else None, t0=t0, t1=t1,
+        )
+
+    def phases(self, gap: float = 0, group=None) -> IOPhases:
+        """
+        Merges the ops of all ranks into global I/O phases, see detect_phases.
+
+        :param gap: Quiet time between two phases at least, in the time unit of
+                    the columns. Shorter gaps are bridged.
+        :param group: A group key (see group_codes) or a list of group keys to
+                      restrict to, None for all ops. `op_phase` is then aligned
+                      with the selected ops.
+        :rtype: IOPhases
+        """
+        ops = self
+        if group is not None:
+            many = isinstance(group, (list, set, frozenset))
+            groups = self.group_indices()
+            positions = np.concatenate(
+                [groups[g] for g in (group if many else [group]) if g in groups]
+                + [np.empty(0, np.intp)]
+            )
+            ops = self.select(np.sort(positions))
+        return detect_phases(
+            ops.start_time, ops.end_time, ops.nbytes, ops.ranks, gap
+        )
+
+    def interval_index(self, rank=None, group=None) -> IntervalIndex:
+        """
+        The IntervalIndex of the ops of one rank and/or group, or of all ops.
+        Built on first use and kept with the store.
+
+        :param rank: Value of RANK_COLUMN to restrict to, None for all ranks.
+        :param group: A group key (see group_codes) or a list of group keys to
+                      restrict to, None for all groups.
+        :rtype: IntervalIndex
+        """
+        if group is not None:
+            # Group keys are tuples themselves, so only lists and sets are several.
+            many = isinstance(group, (list, set, frozenset))
+            group = frozenset(group if many else [group])
+        indexes = self.__dict__.setdefault("_interval_indexes", {})
+        key = (rank, group)
+        if key not in indexes:
+            positions = np.arange(len(self))
+            if rank is not None:
+                positions = self._rank_positions().get(rank, positions[:0])
+            if group is not None:
+                groups = self.group_indices()
+                in_group = np.concatenate(
+                    [groups[g] for g in group if g in groups] + [positions[:0]]
+                )
+                positions = np.intersect1d(positions, in_group)
+            indexes[key] = IntervalIndex(
+                self.start_time[positions], self.end_time[positions], positions
+            )
+        return indexes[key]
+
+    def _rank_positions(self) -> Dict[Hashable, np.ndarray]:
+        if "_rank_positions_cache" not in self.__dict__:
+            ranks = self.ranks
+            order = np.argsort(ranks, kind="stable")
+            uniq, starts = np.unique(ranks[order], return_index=True)
+            ends = np.append(starts[1:], len(order))
+            self._rank_positions_cache = {
+                r: order[s:e]
+                for r, s, e in zip(uniq.tolist(), starts.tolist(), ends.tolist())
+            }
+        return self._rank_positions_cache
+
+    def _query(self, query, ranks, group) -> np.ndarray:
+        # Runs query on the index of every selected rank and merges the positions.
+        if ranks is None:
+            return np.sort(query(self.interval_index(group=group)))
+        found = [query(self.interval_index(rank, group)) for rank in ranks]
+        return np.sort(np.concatenate(found)) if found else np.empty(0, np.intp)
+
+    def overlapping(self, t0, t1, ranks=None, group=None) -> np.ndarray:
+        """
+        Positions of the ops overlapping the time range [t0, t1], in row order.
+
+        :param ranks: Ranks to search, None for all.
+        :param group: Group key or list of group keys to search, None for all.
+        """
+        return self._query(lambda index: index.overlapping(t0, t1), ranks, group)
+
+    def active_at(self, t, ranks=None, group=None) -> np.ndarray:
+        """
+        Positions of the ops active at time t, in row order. See overlapping.
+        """
+        return self._query(lambda index: index.active_at(t), ranks, group)
+
+    def nearest(self, t, k: int = 1, ranks=None, group=None) -> np.ndarray:
+        """
+        Positions of the k ops closest to time t, closest first, see
+        IntervalIndex.nearest. See overlapping for the filters.
+        """
+        if ranks is None:
+            return self.interval_index(group=group).nearest(t, k)
+        candidates = np.concatenate(
+            [self.interval_index(rank, group).nearest(t, k) for rank in ranks]
+            + [np.empty(0, np.intp)]
+        )
+        distance = np.maximum(
+            np.maximum(self.start_time[candidates] - t, t - self.end_time[candidates]),
+            0,
+        )
+        return candidates[np.argsort(distance, kind="stable")[:k]]
+
+    @property
+    def duration(self) -> np.ndarray:
+        return self.end_time - self.start_time
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> np.ndarray:
+        """
+        Bytes moved by every op.
+        """
+
+    @abstractmethod
+    def group_codes(self) -> Tuple[np.ndarray, List[Hashable]]:
+        """
+        Returns one integer group code per row and the list mapping each code to
+        its group key.
+        """
+
+    def group_indices(self) -> Dict[Hashable, np.ndarray]:
+        """
+        Groups row positions by the group key of the store, e.g. (module, type).
+        Positions keep their original order inside each group.
+
+        :return: A dictionary mapping each group key present in the store to the
+                 array of its row positions.
+        :rtype: Dict[Hashable, np.ndarray]
+        """
+        codes, keys = self.group_codes()
+        order = np.argsort(codes, kind="stable")
+        uniq, starts = np.unique(codes[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        return {
+            keys[k]: order[s:e]
+            for k, s, e in zip(uniq.tolist(), starts.tolist(), ends.tolist())
+        }
+
+    def group_by(self, values: np.ndarray) -> Dict[Hashable, np.ndarray]:
+        """
+        Splits a per-row value column into one array per group key.
+
+        :param values: Array with one value per row, e.g. `columns.duration`.
+        :type values: np.ndarray
+        :rtype: Dict[Hashable, np.ndarray]
+        """
+        values = np.asarray(values)
+        return {key: values[idx] for key, idx in self.group_indices().items()}
+
+    def aggregate(
+        self,
+        stats,
+        column_stats: Mapping[str, Callable[[OpColumns], np.ndarray]],
+        compression: float | None = None,
+    ) -> Dict[str, Dict[Hashable, Any]]:
+        """
+        Computes several statistics in one go, grouped by the group key of the
+        store. Implementation of the aggregate_op_stats and aggregate_op_sketches
+        methods of the TraceParsers.
+
+        Built-in statistics are computed over whole columns and custom functions
+        are applied to the op objects during a single traversal of the rows.
+        Without a compression, their values are returned as arrays and lists
+        respectively. With one, the values of every statistic and key are
+        summarized in a QuantileSketch instead, and the values of custom
+        functions are folded into it every SKETCH_BUFFER values, so memory does
+        not grow with the trace. "count" gives the exact number of ops per key in
+        both modes.
+
+        :param stats: Statistic names or a mapping from result name to a statistic
+                      name or a function applied to each op object.
+        :param column_stats: The backend's built-in column statistics.
+        :param compression: Accuracy of the sketches, None to return all values.
+        :return: A dictionary mapping each result name to a dictionary keyed by
+                 group key.
+        :raises ValueError: If a statistic name is not recognized.
+        """
+        if not isinstance(stats, Mapping):
+            stats = {name: name for name in stats}
+        sketched = compression is not None
+
+        groups = self.group_indices()
+        result = {}
+        stat_fns = {}
+        for name, stat in stats.items():
+            if callable(stat):
+                stat_fns[name] = stat
+            elif stat == "count":
+                result[name] = {key: len(idx) for key, idx in groups.items()}
+            elif stat in column_stats:
+                values = column_stats[stat](self)
+                result[name] = {
+                    key: QuantileSketch.of(values[idx], compression)
+                    if sketched else values[idx]
+                    for key, idx in groups.items()
+                }
+            else:
+                raise ValueError(f"Unknown statistic: {stat}")
+
+        if stat_fns:
+            # Collected by group code, the keys are only looked up once at the end.
+            collected = {name: {} for name in stat_fns}
+            sketches = {name: {} for name in stat_fns}
+
+            def fold(name, code):
+                sketches[name].setdefault(code, QuantileSketch(compression)).update(
+                    collected[name].pop(code)
+                )
+
+            codes, keys = self.group_codes()
+            for code, op in zip(codes.tolist(), self):
+                for name, stat_fn in stat_fns.items():
+                    values = collected[name].setdefault(code, [])
+                    values.append(stat_fn(op))
+                    if sketched and len(values) >= SKETCH_BUFFER:
+                        fold(name, code)
+            for name, values in collected.items():
+                if sketched:
+                    for code in list(values):
+                        fold(name, code)
+                    values = sketches[name]
+                result[name] = {keys[code]: v for code, v in values.items()}
+
+        return {name: result[name] for name in stats}
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Callable, Dict, List, Mapping
+
+logger = logging.getLogger(__name__)
+
+# Hook signature: hook(kind, name, value) with kind "phase" (value in seconds)
+# or "count" (value is the increment).
+StatsHook = Callable[[str, str, float], None]
+
+
+class _Phase:
+    # Context manager timing one phase; a class rather than @contextmanager to keep
+    # entering and leaving cheap.
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats: ParseStats, name: str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class ParseStats:
+    """
+    Phase timings and counters of one or several TraceParsers.
+
+    The parsers time their phases ("open", "decode", "build_ops", "call_tree",
+    "overlap", "aggregate") with `phase` and count events, records and ops in
+    local variables of their decoding loops, adding them here once per loop. Every
+    phase and count is also logged to the `trace_parser.instrument` logger at
+    `level` and passed to the hooks. A disabled instance records nothing.
+
+    One instance may be shared by several parsers to sum up a batch of traces.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        level: int = logging.DEBUG,
+        label: str = "",
+    ):
+        """
+        :param enabled: Record timings and counters, call the hooks and log.
+        :param level: Logging level of the phase and count messages.
+        :param label: Prefix of the log messages, e.g. the trace name.
+        """
+        self.enabled = enabled
+        self.level = level
+        self.label = label
+        self.timings: Dict[str, float] = dict()
+        self.counters: Dict[str, int] = dict()
+        self.hooks: List[StatsHook] = []
+
+    def add_hook(self, hook: StatsHook) -> None:
+        """
+        Registers hook(kind, name, value), called after every finished phase
+        (kind "phase", value in seconds) and every count (kind "count").
+        """
+        self.hooks.append(hook)
+
+    def phase(self, name: str):
+        """
+        Context manager adding the wall time of its block to `timings[name]`.
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        if logger.isEnabledFor(self.level):
+            logger.log(self.level, "%s%s took %.6f s", self._prefix, name, seconds)
+        for hook in self.hooks:
+            hook("phase", name, seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        Adds n to `counters[name]`.
+        """
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + n
+        if logger.isEnabledFor(self.level):
+            logger.log(self.level, "%s%s += %d", self._prefix, name, n)
+        for hook in self.hooks:
+            hook("count", name, n)
+
+    def count_all(self, counts: Mapping[str, int], prefix: str = "") -> None:
+        """
+        Adds every count of a mapping, with names prefixed by prefix.
+        """
+        for name, n in counts.items():
+            self.count(prefix + name, n)
+
+    def merge(self, other: ParseStats | Mapping[str, Mapping[str, float]]) -> None:
+        """
+        Adds the timings and counters of another instance or of its to_dict()
+        output, e.g. from a worker process.
+        """
+        if isinstance(other, ParseStats):
+            other = other.to_dict()
+        for name, seconds in other.get("timings", {}).items():
+            self.add_time(name, seconds)
+        self.count_all(other.get("counters", {}))
+
+    def reset(self) -> None:
+        self.timings.clear()
+        self.counters.clear()
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """
+        JSON-serializable copy of the timings and counters.
+        """
+        return {"timings": dict(self.timings), "counters": dict(self.counters)}
+
+    @property
+    def _prefix(self) -> str:
+        return f"{self.label}: " if self.label else ""
+
+    def __repr__(self) -> str:
+        timings = ", ".join(f"{k}={v:.3f}s" for k, v in self.timings.items())
+        counters = ", ".join(f"{k}={v}" for k, v in self.counters.items())
+        return f"ParseStats(timings=[{timings}], counters=[{counters}])"
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+class IntervalIndex:
+    """
+    Static index over the [start, end] intervals of a set of ops, answering range
+    overlap, point-in-time and nearest-op queries with binary searches.
+
+    The intervals are sorted by start time, longer intervals first on ties, and
+    split into classes of similar duration (powers of two). Within a class every
+    interval overlapping [t0, t1] starts in [t0 - longest duration, t1], so a
+    query costs two binary searches per class plus the size of the result. A
+    second ordering by end time serves the nearest-op lookups.
+
+    All queries return positions as given at construction, e.g. row positions
+    in an OpColumns store. Intervals are closed: an op ending at t is active at t.
+    """
+
+    def __init__(
+        self, start: np.ndarray, end: np.ndarray, positions: np.ndarray | None = None
+    ):
+        """
+        :param start: Start time of every interval.
+        :param end: End time of every interval.
+        :param positions: The position reported for every interval, defaults to
+                          its index in start/end.
+        """
+        start = np.asarray(start)
+        end = np.asarray(end)
+        if positions is None:
+            positions = np.arange(len(start))
+        order = np.lexsort((start - end, start))
+        self.order = order
+        self.positions = np.asarray(positions)[order]
+        self.start = start[order]
+        self.end = end[order]
+
+        duration = (self.end - self.start).astype(np.float64)
+        # Powers of two of the durations, intervals without a positive duration
+        # get a class of their own.
+        duration_class = np.full(len(duration), np.iinfo(np.int64).min)
+        positive = duration > 0
+        duration_class[positive] = np.floor(np.log2(duration[positive]))
+        self.classes: List[Tuple[np.ndarray, np.ndarray, object]] = []
+        for c in np.unique(duration_class).tolist():
+            idx = np.flatnonzero(duration_class == c)
+            longest = (self.end[idx] - self.start[idx]).max()
+            self.classes.append((idx, self.start[idx], longest))
+
+        self.end_order = np.argsort(self.end, kind="stable")
+        self.end_sorted = self.end[self.end_order]
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def _overlapping(self, t0, t1) -> np.ndarray:
+        # Indices in start order of the intervals overlapping [t0, t1].
+        found = []
+        for idx, starts, longest in self.classes:
+            lo = np.searchsorted(starts, t0 - longest, side="left")
+            hi = np.searchsorted(starts, t1, side="right")
+            candidates = idx[lo:hi]
+            found.append(candidates[self.end[candidates] >= t0])
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(found))
+
+    def overlapping(self, t0, t1) -> np.ndarray:
+        """
+        Positions of the intervals overlapping [t0, t1], in start order.
+        """
+        return self.positions[self._overlapping(t0, t1)]
+
+    def active_at(self, t) -> np.ndarray:
+        """
+        Positions of the intervals active at time t, in start order.
+        """
+        return self.positions[self._overlapping(t, t)]
+
+    def nearest(self, t, k: int = 1) -> np.ndarray:
+        """
+        Positions of the k intervals closest to time t, closest first. The
+        distance is 0 for intervals active at t, else the gap between t and the
+        interval. Ties are broken by start order.
+        """
+        if k <= 0 or not len(self):
+            return np.empty(0, dtype=self.positions.dtype)
+        active = self._overlapping(t, t)[:k]
+        before = np.searchsorted(self.end_sorted, t, side="left")
+        ended = self.end_order[max(0, before - k):before]
+        after = np.searchsorted(self.start, t, side="right")
+        upcoming = np.arange(after, min(after + k, len(self)))
+        candidates = np.unique(np.concatenate([active, ended, upcoming]))
+        distance = np.maximum(
+            np.maximum(self.start[candidates] - t, t - self.end[candidates]), 0
+        )
+        closest = candidates[np.argsort(distance, kind="stable")[:k]]
+        return self.positions[closest]
+
+    def has_overlaps(self) -> bool:
+        """
+        Returns True if any two intervals overlap in time by more than a point.
+        """
+        if len(self) < 2:
+            return False
+        reach = np.maximum.accumulate(self.end)
+        return bool((self.start[1:] < reach[:-1]).any())
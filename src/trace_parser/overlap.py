@@ -0,0 +1,124 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def visible_pieces(
+    start: np.ndarray, end: np.ndarray, presorted: bool = False
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Resolves overlapping intervals with a single sweep over the start-sorted
+    intervals. At every point in time the most recently started interval that is
+    still running owns the time, so an interval is cut around every interval
+    that starts while it runs, however deeply nested or chained. Ties in the
+    start time go to the shorter interval.
+
+    Intervals without a positive length are passed through as one piece.
+    Intervals that are fully covered by later ones yield no piece at all.
+
+    :param start: Start time of every interval.
+    :type start: np.ndarray
+    :param end: End time of every interval.
+    :type end: np.ndarray
+    :param presorted: The intervals are sorted by start time already, longer
+                      intervals first on ties, e.g. by an IntervalIndex.
+    :type presorted: bool
+    :return: Three arrays (interval position, piece start, piece end) with one
+             entry per visible piece, in time order.
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    start = np.asarray(start)
+    end = np.asarray(end)
+    if presorted:
+        order = np.arange(len(start))
+    else:
+        order = np.lexsort((-(end - start), start))
+    starts = start[order].tolist()
+    ends = end[order].tolist()
+    positions = order.tolist()
+
+    owner, piece_start, piece_end = [], [], []
+    stack = []  # (end, position) of the running intervals, latest on top
+    now = None
+
+    def advance(until):
+        # Emit the pieces of the running intervals up to `until`.
+        nonlocal now
+        while stack:
+            top_end, top = stack[-1]
+            if top_end > until:
+                if until > now:
+                    owner.append(top)
+                    piece_start.append(now)
+                    piece_end.append(until)
+                    now = until
+                return
+            if top_end > now:
+                owner.append(top)
+                piece_start.append(now)
+                piece_end.append(top_end)
+                now = top_end
+            stack.pop()
+
+    for s, e, pos in zip(starts, ends, positions):
+        if e <= s:
+            owner.append(pos)
+            piece_start.append(s)
+            piece_end.append(e)
+            continue
+        if now is not None:
+            advance(s)
+        now = s
+        stack.append((e, pos))
+    if stack:
+        advance(max(e for e, _ in stack))
+
+    piece_start = np.asarray(piece_start, dtype=start.dtype)
+    in_time = np.argsort(piece_start, kind="stable")
+    return (
+        np.asarray(owner, dtype=np.intp)[in_time],
+        piece_start[in_time],
+        np.asarray(piece_end, dtype=end.dtype)[in_time],
+    )
+
+
+def split_proportionally(
+    values: np.ndarray, owner: np.ndarray, duration: np.ndarray
+) -> np.ndarray:
+    """
+    Splits an integer value of every interval, e.g. its bytes, over its pieces
+    in proportion to the piece durations. The split is rounded so the pieces of
+    an interval always add up to its value.
+
+    :param values: One value per interval.
+    :param owner: Interval position of every piece, as returned by
+                  `visible_pieces`.
+    :param duration: Duration of every piece.
+    :return: The value of every piece.
+    :rtype: np.ndarray
+    """
+    values = np.asarray(values)
+    duration = np.asarray(duration, dtype=np.float64)
+    total = np.bincount(owner, weights=duration, minlength=len(values))
+    # Pieces of one interval are contiguous after a stable sort by owner, so the
+    # running fraction can be rounded and differenced per interval.
+    order = np.argsort(owner, kind="stable")
+    owner_sorted = owner[order]
+    share = np.ones(len(owner), dtype=np.float64)
+    np.divide(
+        duration[order], total[owner_sorted], out=share, where=total[owner_sorted] > 0
+    )
+    cum = np.cumsum(share)
+    first = np.ones(len(owner), dtype=bool)
+    first[1:] = owner_sorted[1:] != owner_sorted[:-1]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(owner)), 0))
+    offset = np.where(group_start > 0, cum[group_start - 1], 0.0)
+    frac = np.clip(cum - offset, 0.0, 1.0)
+    last = np.ones(len(owner), dtype=bool)
+    last[:-1] = first[1:]
+    frac[last] = 1.0
+    rounded = np.rint(frac * values[owner_sorted]).astype(np.int64)
+    prev = np.where(first, 0, np.roll(rounded, 1))
+    out = np.empty(len(owner), dtype=np.int64)
+    out[order] = rounded - prev
+    return out
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+class IOPhases:
+    """
+    The I/O phases of a trace: maximal stretches of time during which some rank
+    is doing I/O, e.g. a checkpoint burst or a collective write, separated by
+    quiet gaps.
+
+    The per-phase arrays `start`, `end`, `ops`, `bytes` and `nranks` hold one
+    entry per phase in time order. `op_phase` maps every op row of the analysed
+    store to its phase.
+
+    Every rank taking part in a phase has one row in the rank table, grouped by
+    phase and, inside a phase, ordered from the rank finishing first to the one
+    finishing last. The rows of phase i are `rank_offsets[i]:rank_offsets[i + 1]`.
+    `rank` holds the rank, `rank_finish` the time from the start of the phase to
+    the end of the rank's last op in it, `rank_busy` the summed duration of its
+    ops and `rank_bytes` their bytes. A rank finishing much later than the median
+    rank of its phase is a straggler, see `slowdown` and `stragglers`.
+
+    Times are in the time unit of the op columns.
+    """
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        ops: np.ndarray,
+        bytes: np.ndarray,
+        op_phase: np.ndarray,
+        rank_offsets: np.ndarray,
+        rank: np.ndarray,
+        rank_finish: np.ndarray,
+        rank_busy: np.ndarray,
+        rank_bytes: np.ndarray,
+    ):
+        self.start = start
+        self.end = end
+        self.ops = ops
+        self.bytes = bytes
+        self.op_phase = op_phase
+        self.rank_offsets = rank_offsets
+        self.rank = rank
+        self.rank_finish = rank_finish
+        self.rank_busy = rank_busy
+        self.rank_bytes = rank_bytes
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def duration(self) -> np.ndarray:
+        return self.end - self.start
+
+    @property
+    def nranks(self) -> np.ndarray:
+        """
+        Number of ranks doing I/O in every phase.
+        """
+        return np.diff(self.rank_offsets)
+
+    @property
+    def bandwidth(self) -> np.ndarray:
+        """
+        Aggregate bandwidth of every phase: its bytes over its duration, 0 for
+        phases without a positive duration.
+        """
+        duration = self.duration.astype(np.float64)
+        out = np.zeros(len(self), dtype=np.float64)
+        np.divide(self.bytes, duration, out=out, where=duration > 0)
+        return out
+
+    @property
+    def median_finish(self) -> np.ndarray:
+        """
+        Median of rank_finish over the ranks of every phase.
+        """
+        first = self.rank_offsets[:-1]
+        count = self.nranks
+        return (
+            self.rank_finish[first + (count - 1) // 2]
+            + self.rank_finish[first + count // 2]
+        ) / 2
+
+    @property
+    def slowdown(self) -> np.ndarray:
+        """
+        rank_finish of every rank table row over the median of its phase, 1 for
+        phases whose median rank finishes at once.
+        """
+        median = np.repeat(self.median_finish, self.nranks).astype(np.float64)
+        out = np.ones(len(self.rank), dtype=np.float64)
+        np.divide(self.rank_finish, median, out=out, where=median > 0)
+        return out
+
+    def stragglers(
+        self, k: int = 3, threshold: float = 1.0
+    ) -> List[List[Tuple[Any, float, float]]]:
+        """
+        The slowest ranks of every phase.
+
+        :param k: Number of ranks per phase at most.
+        :param threshold: Only report ranks whose slowdown exceeds this factor.
+        :return: One list per phase of (rank, finish, slowdown) triples, slowest
+                 rank first.
+        """
+        slowdown = self.slowdown
+        rank = self.rank.tolist()
+        finish = self.rank_finish.tolist()
+        result = []
+        for first, last in zip(
+            self.rank_offsets[:-1].tolist(), self.rank_offsets[1:].tolist()
+        ):
+            rows = range(last - 1, max(first, last - k) - 1, -1)
+            result.append([
+                (rank[i], finish[i], float(slowdown[i]))
+                for i in rows
+                if slowdown[i] > threshold
+            ])
+        return result
+
+    def phase_ranks(self, i: int) -> np.ndarray:
+        """
+        The ranks of phase i, from the first to finish to the last.
+        """
+        return self.rank[self.rank_offsets[i]:self.rank_offsets[i + 1]]
+
+    def summary(self, k: int = 3, threshold: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        One JSON-serializable dict per phase with its time span, ops, bytes,
+        participating ranks, bandwidth and stragglers (see stragglers).
+        """
+        stragglers = self.stragglers(k, threshold)
+        return [
+            {
+                "start": start,
+                "end": end,
+                "duration": end - start,
+                "ops": ops,
+                "bytes": nbytes,
+                "ranks": nranks,
+                "bandwidth": bandwidth,
+                "median_finish": median,
+                "stragglers": [
+                    {"rank": rank, "finish": finish, "slowdown": slowdown}
+                    for rank, finish, slowdown in phase_stragglers
+                ],
+            }
+            for start, end, ops, nbytes, nranks, bandwidth, median, phase_stragglers
+            in zip(
+                self.start.tolist(), self.end.tolist(), self.ops.tolist(),
+                self.bytes.tolist(), self.nranks.tolist(), self.bandwidth.tolist(),
+                self.median_finish.tolist(), stragglers,
+            )
+        ]
+
+
+def detect_phases(
+    start: np.ndarray,
+    end: np.ndarray,
+    nbytes: np.ndarray,
+    ranks: np.ndarray,
+    gap: float = 0,
+) -> IOPhases:
+    """
+    Merges the op intervals of all ranks into global I/O phases in one sweep over
+    the start-sorted ops: a new phase begins at an op starting more than `gap`
+    after the latest end of all earlier ops. Sorting dominates, so the run time
+    is O(n log n) in the number of ops and does not depend on the number of
+    ranks; the per-phase and per-(phase, rank) aggregates are vectorized.
+
+    :param start: Start time of every op.
+    :param end: End time of every op.
+    :param nbytes: Bytes moved by every op.
+    :param ranks: Rank of every op.
+    :param gap: Quiet time two consecutive phases must be apart at least; shorter
+                gaps are bridged. 0 merges only ops that overlap or touch.
+    :rtype: IOPhases
+    :raises ValueError: If gap is negative.
+    """
+    if gap < 0:
+        raise ValueError(f"Gap must not be negative: {gap}")
+    n = len(start)
+    if not n:
+        empty = np.empty(0, dtype=np.int64)
+        return IOPhases(
+            start=start[:0], end=end[:0], ops=empty, bytes=empty, op_phase=empty,
+            rank_offsets=np.zeros(1, dtype=np.int64), rank=ranks[:0],
+            rank_finish=np.empty(0), rank_busy=np.empty(0), rank_bytes=empty,
+        )
+    order = np.argsort(start)
+    s = start[order]
+    e = end[order]
+    latest_end = np.maximum.accumulate(e)
+    new_phase = np.empty(n, dtype=bool)
+    new_phase[:1] = True
+    new_phase[1:] = s[1:] > latest_end[:-1] + gap
+    sorted_phase = np.cumsum(new_phase) - 1
+    op_phase = np.empty(n, dtype=np.int64)
+    op_phase[order] = sorted_phase
+
+    firsts = np.flatnonzero(new_phase)
+    lasts = np.append(firsts[1:], n) - 1
+    phase_start = s[firsts]
+    phase_end = latest_end[lasts]
+    phase_ops = np.diff(np.append(firsts, n))
+    phase_bytes = np.bincount(
+        op_phase, weights=nbytes, minlength=len(firsts)
+    ).astype(np.int64)
+
+    # One row per (phase, rank): sort the ops by phase, then by rank, and
+    # reduce every run of equal keys.
+    rank_keys, rank_codes = np.unique(ranks, return_inverse=True)
+    nkeys = max(len(rank_keys), 1)
+    pair = op_phase * nkeys + rank_codes.ravel()
+    by_pair = np.argsort(pair)
+    pair = pair[by_pair]
+    runs = np.flatnonzero(np.append(True, pair[1:] != pair[:-1]))
+    pairs = pair[runs]
+    pair_phase = pairs // nkeys
+    pair_end = np.maximum.reduceat(end[by_pair], runs)
+    pair_finish = (pair_end - phase_start[pair_phase]).astype(np.float64)
+    pair_busy = np.add.reduceat((end - start)[by_pair], runs)
+    pair_bytes = np.add.reduceat(nbytes[by_pair], runs)
+
+    rows = np.lexsort((pair_finish, pair_phase))
+    rank_offsets = np.searchsorted(pair_phase[rows], np.arange(len(firsts) + 1))
+    return IOPhases(
+        start=phase_start,
+        end=phase_end,
+        ops=phase_ops,
+        bytes=phase_bytes,
+        op_phase=op_phase,
+        rank_offsets=rank_offsets,
+        rank=rank_keys[pairs[rows] % nkeys],
+        rank_finish=pair_finish[rows],
+        rank_busy=pair_busy[rows],
+        rank_bytes=pair_bytes[rows],
+    )
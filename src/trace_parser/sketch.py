@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Mapping
+
+import numpy as np
+
+# Values of custom statistics buffered per key before they are folded into the
+# sketch, bounds the memory of aggregate_op_sketches.
+SKETCH_BUFFER = 1 << 16
+
+
+class QuantileSketch:
+    """
+    Mergeable t-digest of a stream of values, with exact count, sum, min and max.
+
+    Values are kept as weighted centroids, small near the tails and large near
+    the median, so memory is bounded by the compression (in the order of
+    compression / 2 centroids) and tail quantiles such as p99.9 stay accurate.
+    Added values are buffered and merged into the centroids every
+    5 * compression values, or when the centroids are read. Sketches of the
+    same statistic from different traces or processes merge by merging their
+    centroids, without the raw values.
+    """
+
+    def __init__(self, compression: float = 200):
+        """
+        :param compression: Accuracy of the sketch. Higher values keep more
+                            centroids and give more accurate quantiles.
+        :type compression: float
+        """
+        self.compression = compression
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def of(cls, values, compression: float = 200) -> QuantileSketch:
+        sketch = cls(compression)
+        sketch.update(values)
+        return sketch
+
+    def update(self, values) -> QuantileSketch:
+        """
+        Adds an array of values to the sketch.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if self._buffered >= 5 * self.compression:
+            self._flush()
+        return self
+
+    @property
+    def means(self) -> np.ndarray:
+        """
+        Mean of every centroid, in increasing order.
+        """
+        self._flush()
+        return self._means
+
+    @property
+    def weights(self) -> np.ndarray:
+        """
+        Number of values of every centroid.
+        """
+        self._flush()
+        return self._weights
+
+    def _flush(self) -> None:
+        if self._buffer:
+            values = np.concatenate(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            self._compress(
+                np.concatenate([self._means, values]),
+                np.concatenate([self._weights, np.ones(len(values))]),
+            )
+
+    def merge(self, other: QuantileSketch) -> QuantileSketch:
+        """
+        Merges another sketch into this one, keeping this sketch's compression.
+        """
+        if not other.count:
+            return self
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+        return self
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        # Merges neighbouring centroids as long as a cluster spans at most one
+        # unit of the scale function k: k(q_right) - k(q_left) <= 1 on the
+        # cumulative weight. k is the log-odds scale of the t-digest, steep at
+        # both tails, normalized so a sketch keeps in the order of
+        # `compression` / 2 centroids. Clusters are grown greedily from the
+        # left, jumping to the end of every cluster with one binary search, so
+        # the loop runs once per output centroid.
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        q_right = np.cumsum(weights)
+        total = q_right[-1]
+        q_right /= total
+        scale = self.compression / (
+            4 * math.log(max(total / self.compression, 1)) + 24
+        )
+        ends = []
+        start, q_left = 0, 0.0
+        while start < len(means):
+            if q_left <= 0:
+                q_limit = 0.0
+            elif q_left >= 1:
+                q_limit = 1.0
+            else:
+                k_limit = scale * math.log(q_left / (1 - q_left)) + 1
+                q_limit = 1 / (1 + math.exp(-k_limit / scale))
+            # A centroid heavier than the limit forms a cluster of its own.
+            end = max(int(np.searchsorted(q_right, q_limit, side="right")), start + 1)
+            ends.append(end)
+            q_left = float(q_right[end - 1])
+            start = end
+        starts = np.concatenate([[0], ends[:-1]]).astype(np.intp)
+        self._weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(weights * means, starts) / self._weights
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else math.nan
+
+    def quantile(self, q):
+        """
+        Estimated quantile(s) q in [0, 1] of the values, NaN for an empty sketch.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if not self.count:
+            return np.full(q.shape, math.nan)[()]
+        centers = np.cumsum(self.weights) - self.weights / 2
+        x = np.concatenate([[0.0], centers, [float(self.count)]])
+        y = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q * self.count, x, y)[()]
+
+    def cdf(self, x):
+        """
+        Estimated fraction of the values at or below x.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if not self.count:
+            return np.full(x.shape, math.nan)[()]
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.concatenate([[0.0], centers, [float(self.count)]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return (np.interp(x, values, ranks, left=0.0) / self.count)[()]
+
+    def histogram(self, edges) -> np.ndarray:
+        """
+        Estimated number of values in every bin [edges[i], edges[i + 1]].
+        """
+        return np.diff(self.cdf(np.asarray(edges, dtype=np.float64))) * self.count
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-serializable form of the sketch, see from_dict.
+        """
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> QuantileSketch:
+        sketch = cls(data["compression"])
+        sketch._means = np.asarray(data["means"], dtype=np.float64)
+        sketch._weights = np.asarray(data["weights"], dtype=np.float64)
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+
+def merge_sketches(
+    results: Iterable[Dict[str, Dict[Hashable, QuantileSketch]]],
+) -> Dict[str, Dict[Hashable, QuantileSketch]]:
+    """
+    Merges the outputs of several aggregate_op_sketches calls, e.g. of different
+    traces, statistic by statistic and key by key.
+    """
+    merged = {}
+    for result in results:
+        for name, sketches in result.items():
+            target = merged.setdefault(name, {})
+            for key, sketch in sketches.items():
+                if key in target:
+                    target[key].merge(sketch)
+                else:
+                    target[key] = QuantileSketch(sketch.compression).merge(sketch)
+    return merged
+
@@ -0,0 +1,228 @@
+"""
+Synthetic traces for the benchmarks, one generator per backend. Every generator
+is deterministic for a given seed.
+"""
+import random
+from typing import Any, Dict, List
+
+# Function table of the synthetic Recorder traces, see SyntheticRecorderReader.
+RECORDER_FUNCS = [
+    "MPI_File_open", "MPI_File_write_at_all", "MPI_File_read_at_all", "write",
+    "read", "lseek", "MPI_Barrier", "MPI_Comm_rank", "MPI_File_close",
+]
+
+
+def dxt_records(
+    nranks: int,
+    ops_per_rank: int,
+    files_per_rank: int = 1,
+    overlap: float = 0.0,
+    seed: int = 0,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    DXT records shaped like `DarshanReport(..., dtype="dict").records`: one
+    record per (rank, file) in DXT_POSIX and DXT_MPIIO, each with read and write
+    segment lists.
+
+    :param nranks: Number of ranks.
+    :param ops_per_rank: Segments per rank and module, spread over the files.
+    :param files_per_rank: Files accessed by every rank.
+    :param overlap: Probability of a segment starting before the previous
+                    segment of its record ended.
+    :param seed: Random seed.
+    """
+    rnd = random.Random(seed)
+    records = {"DXT_POSIX": [], "DXT_MPIIO": []}
+    for mod in records:
+        for rank in range(nranks):
+            for f in range(files_per_rank):
+                segments = {"read_segments": [], "write_segments": []}
+                t = rnd.random()
+                offset = 0
+                for _ in range(ops_per_rank // files_per_rank):
+                    length = rnd.choice((4096, 65536, 1 << 20))
+                    duration = rnd.uniform(1e-5, 1e-3)
+                    if rnd.random() < overlap:
+                        t -= duration / 2
+                    segments[rnd.choice(tuple(segments))].append({
+                        "offset": offset,
+                        "length": length,
+                        "start_time": t,
+                        "end_time": t + duration,
+                    })
+                    offset += length
+                    t += duration + rnd.uniform(0, 1e-4)
+                records[mod].append({"rank": rank, "id": f + 1, **segments})
+    return records
+
+
+def write_otf2(
+    path: str,
+    nlocations: int,
+    ops_per_location: int,
+    overlap: float = 0.0,
+    async_fraction: float = 0.0,
+    seed: int = 0,
+) -> str:
+    """
+    Writes an OTF2 archive with the `otf2` writer, with POSIX reads and writes
+    inside `read`/`write` regions and non-blocking MPI-IO writes issued in
+    `MPI_File_iwrite` and completed later in `MPI_Wait`.
+
+    :param path: Directory of the archive.
+    :param nlocations: Number of locations (ranks).
+    :param ops_per_location: I/O operations per location.
+    :param overlap: Probability of an operation running nested inside the
+                    previous one in the same region.
+    :param async_fraction: Fraction of non-blocking MPI-IO operations.
+    :param seed: Random seed.
+    :return: Path of the anchor file.
+    """
+    import otf2
+    from otf2.enums import (
+        IoOperationFlag, IoOperationMode, IoParadigmClass, IoParadigmFlag,
+    )
+
+    rnd = random.Random(seed)
+    with otf2.writer.open(path, timer_resolution=1_000_000_000) as trace:
+        defs = trace.definitions
+        root = defs.system_tree_node("root")
+        posix = defs.io_paradigm(
+            identification="POSIX", name="POSIX I/O",
+            io_paradigm_class=IoParadigmClass.SERIAL,
+            io_paradigm_flags=IoParadigmFlag.NONE,
+        )
+        mpiio = defs.io_paradigm(
+            identification="MPI-IO", name="MPI I/O",
+            io_paradigm_class=IoParadigmClass.PARALLEL,
+            io_paradigm_flags=IoParadigmFlag.NONE,
+        )
+        regions = {
+            name: defs.region(name)
+            for name in ("main", "read", "write", "MPI_File_iwrite", "MPI_Wait")
+        }
+        for loc_id in range(nlocations):
+            group = defs.location_group(f"rank {loc_id}", system_tree_parent=root)
+            location = defs.location("Master thread", group=group)
+            data = defs.io_regular_file(f"/data/rank{loc_id}.bin", scope=root)
+            fd = defs.io_handle("fd", file=data, io_paradigm=posix)
+            fh = defs.io_handle("fh", file=data, io_paradigm=mpiio)
+            w = trace.event_writer_from_location(location)
+
+            t = 1000
+            matching_id = 0
+            pending = []
+            w.enter(t, regions["main"])
+            for _ in range(ops_per_location):
+                t += rnd.randint(1, 20)
+                matching_id += 1
+                if rnd.random() < async_fraction:
+                    w.enter(t, regions["MPI_File_iwrite"])
+                    w.io_operation_begin(
+                        t + 1, fh, IoOperationMode.WRITE,
+                        IoOperationFlag.NON_BLOCKING, 65536, matching_id,
+                    )
+                    w.leave(t + 2, regions["MPI_File_iwrite"])
+                    pending.append(matching_id)
+                    t += 2
+                else:
+                    region, mode = rnd.choice(
+                        ((regions["read"], IoOperationMode.READ),
+                         (regions["write"], IoOperationMode.WRITE))
+                    )
+                    outer = matching_id
+                    end = t + 1 + rnd.randint(5, 50)
+                    w.enter(t, region)
+                    w.io_operation_begin(
+                        t + 1, fd, mode, IoOperationFlag.NONE, 4096, outer
+                    )
+                    if rnd.random() < overlap:
+                        matching_id += 1
+                        w.io_operation_begin(
+                            t + 2, fd, mode, IoOperationFlag.NONE, 4096, matching_id
+                        )
+                        w.io_operation_complete(end - 1, fd, 4096, matching_id)
+                    w.io_operation_complete(end, fd, 4096, outer)
+                    w.leave(end + 1, region)
+                    t = end + 1
+                if pending and rnd.random() < 0.5:
+                    t += 1
+                    w.enter(t, regions["MPI_Wait"])
+                    w.io_operation_complete(t + 1, fh, 65536, pending.pop(0))
+                    w.leave(t + 2, regions["MPI_Wait"])
+                    t += 2
+            for done in pending:
+                t += 1
+                w.enter(t, regions["MPI_Wait"])
+                w.io_operation_complete(t + 1, fh, 65536, done)
+                w.leave(t + 2, regions["MPI_Wait"])
+                t += 2
+            w.leave(t + 1, regions["main"])
+    return f"{path}/traces.otf2"
+
+
+class _Record:
+    # Field layout of recorder_viz's PyRecord.
+    __slots__ = ("tstart", "tend", "call_depth", "func_id", "tid", "arg_count", "args")
+
+    def __init__(self, tstart, tend, call_depth, func_id, args):
+        self.tstart = tstart
+        self.tend = tend
+        self.call_depth = call_depth
+        self.func_id = func_id
+        self.tid = 0
+        self.arg_count = len(args)
+        self.args = args
+
+
+class _LocalMetadata:
+    def __init__(self, total_records: int):
+        self.total_records = total_records
+
+
+class _GlobalMetadata:
+    def __init__(self, total_ranks: int):
+        self.total_ranks = total_ranks
+
+
+class SyntheticRecorderReader:
+    """
+    In-memory stand-in for `recorder_viz.RecorderReader` with the attributes the
+    Recorder TraceParser reads: `funcs`, `GM.total_ranks`, `LMs[rank]` and
+    `records[rank]`. Every rank runs MPI-IO collectives that issue nested POSIX
+    calls, with a barrier and a rank query in between.
+
+    Assign it to `TraceParser.rr` to parse it without a Recorder installation.
+    """
+
+    def __init__(self, nranks: int, records_per_rank: int, seed: int = 0):
+        rnd = random.Random(seed)
+        self.funcs = list(RECORDER_FUNCS)
+        fid = {name: i for i, name in enumerate(self.funcs)}
+        self.GM = _GlobalMetadata(nranks)
+        self.records = []
+        self.LMs = []
+        for rank in range(nranks):
+            records = []
+            t = 0.0
+            while len(records) < records_per_rank:
+                d = rnd.uniform(1e-5, 1e-3)
+                write = rnd.random() < 0.5
+                mpi = "MPI_File_write_at_all" if write else "MPI_File_read_at_all"
+                posix = "write" if write else "read"
+                size = str(rnd.choice((4096, 65536, 1 << 20))).encode()
+                records.append(_Record(t, t + 3 * d, 0, fid[mpi], [b"fh", b"0"]))
+                records.append(_Record(t + d, t + 2 * d, 1, fid["lseek"], [b"3"]))
+                records.append(
+                    _Record(t + d, t + 2.5 * d, 1, fid[posix], [b"3", b"0x1", size])
+                )
+                records.append(
+                    _Record(t + 3.5 * d, t + 4 * d, 0, fid["MPI_Barrier"], [])
+                )
+                records.append(
+                    _Record(t + 4 * d, t + 4.1 * d, 0, fid["MPI_Comm_rank"], [])
+                )
+                t += 5 * d
+            del records[records_per_rank:]
+            self.records.append(records)
+            self.LMs.append(_LocalMetadata(len(records)))
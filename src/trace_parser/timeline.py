@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from typing import Hashable, List
+
+import numpy as np
+
+# Ops processed per vectorized step, bounds the temporary memory of large traces.
+CHUNK_SIZE = 1 << 22
+
+
+class Timeline:
+    """
+    Time-binned histograms of the ops of a trace, one row per group.
+
+    `edges` holds the bin edges and `keys` the group key of every row. `bytes` is
+    the number of bytes moved in every bin, with the bytes of an op spread over
+    the bins it spans in proportion to the time it spends in each. `ops` counts
+    the ops starting in every bin and `busy` sums the time ops spend in every
+    bin. `active_ranks`, if computed, is the time ranks spend doing any I/O in
+    every bin, counting overlapping ops of a rank once.
+    """
+
+    def __init__(
+        self,
+        edges: np.ndarray,
+        keys: List[Hashable],
+        bytes: np.ndarray,
+        ops: np.ndarray,
+        busy: np.ndarray,
+        active_ranks: np.ndarray | None = None,
+    ):
+        self.edges = edges
+        self.keys = keys
+        self.bytes = bytes
+        self.ops = ops
+        self.busy = busy
+        self.active_ranks = active_ranks
+
+    @property
+    def bin_width(self) -> float:
+        return float(self.edges[1] - self.edges[0])
+
+    @property
+    def throughput(self) -> np.ndarray:
+        """
+        Bytes per time unit in every bin.
+        """
+        return self.bytes / self.bin_width
+
+    @property
+    def concurrency(self) -> np.ndarray:
+        """
+        Average number of ops in flight in every bin.
+        """
+        return self.busy / self.bin_width
+
+    @property
+    def rank_concurrency(self) -> np.ndarray | None:
+        """
+        Average number of ranks doing I/O in every bin, None if not computed.
+        """
+        if self.active_ranks is None:
+            return None
+        return self.active_ranks / self.bin_width
+
+    def total(self) -> Timeline:
+        """
+        Sums the rows of all groups into one row. Rank concurrency can not be
+        summed across groups and is dropped.
+        """
+        return Timeline(
+            self.edges, [None], self.bytes.sum(axis=0, keepdims=True),
+            self.ops.sum(axis=0, keepdims=True), self.busy.sum(axis=0, keepdims=True),
+        )
+
+    def __getitem__(self, key: Hashable) -> Timeline:
+        i = self.keys.index(key)
+        return Timeline(
+            self.edges, [key], self.bytes[i:i + 1], self.ops[i:i + 1],
+            self.busy[i:i + 1],
+            None if self.active_ranks is None else self.active_ranks[i:i + 1],
+        )
+
+
+def bin_edges(
+    start: np.ndarray, end: np.ndarray, bin_width: float, t0=None, t1=None
+) -> np.ndarray:
+    """
+    Bin edges of width bin_width covering [t0, t1], which default to the first
+    start and the last end time.
+    """
+    if bin_width <= 0:
+        raise ValueError(f"Bin width must be positive: {bin_width}")
+    if t0 is None:
+        t0 = start.min() if len(start) else 0
+    if t1 is None:
+        t1 = end.max() if len(end) else t0
+    nbins = max(1, int(np.ceil((t1 - t0) / bin_width)))
+    return t0 + bin_width * np.arange(nbins + 1, dtype=np.float64)
+
+
+def _spread(
+    out: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    weight: np.ndarray,
+    codes: np.ndarray,
+    edges: np.ndarray,
+) -> None:
+    """
+    Adds `weight` of every interval to the flattened (group, bin) histogram
+    `out`, spread over the bins in proportion to the time spent in each. Parts
+    of intervals outside the edges are dropped; intervals without a positive
+    duration put their whole weight into the bin of their start.
+    """
+    nbins = len(edges) - 1
+    t0, width = edges[0], edges[1] - edges[0]
+    start = start.astype(np.float64)
+    end = end.astype(np.float64)
+    duration = end - start
+    instant = duration <= 0
+    rate = np.divide(weight, duration, out=np.zeros(len(duration)), where=~instant)
+    base = codes.astype(np.intp) * nbins
+    size = len(out)
+
+    inside = instant & (start >= edges[0]) & (start < edges[-1])
+    bins = ((start[inside] - t0) // width).astype(np.intp)
+    out += np.bincount(base[inside] + bins, weights=weight[inside], minlength=size)
+
+    # Only the part of an interval inside the edges is binned.
+    start = np.clip(start, edges[0], edges[-1])
+    end = np.clip(end, edges[0], edges[-1])
+    first = np.clip(((start - t0) // width).astype(np.intp), 0, nbins - 1)
+    last = np.clip(((end - t0) // width).astype(np.intp), 0, nbins - 1)
+    # Partial first and last bins.
+    first_end = np.minimum(end, edges[first + 1])
+    out += np.bincount(
+        base + first, weights=rate * (first_end - start), minlength=size
+    )
+    spans = last > first
+    out += np.bincount(
+        (base + last)[spans],
+        weights=(rate * (end - edges[last]))[spans],
+        minlength=size,
+    )
+    # Fully covered bins in between, through a difference array of the rates.
+    inner = last > first + 1
+    diff = np.bincount(
+        (base + first + 1)[inner], weights=rate[inner], minlength=size + 1
+    )
+    diff -= np.bincount((base + last)[inner], weights=rate[inner], minlength=size + 1)
+    # Each group row starts its own running sum, the rates of a group cancel
+    # out within its row.
+    out += np.cumsum(diff[:size]) * width
+
+
+def _merge_intervals(start, end, codes):
+    """
+    Merges the overlapping intervals of every code into disjoint intervals.
+    """
+    order = np.lexsort((start, codes))
+    start, end, codes = start[order], end[order], codes[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    reach = np.empty_like(end)
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(codes)]):
+        reach[lo:hi] = np.maximum.accumulate(end[lo:hi])
+    new = np.ones(len(start), dtype=bool)
+    new[1:] = (codes[1:] != codes[:-1]) | (start[1:] > reach[:-1])
+    heads = np.flatnonzero(new)
+    tails = np.r_[heads[1:], len(start)] - 1
+    return start[heads], reach[tails], codes[heads]
+
+
+def build_timeline(
+    start: np.ndarray,
+    end: np.ndarray,
+    nbytes: np.ndarray,
+    bin_width: float,
+    codes: np.ndarray | None = None,
+    keys: List[Hashable] | None = None,
+    ranks: np.ndarray | None = None,
+    t0=None,
+    t1=None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Timeline:
+    """
+    Bins ops into a Timeline.
+
+    :param start: Start time of every op.
+    :param end: End time of every op.
+    :param nbytes: Bytes moved by every op.
+    :param bin_width: Bin width, in the unit of the times.
+    :param codes: Group code of every op, indexing keys. None for one group.
+    :param keys: The group key of every code.
+    :param ranks: Rank of every op. If given, `active_ranks` is computed too.
+    :param t0: Start of the first bin, defaults to the first start time.
+    :param t1: End of the timeline, defaults to the last end time.
+    :param chunk_size: Ops binned per vectorized step.
+    :rtype: Timeline
+    """
+    start = np.asarray(start)
+    end = np.asarray(end)
+    if codes is None:
+        codes = np.zeros(len(start), dtype=np.intp)
+        keys = [None]
+    edges = bin_edges(start, end, bin_width, t0, t1)
+    nbins = len(edges) - 1
+    size = len(keys) * nbins
+
+    nbytes_out = np.zeros(size)
+    ops_out = np.zeros(size, dtype=np.int64)
+    busy_out = np.zeros(size)
+    for lo in range(0, len(start), chunk_size):
+        s = start[lo:lo + chunk_size]
+        e = end[lo:lo + chunk_size]
+        c = codes[lo:lo + chunk_size]
+        b = np.asarray(nbytes[lo:lo + chunk_size], dtype=np.float64)
+        _spread(nbytes_out, s, e, b, c, edges)
+        _spread(busy_out, s, e, (e - s).astype(np.float64), c, edges)
+        inside = (s >= edges[0]) & (s < edges[-1])
+        bins = ((s[inside] - edges[0]) // (edges[1] - edges[0])).astype(np.intp)
+        ops_out += np.bincount(
+            c[inside].astype(np.intp) * nbins + bins, minlength=size
+        )
+
+    active = None
+    if ranks is not None:
+        # Merge the ops of every (group, rank) so overlapping ops of a rank count
+        # once, then bin the merged intervals like the ops.
+        pairs, pair = np.unique(
+            np.stack([codes, np.asarray(ranks)]), axis=1, return_inverse=True
+        )
+        m_start, m_end, m_pair = _merge_intervals(start, end, pair.ravel())
+        active = np.zeros(size)
+        _spread(
+            active, m_start, m_end, (m_end - m_start).astype(float), pairs[0][m_pair],
+            edges,
+        )
+        active = active.reshape(len(keys), nbins)
+
+    shape = (len(keys), nbins)
+    return Timeline(
+        edges, keys, nbytes_out.reshape(shape), ops_out.reshape(shape),
+        busy_out.reshape(shape), active,
+    )
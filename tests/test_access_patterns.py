@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from darshan_trace_parser.AccessPatterns import analyze_access_patterns
+from darshan_trace_parser.custom_types import IOModule, IOType
+from darshan_trace_parser.IOOPColumns import IOOPColumns
+
+
+def stream(offsets, length=10, type=IOType.READ):
+    segments = [
+        {"offset": offset, "length": length, "start_time": i, "end_time": i + 0.5}
+        for i, offset in enumerate(offsets)
+    ]
+    return IOOPColumns.from_segments(IOModule.DXT_POSIX, type, 0, segments)
+
+
+def patterns(offsets, **kwargs):
+    result = analyze_access_patterns(stream(offsets, **kwargs))
+    assert len(result) == 1
+    return result.pattern_counts(), int(result.stride[0])
+
+
+def only(pattern):
+    return {
+        name: int(name == pattern)
+        for name in ("sequential", "strided", "random", "overlapping_writes",
+                     "single")
+    }
+
+
+def test_single_access_is_single():
+    result = analyze_access_patterns(stream([0]))
+    assert result.pattern_counts() == only("single")
+    assert np.isnan(result.sequential_fraction[0])
+
+
+def test_no_accesses():
+    result = analyze_access_patterns(IOOPColumns.concat([]))
+    assert len(result) == 0
+    assert sum(result.pattern_counts().values()) == 0
+
+
+def test_sequential():
+    assert patterns([0, 10, 20, 30]) == (only("sequential"), 0)
+
+
+def test_zero_stride_is_not_strided():
+    assert patterns([0, 0, 0, 0, 0]) == (only("random"), 0)
+
+
+def test_repeated_writes_at_one_offset_overlap():
+    counts, _ = patterns([0, 0, 0], type=IOType.WRITE)
+    assert counts == only("overlapping_writes")
+
+
+def test_stride_is_the_most_common_one():
+    # The first pair is 5 apart, all the others 100.
+    assert patterns([0, 5, 105, 205, 305, 405, 505]) == (only("strided"), 100)
+
+
+@pytest.mark.parametrize("offsets", [[0, 100, 100, 200, 200], [0, 100, 30, 130]])
+def test_strides_below_threshold_are_random(offsets):
+    assert patterns(offsets) == (only("random"), 0)
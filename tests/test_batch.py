@@ -0,0 +1,71 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from trace_parser.batch import BatchResult, main
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_to_csv_writes_scalar_stats_in_first_row(tmp_path):
+    result = BatchResult()
+    result.backends["t"] = "darshan"
+    result.stats["t"] = {
+        "count": {("A", "B"): 3},
+        "duration": {("A", "B"): np.array([1.0, 2.0, 3.0])},
+    }
+    (path,) = result.to_csv(str(tmp_path))
+    rows = read_csv(path)
+    assert rows[0] == ["", "t_count", "t_duration"]
+    assert rows[1] == ["0", "3", "1.0"]
+    assert rows[2] == ["1", "", "2.0"]
+    assert len(rows) == 4
+
+
+def test_cli_count_with_csv_output(tmp_path):
+    pytest.importorskip("otf2")
+    from trace_parser.synthetic import write_otf2
+
+    traces = tmp_path / "traces"
+    write_otf2(str(traces / "run"), 2, 20)
+    out = tmp_path / "out"
+    code = main([
+        str(traces), "--stats", "count", "duration", "--workers", "1",
+        "--output-dir", str(out),
+    ])
+    assert code == 0
+    written = [
+        os.path.join(root, name) for root, _, names in os.walk(out) for name in names
+    ]
+    assert written
+    total = 0
+    for path in written:
+        rows = read_csv(path)
+        assert rows[0][1:] == ["run_count", "run_duration"]
+        count = int(rows[1][1])
+        assert count == len(rows) - 1
+        total += count
+    assert total == 2 * 20
+
+
+def test_to_csv_separates_backends_with_equal_key_names(tmp_path):
+    import enum
+
+    RecorderMod = enum.Enum("IOMod", "WRITE")
+    ScorepMod = enum.Enum("IOMod", "WRITE")
+    result = BatchResult()
+    result.backends.update(rec="recorder", otf="scorep")
+    result.stats["rec"] = {"bytes": {(RecorderMod.WRITE,): [1]}}
+    result.stats["otf"] = {"bytes": {(ScorepMod.WRITE,): [2]}}
+    written = result.to_csv(str(tmp_path))
+    assert sorted(written) == [
+        str(tmp_path / "recorder" / "WRITE.csv"),
+        str(tmp_path / "scorep" / "WRITE.csv"),
+    ]
+    assert read_csv(tmp_path / "recorder" / "WRITE.csv")[1] == ["0", "1"]
+    assert read_csv(tmp_path / "scorep" / "WRITE.csv")[1] == ["0", "2"]
@@ -0,0 +1,40 @@
+import pytest
+
+from trace_parser.benchmark import run_benchmarks
+
+
+def test_scorep_benchmark_with_decoding_workers():
+    pytest.importorskip("otf2")
+    report = run_benchmarks(["scorep"], ranks=4, ops=50, workers=2)
+    assert report["errors"] == {}
+    stages = {r["stage"]: r for r in report["results"]}
+    assert stages["parse"]["ops"] == 4 * 50
+
+
+def test_synthetic_darshan_stages_are_not_named_like_log_parsing():
+    report = run_benchmarks(["darshan"], ranks=2, ops=20)
+    assert report["errors"] == {}
+    stages = [r["stage"] for r in report["results"]]
+    assert "index_records" in stages and "columnize" in stages
+    assert "open" not in stages and "parse" not in stages
+
+
+def test_build_ops_compares_slotted_and_dict_backed_ioops():
+    report = run_benchmarks(["darshan"], ranks=2, ops=200)
+    assert report["errors"] == {}
+    stages = {r["stage"]: r for r in report["results"]}
+    slotted, dict_backed = stages["build_ops"], stages["build_ops_dict"]
+    assert slotted["ops"] == dict_backed["ops"] == stages["columnize"]["ops"]
+    assert slotted["bytes_per_op"] < dict_backed["bytes_per_op"]
+    assert slotted["column_bytes_per_op"] == dict_backed["column_bytes_per_op"] > 0
+
+
+def test_dict_backed_copy_keeps_the_op_methods():
+    from darshan_trace_parser.custom_types import IOModule, IOType
+    from darshan_trace_parser.IOOP import IOOP
+    from trace_parser.benchmark import dict_backed
+
+    op = dict_backed(IOOP)(IOModule.DXT_POSIX, IOType.READ, 0, 1.0, 3.0, 8, 4)
+    assert vars(op)["length"] == 4
+    assert (op.end_offset, op.duration, op.bandwidth) == (12, 2.0, 2.0)
+    assert not hasattr(IOOP(IOModule.DXT_POSIX, IOType.READ, 0, 1, 3, 8, 4), "__dict__")
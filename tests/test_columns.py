@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from darshan_trace_parser.custom_types import IOModule, IOType
+from darshan_trace_parser.IOOPColumns import COLUMN_STATS, IOOPColumns
+
+
+@pytest.fixture
+def ops():
+    segments = [
+        {"offset": i, "length": 10 * (i + 1), "start_time": i, "end_time": i + 0.5}
+        for i in range(5)
+    ]
+    return IOOPColumns.concat([
+        IOOPColumns.from_segments(IOModule.DXT_POSIX, IOType.READ, 0, segments[:3]),
+        IOOPColumns.from_segments(IOModule.DXT_POSIX, IOType.WRITE, 1, segments[3:]),
+    ])
+
+
+@pytest.mark.parametrize("compression", [None, 100])
+def test_aggregate_count_is_exact_in_both_modes(ops, compression):
+    result = ops.aggregate(["count"], COLUMN_STATS, compression)
+    assert result["count"] == {
+        (IOModule.DXT_POSIX, IOType.READ): 3,
+        (IOModule.DXT_POSIX, IOType.WRITE): 2,
+    }
+
+
+def test_aggregate_sketches_match_exact_values(ops):
+    exact = ops.aggregate(["bytes"], COLUMN_STATS)["bytes"]
+    sketches = ops.aggregate(
+        {"bytes": "bytes", "size": lambda op: op.length}, COLUMN_STATS, 100
+    )
+    for name in ("bytes", "size"):
+        for key, values in exact.items():
+            sketch = sketches[name][key]
+            assert sketch.count == len(values)
+            assert sketch.sum == pytest.approx(np.sum(values))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from trace_parser.sketch import QuantileSketch, merge_sketches
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).lognormal(0, 1.5, 200_000)
+
+
+@pytest.mark.parametrize("batch", [100, 65536])
+def test_tail_quantiles_are_accurate(values, batch):
+    sketch = QuantileSketch()
+    for i in range(0, len(values), batch):
+        sketch.update(values[i:i + batch])
+    for q, tolerance in ((0.5, 0.03), (0.99, 0.02), (0.999, 0.02)):
+        expected = np.quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=tolerance)
+    assert len(sketch.means) < 2 * sketch.compression
+
+
+def test_merged_sketches_keep_tail_accuracy(values):
+    parts = [{"x": {"k": QuantileSketch.of(values[i::4])}} for i in range(4)]
+    merged = merge_sketches(parts)["x"]["k"]
+    assert merged.count == len(values)
+    assert merged.quantile(0.999) == pytest.approx(
+        np.quantile(values, 0.999), rel=0.02
+    )
+
+
+def test_round_trip_flushes_buffered_values():
+    sketch = QuantileSketch().update([1.0, 2.0, 3.0])
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.means.tolist() == [1.0, 2.0, 3.0]
+    assert restored.quantile(0.5) == sketch.quantile(0.5) == 2.0